@@ -50,35 +50,18 @@ if __name__ == "__main__":
 		
 		# Log message
 		if channel.type is discord.ChannelType.private:
-			await ctx.bot.db.execute(
-				"""
-				INSERT INTO chat.messages (
-					created_at, message_id, 
-					author_id, author_name, author_discriminator, author_display_name, 
-					direct_message, 
-					message_content, embeds
-				)
-				VALUES ($1, $2, $3, $4, $5, $6, TRUE, $7, CAST($8 AS jsonb[]))
-				""", 
+			await ctx.bot.message_log_writer.put(
 				message.created_at.replace(tzinfo = datetime.timezone.utc), message.id, 
 				author.id, author.name, author.discriminator, author.display_name, 
+				True, None, None, None, None, 
 				message.content.replace('\N{NULL}', ""), 
 				[replace_null_character(embed.to_dict()) for embed in message.embeds]
 			)
 		else:
-			await ctx.bot.db.execute(
-				"""
-				INSERT INTO chat.messages (
-					created_at, message_id, 
-					author_id, author_name, author_discriminator, author_display_name, 
-					direct_message, channel_id, channel_name, guild_id, guild_name, 
-					message_content, embeds
-				)
-				VALUES ($1, $2, $3, $4, $5, $6, FALSE, $7, $8, $9, $10, $11, CAST($12 AS jsonb[]))
-				""", 
+			await ctx.bot.message_log_writer.put(
 				message.created_at.replace(tzinfo = datetime.timezone.utc), message.id, 
 				author.id, author.name, author.discriminator, author.display_name, 
-				channel.id, channel.name, guild.id, guild.name, 
+				False, channel.id, channel.name, guild.id, guild.name, 
 				message.content.replace('\N{NULL}', ""), 
 				[replace_null_character(embed.to_dict()) for embed in message.embeds]
 			)
@@ -178,8 +161,7 @@ if __name__ == "__main__":
 		if message.content.startswith(mentions):
 			content = message.clean_content.replace('@' + ctx.me.display_name, "", 1).strip()
 			embed = discord.Embed(color = ctx.bot.bot_color)
-			# TODO: Handle brain not loaded?
-			if aiml_response := ctx.bot.aiml_kernel.respond(content, sessionID = author.id):
+			if ctx.bot.aiml_brain_loaded.is_set() and (aiml_response := ctx.bot.aiml_kernel.respond(content, sessionID = author.id)):
 				embed.description = aiml_response
 				return await message.reply(embed = embed)
 			if games_cog := ctx.bot.get_cog("Games"):
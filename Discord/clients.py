@@ -3,13 +3,17 @@ import discord
 from discord.ext import commands, menus
 
 import asyncio
+import collections
 import contextlib
 import datetime
+import importlib.util
 import json
 import logging
 import os
 import random
+import re
 import sys
+import time
 import traceback
 from urllib import parse
 # TODO: use urllib.parse
@@ -17,6 +21,7 @@ from urllib import parse
 import aiml
 import aiohttp
 from aiohttp import web
+import asyncpg
 from clarifai_grpc.channel.clarifai_channel import ClarifaiChannel
 from clarifai_grpc.grpc.api import service_pb2_grpc
 import imgurpython
@@ -30,12 +35,16 @@ import wolframalpha
 from wordnik import swagger, WordApi, WordsApi
 import youtube_dl
 
+from utilities.audio_cache import AudioCache, TTSCache, YTDLInfoCache
+from utilities.audio_library import AudioLibrary
 from utilities.audio_player import AudioPlayer
 from utilities import errors
 from utilities.context import Context
-from utilities.database import create_database_pool
+from utilities.database import BufferedDatabaseWriter, CommandStatsWriter, create_database_pool
 from utilities.help_command import HelpCommand
+from utilities.http_cache import HTTPResponseCache
 from utilities.logging import AiohttpAccessLogger, initialize_aiohttp_access_logging, initialize_logging
+from utilities.workers import WorkerPool
 
 sys.path.insert(0, "..")
 from units.files import create_folder
@@ -88,6 +97,11 @@ class Bot(commands.Bot):
 		self.fake_ip = "nice try"
 		self.fake_location = "Fort Yukon, Alaska"
 		self.library_path = "D:/Music/"
+		self.preload_prefixes = True  # Cache all prefixes on startup
+		self.guild_settings_cache_size = 10000
+		self.guild_settings_cache_ttl = 3600  # seconds
+		self.guild_settings_listener_check_interval = 60  # seconds
+		self.permissions_cache_size = 1000  # users per guild
 		self.user_agent = "Discord Bot"  # TODO: Make more specific?
 		self.bot_color = self.bot_colour = discord.Color.blurple()  # previously 0x738bd7
 		self.rss_color = self.rss_colour = 0xfa9b39  # other options: f26522, ee802f, ff6600; http://www.strawpoll.me/12384409
@@ -125,12 +139,23 @@ class Bot(commands.Bot):
 		self.cache_channel = None
 		self.listener_bot = None  # User object
 		self.listing_sites = {}
+		self.listing_stats_interval = 300  # seconds, minimum between posts to each site
+		self.listing_stats_timeout = 10  # seconds, per request
+		self.listing_stats_retries = 3
+		self.listing_stats_update_requested = asyncio.Event()
 		# TODO: Include owner variable for user object?
 		# TODO: emote constants/variables
 		self.loop.create_task(self.initialize_constant_objects(), name = "Initialize Discord objects as constant attributes of Bot")
 		
 		# Variables
-		self.guild_settings = {}
+		self.direct_message_prefixes = {}
+		self.guild_prefixes = {}
+		self.prefix_cache_hits = self.prefix_cache_misses = 0
+		self.guild_settings = collections.OrderedDict()  # {guild_id: (retrieved time, settings)}, least recently used first
+		self.guild_settings_cache_hits = self.guild_settings_cache_misses = 0
+		self.guild_settings_listener = None  # Database connection listening for changes
+		self.guild_settings_listener_lost = asyncio.Event()
+		self.permissions_cache = {}  # {guild_id: OrderedDict({user_id: {command: setting}})}, users least recently used first
 		self.online_time = datetime.datetime.now(datetime.timezone.utc)
 		self.session_commands_invoked = {}
 		
@@ -151,43 +176,13 @@ class Bot(commands.Bot):
 		self.BLIZZARD_API_KEY = self.BATTLE_NET_API_KEY
 		self.GIPHY_API_KEY = self.GIPHY_PUBLIC_BETA_API_KEY
 		
+		# Startup times, in seconds
+		self.startup_times = {}
+		
 		# External Clients
-		## Clarifai
-		self.clarifai_stub = service_pb2_grpc.V2Stub(ClarifaiChannel.get_grpc_channel())
-		## Imgur
-		try:
-			self.imgur_client = imgurpython.ImgurClient(self.IMGUR_CLIENT_ID, self.IMGUR_CLIENT_SECRET)
-		except imgurpython.helpers.error.ImgurClientError as e:
-			self.print(f"Failed to initialize Imgur Client: {e}")
-		## OpenWeatherMap
-		try:
-			self.owm_client = pyowm.OWM(self.OWM_API_KEY)
-			self.weather_manager = self.owm_client.weather_manager()
-		except AssertionError as e:
-			self.print(f"Failed to initialize OpenWeatherMap client: {e}")
 		## Sentry (Raven)
 		self.sentry_client = self.raven_client = raven.Client(self.SENTRY_DSN, transport = raven_aiohttp.AioHttpTransport)
-		## Twitter
-		self.twitter_auth = tweepy.OAuthHandler(self.TWITTER_CONSUMER_KEY, self.TWITTER_CONSUMER_SECRET)
-		self.twitter_auth.set_access_token(self.TWITTER_ACCESS_TOKEN, self.TWITTER_ACCESS_TOKEN_SECRET)
-		self.twitter_api = tweepy.API(self.twitter_auth)
-		## Wolfram Alpha
-		self.wolfram_alpha_client = wolframalpha.Client(self.WOLFRAM_ALPHA_APP_ID)
-		## Wordnik
-		try:
-			self.wordnik_client = swagger.ApiClient(self.WORDNIK_API_KEY, "http://api.wordnik.com/v4")
-			self.wordnik_word_api = WordApi.WordApi(self.wordnik_client)
-			self.wordnik_words_api = WordsApi.WordsApi(self.wordnik_client)
-		except Exception as e:
-			self.print(f"Failed to initialize Wordnik Client: {e}")
-		## youtube-dl
-		self.ytdl_download_options = {"default_search": "auto", "noplaylist": True, "quiet": True, "format": "bestaudio/best", "extractaudio": True, 
-										"outtmpl": self.data_path + "/audio_cache/%(id)s-%(title)s.%(ext)s", "restrictfilenames": True}  # "audioformat": "mp3" ?
-		self.ytdl_download = youtube_dl.YoutubeDL(self.ytdl_download_options)
-		self.ytdl_info_options = {"default_search": "auto", "noplaylist": True, "quiet": True, "format": "webm[abr>0]/bestaudio/best", "prefer_ffmpeg": True}
-		self.ytdl_info = youtube_dl.YoutubeDL(self.ytdl_info_options)
-		self.ytdl_playlist_options = {"default_search": "auto", "ignoreerrors": True, "quiet": True, "format": "webm[abr>0]/bestaudio/best", "prefer_ffmpeg": True}
-		self.ytdl_playlist = youtube_dl.YoutubeDL(self.ytdl_playlist_options)
+		## Others are initialized concurrently with the database connection
 		
 		# AIML Kernel
 		self.aiml_kernel = aiml.Kernel()
@@ -216,11 +211,8 @@ class Bot(commands.Bot):
 		### orientation, party, president, question, religion, state, totalclients
 		for predicate, value in self.aiml_predicates.items():
 			self.aiml_kernel.setBotPredicate(predicate, value)
-		if os.path.isfile(self.data_path + "/aiml/aiml_brain.brn"):
-			self.aiml_kernel.bootstrap(brainFile = self.data_path + "/aiml/aiml_brain.brn")
-		elif os.path.isfile(self.data_path + "/aiml/std-startup.xml"):
-			self.aiml_kernel.bootstrap(learnFiles = self.data_path + "/aiml/std-startup.xml", commands = "load aiml b")
-			self.aiml_kernel.saveBrain(self.data_path + "/aiml/aiml_brain.brn")
+		self.aiml_brain_loaded = asyncio.Event()
+		self.loop.create_task(self.time_startup("AIML brain", self.load_aiml_brain()), name = "Load AIML brain")
 		
 		# Aiohttp Client Session
 		self.loop.run_until_complete(self.initialize_aiohttp_client_session())
@@ -232,10 +224,37 @@ class Bot(commands.Bot):
 		self.db = self.database = self.database_connection_pool = None
 		self.connected_to_database = asyncio.Event()
 		self.connected_to_database.set()
-		self.loop.run_until_complete(self.initialize_database())
+		self.loop.run_until_complete(asyncio.gather(self.initialize_external_clients(), 
+													self.time_startup("Database", self.initialize_database())))
+		if self.preload_prefixes:
+			self.loop.run_until_complete(self.retrieve_all_prefixes())
+		self.loop.run_until_complete(self.listen_for_guild_settings_changes())
+		self.guild_settings_listener_task = self.loop.create_task(
+			self.maintain_guild_settings_listener(), name = "Maintain guild settings listener connection"
+		)
+		
+		# Message logging
+		self.message_log_writer = BufferedDatabaseWriter(
+			self.db, 
+			"""
+			INSERT INTO chat.messages (
+				created_at, message_id, 
+				author_id, author_name, author_discriminator, author_display_name, 
+				direct_message, channel_id, channel_name, guild_id, guild_name, 
+				message_content, embeds
+			)
+			VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, CAST($13 AS jsonb[]))
+			ON CONFLICT (message_id) DO NOTHING
+			"""
+		)
+		self.message_log_writer.start(self.loop, name = "Write message logs to database")
+		
+		# Command stats
+		self.command_stats_writer = CommandStatsWriter(self.db, self.online_time)
+		self.command_stats_writer.start(self.loop)
 		
 		# HTTP Web Server
-		self.loop.run_until_complete(initialize_aiohttp_access_logging(self.database))
+		self.access_log_writer = self.loop.run_until_complete(initialize_aiohttp_access_logging(self.database))
 		self.aiohttp_web_app = web.Application()
 		self.aiohttp_web_app.add_routes([web.get('/', self.web_server_get_handler), 
 										web.post('/', self.web_server_post_handler), 
@@ -244,9 +263,22 @@ class Bot(commands.Bot):
 												access_log_class = AiohttpAccessLogger)
 		self.aiohttp_site = None  # Initialized when starting web server
 		
+		# Worker processes for evaluating input
+		self.evaluation_worker_pool = WorkerPool()
+		self.evaluation_worker_pool.start()
+		
+		# Audio file indexes, shared by audio players and refreshed by the Audio cog
+		self.audio_file_library = AudioLibrary(self.data_path + "/audio_files")
+		self.music_library = AudioLibrary(self.library_path, (".mp3", ".m4a"))
+		
 		# Create temp folder
 		create_folder(self.data_path + "/temp")
 		
+		# Text-To-Speech audio cache
+		create_folder(self.data_path + "/tts_cache")
+		self.tts_cache = TTSCache(self, self.data_path + "/tts_cache")
+		self.tts_cache.load()
+		
 		# Add load, unload, and reload commands
 		self.add_command(self.load)
 		self.add_command(self.unload)
@@ -261,21 +293,132 @@ class Bot(commands.Bot):
 		self.unload_aiml = staticmethod(self.unload_aiml)
 		
 		# Load cogs
-		for file in sorted(os.listdir("cogs")):
-			if file.endswith(".py") and not file.startswith(("images", "info", "random", "reactions")):
-				self.load_extension("cogs." + file[:-3])
-		self.load_extension("cogs.images")
-		self.load_extension("cogs.info")
-		self.load_extension("cogs.random")
-		self.load_extension("cogs.reactions")
+		## Cogs that declare DEFERRABLE = True are loaded after startup
+		extensions = ["cogs." + file[:-3] for file in sorted(os.listdir("cogs")) 
+						if file.endswith(".py") and not file.startswith(("images", "info", "random", "reactions"))]
+		extensions += ["cogs.images", "cogs.info", "cogs.random", "cogs.reactions"]
+		deferred_extensions = []
+		for extension in extensions:
+			if self.is_deferrable_extension(extension):
+				deferred_extensions.append(extension)
+			else:
+				with self.startup_timer(extension):
+					self.load_extension(extension)
 		# TODO: Document inter-cog dependencies/subcommands
 		# TODO: Catch exceptions on fail to load?
+		self.loop.create_task(self.load_deferred_extensions(deferred_extensions), name = "Load deferred cogs")
 		
 		self.loop.create_task(self.startup_tasks(), name = "Bot startup tasks")
 	
 	def print(self, message):
 		print(f"[{datetime.datetime.now().isoformat()}] {self.console_message_prefix}{message}")
 	
+	@contextlib.contextmanager
+	def startup_timer(self, name):
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.startup_times[name] = time.perf_counter() - start
+	
+	async def time_startup(self, name, coroutine):
+		with self.startup_timer(name):
+			return await coroutine
+	
+	async def initialize_external_clients(self):
+		# Client constructors block, so initialize each in a thread
+		await asyncio.gather(*(
+			self.loop.run_in_executor(None, self.initialize_external_client, name, initializer)
+			for name, initializer in (("Clarifai", self.initialize_clarifai_client), 
+										("Imgur", self.initialize_imgur_client), 
+										("OpenWeatherMap", self.initialize_owm_client), 
+										("Twitter", self.initialize_twitter_client), 
+										("Wolfram Alpha", self.initialize_wolfram_alpha_client), 
+										("Wordnik", self.initialize_wordnik_client), 
+										("youtube-dl", self.initialize_ytdl_clients))
+		))
+	
+	def initialize_external_client(self, name, initializer):
+		with self.startup_timer(name):
+			initializer()
+	
+	def initialize_clarifai_client(self):
+		self.clarifai_stub = service_pb2_grpc.V2Stub(ClarifaiChannel.get_grpc_channel())
+	
+	def initialize_imgur_client(self):
+		try:
+			self.imgur_client = imgurpython.ImgurClient(self.IMGUR_CLIENT_ID, self.IMGUR_CLIENT_SECRET)
+		except imgurpython.helpers.error.ImgurClientError as e:
+			self.print(f"Failed to initialize Imgur Client: {e}")
+	
+	def initialize_owm_client(self):
+		try:
+			self.owm_client = pyowm.OWM(self.OWM_API_KEY)
+			self.weather_manager = self.owm_client.weather_manager()
+		except AssertionError as e:
+			self.print(f"Failed to initialize OpenWeatherMap client: {e}")
+	
+	def initialize_twitter_client(self):
+		self.twitter_auth = tweepy.OAuthHandler(self.TWITTER_CONSUMER_KEY, self.TWITTER_CONSUMER_SECRET)
+		self.twitter_auth.set_access_token(self.TWITTER_ACCESS_TOKEN, self.TWITTER_ACCESS_TOKEN_SECRET)
+		self.twitter_api = tweepy.API(self.twitter_auth)
+	
+	def initialize_wolfram_alpha_client(self):
+		self.wolfram_alpha_client = wolframalpha.Client(self.WOLFRAM_ALPHA_APP_ID)
+	
+	def initialize_wordnik_client(self):
+		try:
+			self.wordnik_client = swagger.ApiClient(self.WORDNIK_API_KEY, "http://api.wordnik.com/v4")
+			self.wordnik_word_api = WordApi.WordApi(self.wordnik_client)
+			self.wordnik_words_api = WordsApi.WordsApi(self.wordnik_client)
+		except Exception as e:
+			self.print(f"Failed to initialize Wordnik Client: {e}")
+	
+	def initialize_ytdl_clients(self):
+		self.ytdl_download_options = {"default_search": "auto", "noplaylist": True, "quiet": True, "format": "bestaudio/best", "extractaudio": True, 
+										"outtmpl": self.data_path + "/audio_cache/%(extractor_key)s-%(id)s.%(ext)s", "restrictfilenames": True}  # "audioformat": "mp3" ?
+		self.ytdl_download = youtube_dl.YoutubeDL(self.ytdl_download_options)
+		self.ytdl_info_options = {"default_search": "auto", "noplaylist": True, "quiet": True, "format": "webm[abr>0]/bestaudio/best", "prefer_ffmpeg": True}
+		self.ytdl_info = youtube_dl.YoutubeDL(self.ytdl_info_options)
+		# Playlist entries are only listed, then resolved individually
+		self.ytdl_playlist_options = {"default_search": "auto", "extract_flat": "in_playlist", "ignoreerrors": True, "quiet": True}
+		self.ytdl_playlist = youtube_dl.YoutubeDL(self.ytdl_playlist_options)
+		# Downloaded audio is kept in an LRU cache, keyed by the extractor and ID in the filename
+		self.audio_cache = AudioCache(self, self.data_path + "/audio_cache")
+		self.audio_cache.load()
+		self.ytdl_info_cache = YTDLInfoCache(self)
+	
+	async def load_aiml_brain(self):
+		self.aiml_brain_loaded.clear()
+		await self.loop.run_in_executor(None, self.bootstrap_aiml_kernel)
+		self.aiml_brain_loaded.set()
+	
+	def bootstrap_aiml_kernel(self):
+		if os.path.isfile(self.data_path + "/aiml/aiml_brain.brn"):
+			self.aiml_kernel.bootstrap(brainFile = self.data_path + "/aiml/aiml_brain.brn")
+		elif os.path.isfile(self.data_path + "/aiml/std-startup.xml"):
+			self.aiml_kernel.bootstrap(learnFiles = self.data_path + "/aiml/std-startup.xml", commands = "load aiml b")
+			self.aiml_kernel.saveBrain(self.data_path + "/aiml/aiml_brain.brn")
+	
+	def is_deferrable_extension(self, name):
+		# Check source for declaration to avoid importing
+		source = importlib.util.find_spec(name).loader.get_source(name)
+		return re.search(r"^DEFERRABLE = True$", source, re.MULTILINE) is not None
+	
+	async def load_deferred_extensions(self, extensions):
+		for extension in extensions:
+			with self.startup_timer(extension):
+				try:
+					# Import in a thread first, so dependencies are already imported when loading
+					await self.loop.run_in_executor(None, importlib.import_module, extension)
+					self.load_extension(extension)
+				except Exception as e:
+					self.print(f"Failed to load {extension}: {type(e).__name__}: {e}")
+		await self.wait_until_ready()
+		await self.aiml_brain_loaded.wait()
+		self.print("Startup times:\n" + '\n'.join(f"{name}: {seconds:.3f}s" for name, seconds in 
+													sorted(self.startup_times.items(), key = lambda item: item[1], reverse = True)))
+	
 	@property
 	async def app_info(self):
 		if not hasattr(self, "_app_info"):
@@ -284,6 +427,8 @@ class Bot(commands.Bot):
 	
 	async def initialize_aiohttp_client_session(self):
 		self.aiohttp_session = aiohttp.ClientSession(loop = self.loop)
+		self.http_cache = HTTPResponseCache(self.aiohttp_session, path = self.data_path + "/http_cache.pickle")
+		await self.loop.run_in_executor(None, self.http_cache.load)
 	
 	async def connect_to_database(self):
 		if self.database_connection_pool:
@@ -498,7 +643,8 @@ class Bot(commands.Bot):
 		# TODO: https://botlist.space/
 		#       https://botsfordiscord.com/
 		#       https://discord.boats/
-		await self.update_all_listing_stats()
+		self.listing_stats_update_requested.set()
+		self.loop.create_task(self.update_listing_stats_when_requested(), name = "Update all bot listing stats")
 	
 	async def startup_tasks(self):
 		await self.wait_until_ready()
@@ -526,27 +672,13 @@ class Bot(commands.Bot):
 		# TODO: DM if left server
 		# TODO: Track guild names
 		# await voice.detectvoice()
-
+	
 	@staticmethod
 	async def get_command_prefix(bot, message):
 		if message.channel.type is discord.ChannelType.private:
-			prefixes = await bot.db.fetchval(
-				"""
-				SELECT prefixes
-				FROM direct_messages.prefixes
-				WHERE channel_id = $1
-				""", 
-				message.channel.id
-			)
+			prefixes = await bot.get_direct_message_prefixes(message.channel.id)
 		else:
-			prefixes = await bot.db.fetchval(
-				"""
-				SELECT prefixes
-				FROM guilds.prefixes
-				WHERE guild_id = $1
-				""", 
-				message.guild.id
-			)
+			prefixes = await bot.get_guild_prefixes(message.guild.id)
 		return prefixes if prefixes else '!'
 	
 	async def on_ready(self):
@@ -559,7 +691,7 @@ class Bot(commands.Bot):
 		self.print("disconnected")
 	
 	async def on_guild_join(self, guild):
-		self.loop.create_task(self.update_all_listing_stats(), name = "Update all bot listing stats")
+		self.listing_stats_update_requested.set()
 		me = discord.utils.get(self.get_all_members(), id = self.owner_id) or await self.fetch_user(self.owner_id)
 		guild_owner = guild.owner or await self.fetch_user(guild.owner_id)
 		await self.send_embed(me, title = "Joined Server", thumbnail_url = guild.icon_url, 
@@ -569,7 +701,10 @@ class Bot(commands.Bot):
 		# TODO: Track guild names
 	
 	async def on_guild_remove(self, guild):
-		self.loop.create_task(self.update_all_listing_stats(), name = "Update all bot listing stats")
+		self.guild_prefixes.pop(guild.id, None)
+		self.guild_settings.pop(guild.id, None)
+		self.permissions_cache.pop(guild.id, None)
+		self.listing_stats_update_requested.set()
 		me = discord.utils.get(self.get_all_members(), id = self.owner_id) or await self.fetch_user(self.owner_id)
 		guild_owner = guild.owner or await self.fetch_user(guild.owner_id)
 		await self.send_embed(me, title = "Left Server", thumbnail_url = guild.icon_url, 
@@ -577,36 +712,25 @@ class Bot(commands.Bot):
 											("Members", str(guild.member_count)), ("Server Region", str(guild.region))), 
 								timestamp = guild.created_at)
 	
+	async def on_member_remove(self, member):
+		self.permissions_cache.get(member.guild.id, {}).pop(member.id, None)
+	
+	async def on_member_update(self, before, after):
+		if before.roles != after.roles:
+			self.permissions_cache.get(after.guild.id, {}).pop(after.id, None)
+	
+	async def on_guild_role_update(self, before, after):
+		if before.position != after.position:
+			self.permissions_cache.pop(after.guild.id, None)
+	
+	async def on_guild_role_delete(self, role):
+		self.permissions_cache.pop(role.guild.id, None)
+	
 	# TODO: on_command_completion
 	async def on_command(self, ctx):
 		self.session_commands_invoked[ctx.command.name] = self.session_commands_invoked.get(ctx.command.name, 0) + 1
-		await self.db.execute(
-			"""
-			UPDATE meta.stats
-			SET commands_invoked = commands_invoked + 1
-			WHERE timestamp = $1
-			""", 
-			self.online_time
-		)
-		await self.db.execute(
-			"""
-			INSERT INTO meta.commands_invoked (command, invokes)
-			VALUES ($1, 1)
-			ON CONFLICT (command) DO
-			UPDATE SET invokes = commands_invoked.invokes + 1
-			""", 
-			ctx.command.name
-		)
 		# TODO: Handle subcommand names
-		await self.db.execute(
-			"""
-			INSERT INTO users.stats (user_id, commands_invoked)
-			VALUES ($1, 1)
-			ON CONFLICT (user_id) DO
-			UPDATE SET commands_invoked = stats.commands_invoked + 1
-			""", 
-			ctx.author.id
-		)
+		self.command_stats_writer.add(ctx.command.name, ctx.author.id)
 		# TODO: Track names
 	
 	async def on_command_error(self, ctx, error):
@@ -698,6 +822,8 @@ class Bot(commands.Bot):
 	
 	async def on_message_edit(self, before, after):
 		if after.edited_at != before.edited_at:
+			# Make sure the edited message has been logged
+			await self.message_log_writer.flush()
 			if before.content != after.content:
 				await self.db.execute(
 					"""
@@ -783,7 +909,7 @@ class Bot(commands.Bot):
 		if not done:
 			raise asyncio.TimeoutError
 		return done.pop().result()
-
+	
 	async def wait_for_yes_or_no(self, *, channel = None, message = None, user = None, timeout = None, 
 									accept_text = True, use_reactions = False, cleanup = True):
 		def message_check(message):
@@ -817,7 +943,7 @@ class Bot(commands.Bot):
 			await message.add_reaction('\N{HEAVY MULTIPLICATION X}')
 			to_wait_for.append(self.wait_for("raw_reaction_add", check = raw_reaction_check))
 			to_wait_for.append(self.wait_for("raw_reaction_remove", check = raw_reaction_check))
-
+		
 		done, pending = await asyncio.wait(to_wait_for, return_when = asyncio.FIRST_COMPLETED, timeout = timeout)
 		for task in pending:
 			task.cancel()
@@ -848,18 +974,79 @@ class Bot(commands.Bot):
 	
 	# TODO: Case-Insensitive subcommands (override Group)
 	
+	async def get_direct_message_prefixes(self, channel_id):
+		if channel_id in self.direct_message_prefixes:
+			self.prefix_cache_hits += 1
+		else:
+			self.prefix_cache_misses += 1
+			self.direct_message_prefixes[channel_id] = await self.db.fetchval(
+				"""
+				SELECT prefixes
+				FROM direct_messages.prefixes
+				WHERE channel_id = $1
+				""", 
+				channel_id
+			)
+		return self.direct_message_prefixes[channel_id]
+	
+	async def get_guild_prefixes(self, guild_id):
+		if guild_id in self.guild_prefixes:
+			self.prefix_cache_hits += 1
+		else:
+			self.prefix_cache_misses += 1
+			self.guild_prefixes[guild_id] = await self.db.fetchval(
+				"""
+				SELECT prefixes
+				FROM guilds.prefixes
+				WHERE guild_id = $1
+				""", 
+				guild_id
+			)
+		return self.guild_prefixes[guild_id]
+	
+	async def retrieve_all_prefixes(self):
+		for record in await self.db.fetch("SELECT * FROM direct_messages.prefixes"):
+			self.direct_message_prefixes[record["channel_id"]] = record["prefixes"]
+		for record in await self.db.fetch("SELECT * FROM guilds.prefixes"):
+			self.guild_prefixes[record["guild_id"]] = record["prefixes"]
+	
+	async def set_direct_message_prefixes(self, channel_id, prefixes):
+		await self.db.execute(
+			"""
+			INSERT INTO direct_messages.prefixes (channel_id, prefixes)
+			VALUES ($1, $2)
+			ON CONFLICT (channel_id) DO
+			UPDATE SET prefixes = $2
+			""", 
+			channel_id, prefixes
+		)
+		self.direct_message_prefixes[channel_id] = list(prefixes)
+	
+	async def set_guild_prefixes(self, guild_id, prefixes):
+		await self.db.execute(
+			"""
+			INSERT INTO guilds.prefixes (guild_id, prefixes)
+			VALUES ($1, $2)
+			ON CONFLICT (guild_id) DO
+			UPDATE SET prefixes = $2
+			""", 
+			guild_id, prefixes
+		)
+		self.guild_prefixes[guild_id] = list(prefixes)
+	
 	async def get_guild_setting(self, guild_id, name):
-		if guild_id not in self.guild_settings:
-			await self.retrieve_guild_settings(guild_id)
-		return self.guild_settings[guild_id].get(name)
+		guild_settings = await self.get_guild_settings(guild_id)
+		return guild_settings.get(name)
 	
 	async def get_guild_settings(self, guild_id):
-		if guild_id not in self.guild_settings:
-			await self.retrieve_guild_settings(guild_id)
-		return self.guild_settings[guild_id]
+		if (cached := self.guild_settings.get(guild_id)) and time.monotonic() - cached[0] < self.guild_settings_cache_ttl:
+			self.guild_settings_cache_hits += 1
+			self.guild_settings.move_to_end(guild_id)
+			return cached[1]
+		self.guild_settings_cache_misses += 1
+		return await self.retrieve_guild_settings(guild_id)
 	
 	async def retrieve_guild_settings(self, guild_id):
-		self.guild_settings[guild_id] = {}
 		records = await self.db.fetch(
 			"""
 			SELECT name, setting
@@ -868,23 +1055,83 @@ class Bot(commands.Bot):
 			""", 
 			guild_id
 		)
-		for record in records:
-			self.guild_settings[guild_id][record["name"]] = record["setting"]
+		guild_settings = {record["name"]: record["setting"] for record in records}
+		self.guild_settings[guild_id] = (time.monotonic(), guild_settings)
+		self.guild_settings.move_to_end(guild_id)
+		while len(self.guild_settings) > self.guild_settings_cache_size:
+			self.guild_settings.popitem(last = False)
+		return guild_settings
 	
 	async def set_guild_setting(self, guild_id, name, setting):
-		await self.db.execute(
-			"""
-			INSERT INTO guilds.settings (guild_id, name, setting)
-			VALUES ($1, $2, $3)
-			ON CONFLICT (guild_id, name) DO
-			UPDATE SET setting = $3
-			""", 
-			guild_id, name, setting
-		)
-		self.guild_settings.setdefault(guild_id, {})[name] = setting
+		async with self.db.acquire() as connection:
+			async with connection.transaction():
+				await connection.execute(
+					"""
+					INSERT INTO guilds.settings (guild_id, name, setting)
+					VALUES ($1, $2, $3)
+					ON CONFLICT (guild_id, name) DO
+					UPDATE SET setting = $3
+					""", 
+					guild_id, name, setting
+				)
+				# Notify other processes on commit
+				await connection.execute("SELECT pg_notify('guild_settings', $1)", str(guild_id))
+		self.invalidate_guild_settings(guild_id)
+	
+	def invalidate_guild_settings(self, guild_id):
+		self.guild_settings.pop(guild_id, None)
+	
+	async def listen_for_guild_settings_changes(self):
+		self.guild_settings_listener = await self.db.acquire()
+		self.guild_settings_listener.add_termination_listener(self.on_guild_settings_listener_termination)
+		await self.guild_settings_listener.add_listener("guild_settings", self.on_guild_settings_notification)
+	
+	def on_guild_settings_notification(self, connection, pid, channel, payload):
+		self.invalidate_guild_settings(int(payload))
+	
+	def on_guild_settings_listener_termination(self, connection):
+		self.guild_settings_listener_lost.set()
+	
+	async def maintain_guild_settings_listener(self):
+		'''
+		Reconnects the guild settings listener when its connection is lost or fails a health check
+		Notifications may have been missed while disconnected, so cached guild settings are cleared
+		'''
+		while True:
+			with contextlib.suppress(asyncio.TimeoutError):
+				await asyncio.wait_for(self.guild_settings_listener_lost.wait(), 
+										timeout = self.guild_settings_listener_check_interval)
+			if not self.guild_settings_listener_lost.is_set():
+				try:
+					await self.guild_settings_listener.execute("SELECT 1", timeout = 10)
+					continue
+				except (asyncio.TimeoutError, asyncpg.InterfaceError, asyncpg.PostgresError, OSError):
+					pass
+			self.guild_settings.clear()
+			await self.release_guild_settings_listener()
+			self.guild_settings_listener_lost.clear()
+			try:
+				await self.listen_for_guild_settings_changes()
+			except (asyncio.TimeoutError, asyncpg.InterfaceError, asyncpg.PostgresError, OSError) as e:
+				logging.getLogger("errors").error("Failed to reconnect guild settings listener\n", 
+													exc_info = (type(e), e, e.__traceback__))
+				await self.release_guild_settings_listener()
+				self.guild_settings_listener_lost.set()
+				await asyncio.sleep(self.guild_settings_listener_check_interval)
+				continue
+			# Changes made while disconnected weren't notified
+			self.guild_settings.clear()
+	
+	async def release_guild_settings_listener(self):
+		'''Closes and releases the guild settings listener connection, if any'''
+		if connection := self.guild_settings_listener:
+			self.guild_settings_listener = None
+			connection.remove_termination_listener(self.on_guild_settings_listener_termination)
+			connection.terminate()
+			await self.db.release(connection)
 	
 	# Update stats on sites listing Discord bots
-	async def update_listing_stats(self, site):
+	async def update_listing_stats(self, site, *, retries = 0):
 		site = self.listing_sites.get(site)
 		if not site:
 			# TODO: Print/log error
@@ -898,15 +1145,35 @@ class Bot(commands.Bot):
 		site["data"][site["guild_count_name"]] = len(self.guilds)
 		# TODO: Add users and voice_connections for discordbotlist.com
 		data = json.dumps(site["data"])
-		async with self.aiohttp_session.post(url, headers = headers, data = data) as resp:
-			if resp.status == 204:
-				return "204 No Content"
-			return await resp.text()
+		timeout = aiohttp.ClientTimeout(total = self.listing_stats_timeout)
+		for attempt in range(retries + 1):
+			if attempt:
+				# Exponential backoff
+				await asyncio.sleep(2 ** attempt)
+			try:
+				async with self.aiohttp_session.post(url, headers = headers, data = data, timeout = timeout) as resp:
+					if resp.status == 204:
+						return "204 No Content"
+					if (resp.status == 429 or resp.status >= 500) and attempt < retries:
+						continue
+					return await resp.text()
+			except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+				if attempt == retries:
+					return f"{type(e).__name__}: {e}"
 	
 	# Update stats on all sites listing Discord bots
-	async def update_all_listing_stats(self):
-		for site in self.listing_sites:
-			await self.update_listing_stats(site)
+	async def update_all_listing_stats(self, *, retries = 0):
+		responses = await asyncio.gather(*(self.update_listing_stats(site, retries = retries) 
+											for site in self.listing_sites))
+		return dict(zip(self.listing_sites, responses))
+	
+	async def update_listing_stats_when_requested(self):
+		# Coalesce requests so each site is posted to at most once per interval
+		while True:
+			await self.listing_stats_update_requested.wait()
+			self.listing_stats_update_requested.clear()
+			await self.update_all_listing_stats(retries = self.listing_stats_retries)
+			await asyncio.sleep(self.listing_stats_interval)
 	
 	async def restart_tasks(self, channel_id, message_id):
 		# Increment restarts counter
@@ -956,12 +1223,27 @@ class Bot(commands.Bot):
 		sentry_transport = self.sentry_client.remote.get_transport()
 		if sentry_transport:
 			await sentry_transport.close()
-		# Close aiohttp session
+		# Save HTTP response cache and close aiohttp session
+		await self.http_cache.close()
 		await self.aiohttp_session.close()
-		# Close database connection
-		await self.database_connection_pool.close()
 		# Stop web server
 		await self.aiohttp_app_runner.cleanup()
+		# Write buffered logs
+		await self.access_log_writer.close()
+		await self.message_log_writer.close()
+		await self.command_stats_writer.close()
+		# Close database connection
+		self.guild_settings_listener_task.cancel()
+		await asyncio.wait((self.guild_settings_listener_task,))
+		if self.guild_settings_listener:
+			self.guild_settings_listener.remove_termination_listener(self.on_guild_settings_listener_termination)
+			await self.guild_settings_listener.remove_listener("guild_settings", self.on_guild_settings_notification)
+			await self.database_connection_pool.release(self.guild_settings_listener)
+		await self.database_connection_pool.close()
+		# Stop evaluation worker processes
+		self.evaluation_worker_pool.close()
+		# Stop youtube-dl extraction threads
+		self.ytdl_info_cache.close()
 	
 	@commands.group(invoke_without_command = True, case_insensitive = True)
 	@commands.is_owner()
@@ -990,11 +1272,7 @@ class Bot(commands.Bot):
 		'''Load AIML'''
 		for predicate, value in ctx.bot.aiml_predicates.items():
 			ctx.bot.aiml_kernel.setBotPredicate(predicate, value)
-		if os.path.isfile(self.data_path + "/aiml/aiml_brain.brn"):
-			ctx.bot.aiml_kernel.bootstrap(brainFile = self.data_path + "/aiml/aiml_brain.brn")
-		elif os.path.isfile(self.data_path + "/aiml/std-startup.xml"):
-			ctx.bot.aiml_kernel.bootstrap(learnFiles = self.data_path + "/aiml/std-startup.xml", commands = "load aiml b")
-			ctx.bot.aiml_kernel.saveBrain(self.data_path + "/aiml/aiml_brain.brn")
+		await ctx.bot.load_aiml_brain()
 		await ctx.embed_reply(f"\N{OK HAND SIGN}{ctx.bot.emoji_skin_tone} Loaded AIML")
 	
 	@commands.group(invoke_without_command = True, case_insensitive = True)
@@ -1016,6 +1294,7 @@ class Bot(commands.Bot):
 	@commands.is_owner()
 	async def unload_aiml(ctx):
 		'''Unload AIML'''
+		ctx.bot.aiml_brain_loaded.clear()
 		ctx.bot.aiml_kernel.resetBrain()
 		await ctx.embed_reply(f"\N{OK HAND SIGN}{ctx.bot.emoji_skin_tone} Unloaded AIML")
 	
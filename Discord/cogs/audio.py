@@ -1,12 +1,14 @@
 
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 
 import base64
 import concurrent.futures
 import inspect
+import logging
 import random
 import sys
+import traceback
 from typing import Optional
 import urllib
 
@@ -20,6 +22,8 @@ sys.path.insert(0, "..")
 from units.files import create_folder
 sys.path.pop(0)
 
+errors_logger = logging.getLogger("errors")
+
 def setup(bot):
 	bot.add_cog(Audio(bot))
 
@@ -34,8 +38,10 @@ class Audio(commands.Cog):
 				self.audio.add_command(command)
 		create_folder(self.bot.data_path + "/audio_cache")
 		create_folder(self.bot.data_path + "/audio_files")
+		self.refresh_libraries.start().set_name("Refresh audio libraries")
 	
 	def cog_unload(self):
+		self.refresh_libraries.cancel()
 		# TODO: Leave voice channels?
 		for player in self.players.values():
 			player.player.cancel()
@@ -43,6 +49,19 @@ class Audio(commands.Cog):
 	async def cog_check(self, ctx):
 		return await commands.guild_only().predicate(ctx)
 	
+	@tasks.loop(seconds = 60)
+	async def refresh_libraries(self):
+		# Only rereads files that have changed
+		for library in (self.bot.audio_file_library, self.bot.music_library):
+			try:
+				await library.refresh()
+			except Exception as e:
+				# Keep refreshing, rather than stopping the loop
+				print(f"Exception refreshing audio library: {library.directory}", file = sys.stderr)
+				traceback.print_exception(type(e), e, e.__traceback__, file = sys.stderr)
+				errors_logger.error("Uncaught audio library refresh exception\n", 
+									exc_info = (type(e), e, e.__traceback__))
+	
 	@commands.group(aliases = ["yt", "youtube", "soundcloud", "voice", "stream", "play", 
 								"playlist", "spotify", "budio", "music", "download"], 
 					description = "Supports [these sites](https://rg3.github.io/youtube-dl/supportedsites.html) and Spotify", 
@@ -264,6 +283,15 @@ class Audio(commands.Cog):
 		await self.players[ctx.guild.id].empty_queue()
 		await ctx.embed_reply(":wastebasket: Emptied queue")
 	
+	@commands.command(aliases = ["cancelplaylist", "cancel_playlist", "cancelplaylists"])
+	@checks.is_voice_connected()
+	@commands.check_any(checks.is_permitted(), checks.is_guild_owner())
+	async def cancel_playlists(self, ctx):
+		'''Stop loading playlists into the queue'''
+		if not self.players[ctx.guild.id].cancel_playlist_loading():
+			return await ctx.embed_reply(":no_entry: There aren't any playlists loading")
+		await ctx.embed_reply(":stop_button: Stopped loading playlists")
+	
 	@commands.command()
 	@checks.is_voice_connected()
 	@commands.check_any(checks.is_permitted(), checks.is_guild_owner())
@@ -348,8 +376,11 @@ class Audio(commands.Cog):
 	@commands.check_any(checks.is_permitted(), checks.is_guild_owner())
 	async def tts(self, ctx, *, message : str):
 		'''Text to speech'''
-		if not (await self.players[ctx.guild.id].play_tts(ctx, message)):
-			await ctx.embed_reply(":warning: Something else is already playing\nPlease stop it first")
+		try:
+			if not (await self.players[ctx.guild.id].play_tts(ctx, message)):
+				await ctx.embed_reply(":warning: Something else is already playing\nPlease stop it first")
+		except errors.AudioError as e:
+			await ctx.embed_reply(":no_entry: {}".format(e))
 	
 	@tts.command(name = "options")
 	@checks.not_forbidden()
@@ -374,8 +405,11 @@ class Audio(commands.Cog):
 		if amplitude > 1000: amplitude = 1000
 		if speed > 9000: speed = 9000
 		if word_gap > 1000: word_gap = 1000
-		if not (await self.players[ctx.guild.id].play_tts(ctx, message, amplitude = amplitude, pitch = pitch, speed = speed, word_gap = word_gap, voice = voice)):
-			await ctx.embed_reply(":warning: Something else is already playing\nPlease stop it first")
+		try:
+			if not (await self.players[ctx.guild.id].play_tts(ctx, message, amplitude = amplitude, pitch = pitch, speed = speed, word_gap = word_gap, voice = voice)):
+				await ctx.embed_reply(":warning: Something else is already playing\nPlease stop it first")
+		except errors.AudioError as e:
+			await ctx.embed_reply(":no_entry: {}".format(e))
 	
 	@commands.command()
 	@checks.is_voice_connected()
@@ -441,7 +475,7 @@ class Audio(commands.Cog):
 		if ctx.channel.type is not discord.ChannelType.private:
 			await ctx.embed_reply("Check your DMs")
 		output = "```"
-		for filename in self.players[ctx.guild.id].library_files:
+		for filename in ctx.bot.music_library.filenames:
 			if len(output) + len(filename) > 1997:  # 2000 - 3
 				await ctx.whisper(output[:-2] + "```")
 				output = "```" + filename + ", "
@@ -453,7 +487,7 @@ class Audio(commands.Cog):
 	@checks.is_voice_connected()
 	async def library_search(self, ctx, *, search : str):
 		'''Search songs in the library'''
-		results = [filename for filename in self.players[ctx.guild.id].library_files if search.lower() in filename.lower()]
+		results = ctx.bot.music_library.search(search)
 		if not results:
 			await ctx.embed_reply(":no_entry: No songs matching that search found")
 			return
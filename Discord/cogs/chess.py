@@ -3,10 +3,13 @@ import discord
 from discord.ext import commands
 
 import asyncio
+import collections
+import contextlib
 import datetime
 import io
 import random
 import subprocess
+import time
 from typing import Union
 
 import chess
@@ -43,12 +46,15 @@ except:
 STOCKFISH_EXECUTABLE += ".exe"
 
 def setup(bot):
-	bot.add_cog(ChessCog())
+	bot.add_cog(ChessCog(bot))
 
 class ChessCog(commands.Cog, name = "Chess"):
 	
-	def __init__(self):
+	def __init__(self, bot):
+		self.bot = bot
 		self.matches = []
+		self.engine_pool = ChessEnginePool()
+		self.board_renderer = ChessBoardRenderer(bot)
 	
 	async def cog_check(self, ctx):
 		return await checks.not_forbidden().predicate(ctx)
@@ -57,6 +63,7 @@ class ChessCog(commands.Cog, name = "Chess"):
 		# TODO: Persistence - store running chess matches and add way to continue previous ones
 		for match in self.matches:
 			match.task.cancel()
+		asyncio.create_task(self.engine_pool.close(), name = "Close chess engines")
 	
 	@commands.group(name = "chess", invoke_without_command = True, case_insensitive = True)
 	async def chess_command(self, ctx):
@@ -132,7 +139,7 @@ class ChessCog(commands.Cog, name = "Chess"):
 				return await ctx.send(f"{ctx.author.mention}: {opponent} has declined your challenge")
 			if message.content.lower() in ("no", 'n'):
 				return await ctx.send(f"{ctx.author.mention}: {opponent} has declined your challenge")
-		match = await ChessMatch.start(ctx, white_player, black_player)
+		match = await ChessMatch.start(ctx, white_player, black_player, self.engine_pool, self.board_renderer)
 		self.matches.append(match)
 		await match.ended.wait()
 		self.matches.remove(match)
@@ -164,6 +171,26 @@ class ChessCog(commands.Cog, name = "Chess"):
 			return await ctx.embed_reply(":no_entry: Chess match not found")
 		await ctx.reply(ctx.bot.CODE_BLOCK.format(match))
 	
+	@chess_command.command(aliases = ["think"])
+	async def engine(self, ctx, limit: str, value: float):
+		'''
+		Set how long I think for in the current match
+		Limits: time (seconds), depth (plies), nodes
+		'''
+		match = self.get_match(ctx.channel, ctx.author)
+		if not match:
+			return await ctx.embed_reply(":no_entry: Chess match not found")
+		limit = limit.lower()
+		if limit not in self.engine_pool.maximum_limits:
+			return await ctx.embed_reply(":no_entry: Limit must be time, depth, or nodes")
+		if not 0 < value <= self.engine_pool.maximum_limits[limit]:
+			return await ctx.embed_reply(f":no_entry: {limit.capitalize()} must be greater than 0 "
+											f"and at most {self.engine_pool.maximum_limits[limit]}")
+		if limit != "time":
+			value = int(value)
+		match.engine_limit = chess.engine.Limit(**{limit: value})
+		await ctx.embed_reply(f"I'll now think with a {limit} limit of {value}")
+	
 	@chess_command.command()
 	async def fen(self, ctx):
 		'''FEN of the current board'''
@@ -207,6 +234,17 @@ class ChessCog(commands.Cog, name = "Chess"):
 		await ctx.embed_reply("The board has been reset")
 	"""
 	
+	@chess_command.command(hidden = True)
+	@commands.is_owner()
+	async def renders(self, ctx):
+		'''Board rendering stats'''
+		renderer = self.board_renderer
+		average_render_time = renderer.render_time / renderer.renders if renderer.renders else 0
+		await ctx.embed_reply(fields = (("Renders", f"{renderer.renders:,}"), 
+										("Average Render Time", f"{average_render_time * 1000:.2f} ms"), 
+										("Cache", f"{renderer.cache_hits:,} hits\n"
+													f"{len(renderer.image_urls):,}/{renderer.cache_size:,} entries")))
+	
 	@chess_command.command(hidden = True)
 	async def turn(self, ctx):
 		'''Who's turn it is to move'''
@@ -229,18 +267,116 @@ class ChessCog(commands.Cog, name = "Chess"):
 			await ctx.embed_reply(":no_entry: There are no more moves to undo")
 	"""
 
+class ChessEnginePool:
+	
+	'''
+	Bounded pool of chess engine processes shared across matches
+	Requests wait for an engine when all of them are busy
+	'''
+	
+	def __init__(self, size = 2):
+		self.size = size
+		self.maximum_limits = {"time": 10, "depth": 30, "nodes": 10_000_000}
+		self.idle_engines = asyncio.Queue()
+		self.engines = []
+		self.engines_starting = 0
+	
+	async def acquire(self):
+		if self.idle_engines.empty() and len(self.engines) + self.engines_starting < self.size:
+			self.engines_starting += 1
+			try:
+				transport, engine = await chess.engine.popen_uci(f"bin/{STOCKFISH_EXECUTABLE}", 
+																	creationflags = subprocess.CREATE_NO_WINDOW)
+			finally:
+				self.engines_starting -= 1
+			self.engines.append(engine)
+			return engine
+		return await self.idle_engines.get()
+	
+	def release(self, engine):
+		self.idle_engines.put_nowait(engine)
+	
+	async def play(self, board, limit, *, game = None, options = {}):
+		'''
+		Play a move in board's position with the next available engine
+		The engine starts a new game (ucinewgame) whenever game changes
+		and options are reset to their previous values afterwards
+		'''
+		engine = await self.acquire()
+		try:
+			return await engine.play(board, limit, game = game, options = options)
+		except chess.engine.EngineTerminatedError:
+			self.engines.remove(engine)
+			engine = None
+			raise
+		finally:
+			if engine:
+				self.release(engine)
+	
+	async def close(self):
+		for engine in self.engines:
+			with contextlib.suppress(chess.engine.EngineError, asyncio.TimeoutError):
+				await asyncio.wait_for(engine.quit(), timeout = 5)
+		self.engines.clear()
+
+class ChessBoardRenderer:
+	
+	'''
+	Renders boards as PNG images in an executor
+	Caches the URLs of uploaded images by position, orientation, last move, and check square
+	'''
+	
+	def __init__(self, bot, cache_size = 1000):
+		self.bot = bot
+		self.cache_size = cache_size
+		self.image_urls = collections.OrderedDict()
+		self.cache_hits = 0
+		self.renders = 0
+		self.render_time = 0  # seconds
+	
+	async def get_image_url(self, board, *, orientation, lastmove, check):
+		key = (board.board_fen(), orientation, lastmove, check)
+		if url := self.image_urls.get(key):
+			self.image_urls.move_to_end(key)
+			self.cache_hits += 1
+			return url
+		svg = chess.svg.board(board, lastmove = lastmove, check = check, orientation = orientation)
+		start_time = time.perf_counter()
+		png = await self.bot.loop.run_in_executor(None, svg_to_png, svg)
+		self.render_time += time.perf_counter() - start_time
+		self.renders += 1
+		# TODO: Upload into embed + delete and re-send to update?
+		## embed.set_image(url = self.bot.imgur_client.upload_from_path(self.bot.data_path + "/temp/chess_board.png")["link"])
+		## embed.set_image(url = data["data"]["img_url"])
+		image_message = await self.bot.cache_channel.send(file = discord.File(io.BytesIO(png), filename = "chess_board.png"))
+		url = self.image_urls[key] = image_message.attachments[0].url
+		if len(self.image_urls) > self.cache_size:
+			self.image_urls.popitem(last = False)
+		return url
+
+def svg_to_png(svg):
+	buffer = io.BytesIO()
+	with Image(blob = svg.encode()) as image:
+		image.format = "PNG"
+		## image.save(filename = self.bot.data_path + "/temp/chess_board.png")
+		image.save(file = buffer)
+	return buffer.getvalue()
+
 class ChessMatch(chess.Board):
 	
 	@classmethod
-	async def start(cls, ctx, white_player, black_player):
+	async def start(cls, ctx, white_player, black_player, engine_pool, board_renderer, 
+					engine_limit = chess.engine.Limit(time = 2)):
 		self = cls()
 		self.ctx = ctx
 		self.white_player = white_player
 		self.black_player = black_player
 		self.bot = ctx.bot
 		self.ended = asyncio.Event()
-		self.engine_transport, self.chess_engine = await chess.engine.popen_uci(f"bin/{STOCKFISH_EXECUTABLE}", 
-																				creationflags = subprocess.CREATE_NO_WINDOW)
+		self.engine_pool = engine_pool
+		self.board_renderer = board_renderer
+		self.engine_limit = engine_limit
+		self.engine_game = object()  # Identifies this match to engines
 		self.match_message = None
 		self.task = ctx.bot.loop.create_task(self.match_task(), name = "Chess Match")
 		return self
@@ -273,7 +409,7 @@ class ChessMatch(chess.Board):
 			embed = self.match_message.embeds[0]
 			if player == self.bot.user:
 				await self.match_message.edit(embed = embed.set_footer(text = "I'm thinking.."))
-				result = await self.chess_engine.play(self, chess.engine.Limit(time = 2))
+				result = await self.engine_pool.play(self, self.engine_limit, game = self.engine_game)
 				self.push(result.move)
 				await self.update_match_embed(footer_text = f"I moved {result.move}")
 			else:
@@ -313,18 +449,8 @@ class ChessMatch(chess.Board):
 		chess_pgn.headers["Black"] = self.black_player.mention
 		embed.description = str(chess_pgn)
 		## svg = self._repr_svg_()
-		svg = chess.svg.board(self, lastmove = lastmove, check = check, orientation = orientation)
-		buffer = io.BytesIO()
-		with Image(blob = svg.encode()) as image:
-			image.format = "PNG"
-			## image.save(filename = self.bot.data_path + "/temp/chess_board.png")
-			image.save(file = buffer)
-		buffer.seek(0)
-		# TODO: Upload into embed + delete and re-send to update?
-		## embed.set_image(url = self.bot.imgur_client.upload_from_path(self.bot.data_path + "/temp/chess_board.png")["link"])
-		## embed.set_image(url = data["data"]["img_url"])
-		image_message = await self.bot.cache_channel.send(file = discord.File(buffer, filename = "chess_board.png"))
-		embed.set_image(url = image_message.attachments[0].url)
+		embed.set_image(url = await self.board_renderer.get_image_url(self, orientation = orientation, 
+																		lastmove = lastmove, check = check))
 		embed.set_footer(text = footer_text)
 		if self.match_message:
 			await self.match_message.edit(embed = embed)
@@ -10,6 +10,8 @@ from wordcloud import WordCloud
 from utilities import checks
 from utilities.converters import SteamID32
 
+DEFERRABLE = True
+
 def setup(bot):
 	bot.add_cog(DotA())
 
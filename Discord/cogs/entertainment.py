@@ -80,7 +80,7 @@ class Entertainment(commands.Cog):
 		# trending
 		# trends
 		data = {"query": query, "variables": {"search": search}}
-		async with ctx.bot.aiohttp_session.post(url, json = data) as resp:
+		async with ctx.bot.http_cache.post(url, json = data, ttl = 3600) as resp:
 			data = await resp.json()
 		if not (media := data["data"]["Media"]) and "errors" in data:
 			return await ctx.embed_reply(f":no_entry: Error: {data['errors'][0]['message']}")
@@ -186,7 +186,7 @@ class Entertainment(commands.Cog):
 		}
 		"""
 		data = {"query": query, "variables": {"search": search}}
-		async with ctx.bot.aiohttp_session.post(url, json = data) as resp:
+		async with ctx.bot.http_cache.post(url, json = data, ttl = 3600) as resp:
 			data = await resp.json()
 		if not (media := data["data"]["Media"]) and "errors" in data:
 			return await ctx.embed_reply(f":no_entry: Error: {data['errors'][0]['message']}")
@@ -235,18 +235,18 @@ class Entertainment(commands.Cog):
 			url = "https://www.explainxkcd.com/wiki/api.php"
 			params = {"action": "query", "list": "search", "format": "json", 
 						"srsearch": query, "srwhat": "title", "srlimit": "max"}
-			async with ctx.bot.aiohttp_session.get(url, params = params) as resp:
+			async with ctx.bot.http_cache.get(url, params = params, ttl = 3600) as resp:
 				if results := (await resp.json())["query"]["search"]:
 					number = results[0]['title'].split(':')[0]
 					url = f"http://xkcd.com/{number}/info.0.json"
 					return await self.process_xkcd(ctx, url)
 			# Query by text
 			params["srwhat"] = "text"
-			async with ctx.bot.aiohttp_session.get(url, params = params) as resp:
+			async with ctx.bot.http_cache.get(url, params = params, ttl = 3600) as resp:
 				results = (await resp.json())["query"]["search"]
 			# Query by exact text in quotation marks
 			params["srsearch"] = f'"{query}"'
-			async with ctx.bot.aiohttp_session.get(url, params = params) as resp:
+			async with ctx.bot.http_cache.get(url, params = params, ttl = 3600) as resp:
 				exact_results = (await resp.json())["query"]["search"]
 			# Look for query in target sections
 			sections = {}
@@ -258,7 +258,7 @@ class Entertainment(commands.Cog):
 					if (page_id := result["pageid"]) not in sections:
 						params = {"action": "parse", "pageid": page_id, 
 									"prop": "sections", "format": "json"}
-						async with ctx.bot.aiohttp_session.get(url, params = params) as resp:
+						async with ctx.bot.http_cache.get(url, params = params, ttl = 3600) as resp:
 							sections[page_id] = (await resp.json())["parse"]["sections"]
 					# Find target section
 					section = discord.utils.find(
@@ -270,7 +270,7 @@ class Entertainment(commands.Cog):
 						# Parse section text
 						params = {"action": "parse", "pageid": page_id, "format": "json", 
 									"prop": "parsetree", "section": section["index"]}
-						async with ctx.bot.aiohttp_session.get(url, params = params) as resp:
+						async with ctx.bot.http_cache.get(url, params = params, ttl = 3600) as resp:
 							section_text = (await resp.json())["parse"]["parsetree"]['*'].lower()
 						# Check for query in section text
 						if query in section_text or all(word in section_text for word in words):
@@ -293,7 +293,7 @@ class Entertainment(commands.Cog):
 		self.menus.remove(menu)
 	
 	async def process_xkcd(self, ctx, url):
-		async with ctx.bot.aiohttp_session.get(url) as resp:
+		async with ctx.bot.http_cache.get(url, ttl = xkcd_ttl(url)) as resp:
 			if resp.status == 404:
 				return await ctx.embed_reply(":no_entry: Error: Not found")
 			data = await resp.json()
@@ -301,12 +301,16 @@ class Entertainment(commands.Cog):
 								image_url = data["img"], footer_text = data["alt"], 
 								timestamp = datetime.datetime(int(data["year"]), int(data["month"]), int(data["day"])))
 
+def xkcd_ttl(url):
+	# Comics don't change, but the latest comic does
+	return 600 if url == "http://xkcd.com/info.0.json" else 604800
+
 class XKCDSource(menus.PageSource):
 	
 	async def prepare(self, ctx):
 		self.bot = ctx.bot
 		url = "http://xkcd.com/info.0.json"
-		async with ctx.bot.aiohttp_session.get(url) as resp:
+		async with ctx.bot.http_cache.get(url, ttl = xkcd_ttl(url)) as resp:
 			data = await resp.json()
 		self.max_pages = data["num"]
 	
@@ -318,7 +322,7 @@ class XKCDSource(menus.PageSource):
 	
 	async def get_page(self, page_number):
 		url = f"http://xkcd.com/{page_number + 1}/info.0.json"
-		async with self.bot.aiohttp_session.get(url) as resp:
+		async with self.bot.http_cache.get(url, ttl = xkcd_ttl(url)) as resp:
 			return await resp.json()
 	
 	async def format_page(self, menu, page):
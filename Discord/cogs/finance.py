@@ -34,7 +34,7 @@ class Finance(commands.Cog):
 		'''
 		if currency:
 			url = "https://api.coindesk.com/v1/bpi/currentprice/" + currency
-			async with ctx.bot.aiohttp_session.get(url) as resp:
+			async with ctx.bot.http_cache.get(url, ttl = 60) as resp:
 				if resp.status == 404:
 					error = await resp.text()
 					return await ctx.embed_reply(":no_entry: Error: " + error)
@@ -45,7 +45,7 @@ class Finance(commands.Cog):
 			fields = ()
 		else:
 			url = "https://api.coindesk.com/v1/bpi/currentprice.json"
-			async with ctx.bot.aiohttp_session.get(url) as resp:
+			async with ctx.bot.http_cache.get(url, ttl = 60) as resp:
 				data = await resp.json(content_type = "application/javascript")
 			title = data["chartName"]
 			description = ""
@@ -62,7 +62,7 @@ class Finance(commands.Cog):
 	@bitcoin.command(name = "currencies")
 	async def bitcoin_currencies(self, ctx):
 		'''Supported currencies for BPI conversion'''
-		async with ctx.bot.aiohttp_session.get("https://api.coindesk.com/v1/bpi/supported-currencies.json") as resp:
+		async with ctx.bot.http_cache.get("https://api.coindesk.com/v1/bpi/supported-currencies.json", ttl = 86400) as resp:
 			data = await resp.json(content_type = "text/html")
 		await ctx.embed_reply(", ".join("{0[currency]} ({0[country]})".format(c) for c in data[:int(len(data) / 2)]))
 		await ctx.embed_reply(", ".join("{0[currency]} ({0[country]})".format(c) for c in data[int(len(data) / 2):]))
@@ -84,7 +84,7 @@ class Finance(commands.Cog):
 		else:
 			params = {"for": "yesterday"}
 		url = "https://api.coindesk.com/v1/bpi/historical/close.json"
-		async with ctx.bot.aiohttp_session.get(url, params = params) as resp:
+		async with ctx.bot.http_cache.get(url, params = params, ttl = 3600) as resp:
 			if resp.status == 404:
 				error = await resp.text()
 				await ctx.embed_reply(":no_entry: Error: " + error)
@@ -135,7 +135,7 @@ class Finance(commands.Cog):
 		'''Currency symbols'''
 		url = "http://data.fixer.io/api/symbols"
 		params = {"access_key": ctx.bot.FIXER_API_KEY}
-		async with ctx.bot.aiohttp_session.get(url, params = params) as resp:
+		async with ctx.bot.http_cache.get(url, params = params, ttl = 86400) as resp:
 			# TODO: handle errors
 			data = await resp.json()
 		if not data.get("success"):
@@ -177,8 +177,8 @@ class Finance(commands.Cog):
 			params["symbols"] = request.upper()
 		url = "http://data.fixer.io/api/"
 		url += str(date) if date else "latest"
-		async with ctx.bot.aiohttp_session.get(url, params = params) as resp:
-			# TODO: use ETags
+		# Rates are updated hourly
+		async with ctx.bot.http_cache.get(url, params = params, ttl = 86400 if date else 3600) as resp:
 			if resp.status in (404, 422):
 				# TODO: handle other errors
 				data = await resp.json(content_type = "text/html")
@@ -216,7 +216,7 @@ class Finance(commands.Cog):
 		'''
 		# TODO: Add https://iextrading.com/api-exhibit-a to TOS
 		url = f"https://api.iextrading.com/1.0/stock/{symbol}/price"
-		async with ctx.bot.aiohttp_session.get(url) as resp:
+		async with ctx.bot.http_cache.get(url, ttl = 60) as resp:
 			data = await resp.text()
 		attribution = "\nData provided for free by [IEX](https://iextrading.com/developer)."
 		await ctx.embed_reply(data + attribution)
@@ -225,10 +225,10 @@ class Finance(commands.Cog):
 	async def stock_company(self, ctx, symbol: str):
 		'''Company Information'''
 		url = f"https://api.iextrading.com/1.0/stock/{symbol}/company"
-		async with ctx.bot.aiohttp_session.get(url) as resp:
+		async with ctx.bot.http_cache.get(url, ttl = 86400) as resp:
 			data = await resp.json()
 		url = f"https://api.iextrading.com/1.0/stock/{symbol}/logo"
-		async with ctx.bot.aiohttp_session.get(url) as resp:
+		async with ctx.bot.http_cache.get(url, ttl = 86400) as resp:
 			logo_data = await resp.json()
 		description = f"{data['description']}\nWebsite: {data['website']}"
 		attribution = "\nData provided for free by [IEX](https://iextrading.com/developer)."
@@ -242,7 +242,7 @@ class Finance(commands.Cog):
 	async def stock_earnings(self, ctx, symbol: str):
 		'''Earnings data from the most recent reported quarter'''
 		url = f"https://api.iextrading.com/1.0/stock/{symbol}/earnings"
-		async with ctx.bot.aiohttp_session.get(url) as resp:
+		async with ctx.bot.http_cache.get(url, ttl = 3600) as resp:
 			data = await resp.json()
 		report = data["earnings"][0]
 		# TODO: paginate other reports
@@ -261,7 +261,7 @@ class Finance(commands.Cog):
 	async def stock_financials(self, ctx, symbol: str):
 		'''Income statement, balance sheet, and cash flow data from the most recent reported quarter'''
 		url = f"https://api.iextrading.com/1.0/stock/{symbol}/financials"
-		async with ctx.bot.aiohttp_session.get(url) as resp:
+		async with ctx.bot.http_cache.get(url, ttl = 3600) as resp:
 			data = await resp.json()
 		report = data["financials"][0]
 		# TODO: paginate other reports
@@ -284,7 +284,7 @@ class Finance(commands.Cog):
 	async def stock_quote(self, ctx, symbol: str):
 		'''WIP'''
 		url = f"https://api.iextrading.com/1.0/stock/{symbol}/quote"
-		async with ctx.bot.aiohttp_session.get(url) as resp:
+		async with ctx.bot.http_cache.get(url, ttl = 60) as resp:
 			data = await resp.json()
 		description = data["companyName"] + "\nData provided for free by [IEX](https://iextrading.com/developer)."
 		fields = []
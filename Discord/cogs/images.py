@@ -1,12 +1,15 @@
 
 from discord.ext import commands
 
+import collections
+import functools
+import hashlib
 import inspect
 import re
-from typing import Optional
 
 from clarifai_grpc.grpc.api import service_pb2, resources_pb2
-from clarifai_grpc.grpc.api.status import status_code_pb2
+from clarifai_grpc.grpc.api.status import status_code_pb2, status_pb2
+import grpc
 import imgurpython
 
 from utilities import checks
@@ -14,6 +17,7 @@ from utilities import checks
 CLARIFAI_COLOR_MODEL_ID = "eeed0b6733a644cea07cf4c60f87ebb7"
 CLARIFAI_GENERAL_MODEL_ID = "aaa03c23b3724a16a56b629203edc62c"
 CLARIFAI_NSFW_MODEL_ID = "e9576d86d2004ed1a38ba0cf39ecb4b1"
+CLARIFAI_MAX_INPUTS = 128  # per PostModelOutputs request
 
 def setup(bot):
 	bot.add_cog(Images(bot))
@@ -26,6 +30,9 @@ class Images(commands.Cog):
 	
 	def __init__(self, bot):
 		self.bot = bot
+		self.clarifai_timeout = 30  # seconds
+		self.clarifai_cache_size = 1000
+		self.clarifai_outputs = collections.OrderedDict()
 		# Add commands as image subcommands
 		for name, command in inspect.getmembers(self):
 			if isinstance(command, commands.Command) and command.parent is None and name != "image":
@@ -49,6 +56,45 @@ class Images(commands.Cog):
 	async def cog_check(self, ctx):
 		return await checks.not_forbidden().predicate(ctx)
 	
+	async def get_clarifai_outputs(self, model_id, image_urls):
+		'''
+		Get Clarifai model outputs for images
+		Uncached images are batched into PostModelOutputs requests of at most 128 images
+		Returns (image URL, output) pairs in the same order as image_urls
+		'''
+		keys = {url: (model_id, hashlib.sha256(url.encode()).hexdigest()) for url in image_urls}
+		outputs = {}
+		for url, key in keys.items():
+			if key in self.clarifai_outputs:
+				self.clarifai_outputs.move_to_end(key)
+				outputs[url] = self.clarifai_outputs[key]
+		uncached_urls = [url for url in keys if url not in outputs]
+		for index in range(0, len(uncached_urls), CLARIFAI_MAX_INPUTS):
+			batch_urls = uncached_urls[index:index + CLARIFAI_MAX_INPUTS]
+			request = service_pb2.PostModelOutputsRequest(
+				model_id = model_id, 
+				inputs = [resources_pb2.Input(data = resources_pb2.Data(image = resources_pb2.Image(url = url)))
+							for url in batch_urls]
+			)
+			try:
+				response = await self.bot.loop.run_in_executor(
+					None, functools.partial(self.bot.clarifai_stub.PostModelOutputs, request, 
+											metadata = (("authorization", f"Key {self.bot.CLARIFAI_API_KEY}"),), 
+											timeout = self.clarifai_timeout)
+				)
+			except grpc.RpcError as e:
+				status = status_pb2.Status(code = status_code_pb2.FAILURE, description = e.details())
+				response = service_pb2.MultiOutputResponse(status = status)
+			# Outputs are in the same order as inputs
+			response_outputs = list(response.outputs) or [resources_pb2.Output(status = response.status)] * len(batch_urls)
+			for url, output in zip(batch_urls, response_outputs):
+				outputs[url] = output
+				if output.status.code == status_code_pb2.SUCCESS:
+					self.clarifai_outputs[keys[url]] = output
+					if len(self.clarifai_outputs) > self.clarifai_cache_size:
+						self.clarifai_outputs.popitem(last = False)
+		return [(url, outputs[url]) for url in image_urls]
+	
 	@commands.group(aliases = ["images", "photo", "photos"], invoke_without_command = True, case_insensitive = True)
 	async def image(self, ctx, *, query):
 		'''Images/Photos'''
@@ -67,28 +113,23 @@ class Images(commands.Cog):
 								image_url = photo["urls"]["full"])
 	
 	@image.command(name = "color", aliases = ["colour"])
-	async def image_color(self, ctx, image_url: Optional[str]):
+	async def image_color(self, ctx, *image_urls: str):
 		'''
 		Image color density values
 		and the closest W3C color name for each identified color
+		Multiple images can be input at once
 		'''
-		if not image_url:
-			if not ctx.message.attachments:
-				return await ctx.embed_reply(f"{ctx.bot.error_emoji} Please input an image and/or url")
-			image_url = ctx.message.attachments[0].url
-		response = ctx.bot.clarifai_stub.PostModelOutputs(
-			service_pb2.PostModelOutputsRequest(
-				model_id = CLARIFAI_COLOR_MODEL_ID, 
-				inputs = [resources_pb2.Input(data=resources_pb2.Data(image=resources_pb2.Image(url = image_url)))]
-			), metadata = (("authorization", f"Key {ctx.bot.CLARIFAI_API_KEY}"),)
-		)
-		if response.status.code != status_code_pb2.SUCCESS:
-			return await ctx.embed_reply(f"{ctx.bot.error_emoji} Error: {response.outputs[0].status.description}")
-		fields = [(color.raw_hex.upper(), f"{color.value * 100:.2f}%\n"
-											f"{re.sub(r'(?!^)(?=[A-Z])', ' ', color.w3c.name)}\n"
-											f"({color.w3c.hex.upper()})")
-					for color in sorted(response.outputs[0].data.colors, key = lambda c: c.value, reverse = True)]
-		await ctx.embed_reply(title = "Color Density", fields = fields, thumbnail_url = image_url)
+		if not (image_urls := image_urls or [attachment.url for attachment in ctx.message.attachments]):
+			return await ctx.embed_reply(f"{ctx.bot.error_emoji} Please input an image and/or url")
+		for image_url, output in await self.get_clarifai_outputs(CLARIFAI_COLOR_MODEL_ID, image_urls):
+			if output.status.code != status_code_pb2.SUCCESS:
+				await ctx.embed_reply(f"{ctx.bot.error_emoji} Error: {output.status.description}")
+				continue
+			fields = [(color.raw_hex.upper(), f"{color.value * 100:.2f}%\n"
+												f"{re.sub(r'(?!^)(?=[A-Z])', ' ', color.w3c.name)}\n"
+												f"({color.w3c.hex.upper()})")
+						for color in sorted(output.data.colors, key = lambda c: c.value, reverse = True)]
+			await ctx.embed_reply(title = "Color Density", fields = fields, thumbnail_url = image_url)
 	
 	async def google(self, ctx, *, search: str):
 		'''Google image search something'''
@@ -108,24 +149,21 @@ class Images(commands.Cog):
 		# TODO: handle 403 daily limit exceeded error
 	
 	@image.command(name = "recognition")
-	async def image_recognition(self, ctx, image_url: Optional[str]):
-		'''Image recognition'''
-		if not image_url:
-			if not ctx.message.attachments:
-				return await ctx.embed_reply(f"{ctx.bot.error_emoji} Please input an image and/or url")
-			image_url = ctx.message.attachments[0].url
-		response = ctx.bot.clarifai_stub.PostModelOutputs(
-			service_pb2.PostModelOutputsRequest(
-				model_id = CLARIFAI_GENERAL_MODEL_ID, 
-				inputs = [resources_pb2.Input(data=resources_pb2.Data(image=resources_pb2.Image(url = image_url)))]
-			), metadata = (("authorization", f"Key {ctx.bot.CLARIFAI_API_KEY}"),)
-		)
-		if response.status.code != status_code_pb2.SUCCESS:
-			return await ctx.embed_reply(f"{ctx.bot.error_emoji} Error: {response.outputs[0].status.description}")
-		output = ", ".join(f"**{concept.name}**: {concept.value * 100:.2f}%"
-							for concept in sorted(response.outputs[0].data.concepts, 
-													key = lambda c: c.value, reverse = True))
-		await ctx.embed_reply(output, thumbnail_url = image_url)
+	async def image_recognition(self, ctx, *image_urls: str):
+		'''
+		Image recognition
+		Multiple images can be input at once
+		'''
+		if not (image_urls := image_urls or [attachment.url for attachment in ctx.message.attachments]):
+			return await ctx.embed_reply(f"{ctx.bot.error_emoji} Please input an image and/or url")
+		for image_url, output in await self.get_clarifai_outputs(CLARIFAI_GENERAL_MODEL_ID, image_urls):
+			if output.status.code != status_code_pb2.SUCCESS:
+				await ctx.embed_reply(f"{ctx.bot.error_emoji} Error: {output.status.description}")
+				continue
+			description = ", ".join(f"**{concept.name}**: {concept.value * 100:.2f}%"
+									for concept in sorted(output.data.concepts, 
+															key = lambda c: c.value, reverse = True))
+			await ctx.embed_reply(description, thumbnail_url = image_url)
 	
 	# TODO: add as search subcommand
 	@commands.group(invoke_without_command = True, case_insensitive = True)
@@ -174,20 +212,17 @@ class Images(commands.Cog):
 			await ctx.embed_reply(image_url = result.link)
 	
 	@commands.command()
-	async def nsfw(self, ctx, image_url: Optional[str]):
-		'''NSFW recognition'''
-		if not image_url:
-			if not ctx.message.attachments:
-				return await ctx.embed_reply(f"{ctx.bot.error_emoji} Please input an image and/or url")
-			image_url = ctx.message.attachments[0].url
-		response = ctx.bot.clarifai_stub.PostModelOutputs(
-			service_pb2.PostModelOutputsRequest(
-				model_id = CLARIFAI_NSFW_MODEL_ID, 
-				inputs = [resources_pb2.Input(data=resources_pb2.Data(image=resources_pb2.Image(url = image_url)))]
-			), metadata = (("authorization", f"Key {ctx.bot.CLARIFAI_API_KEY}"),)
-		)
-		if response.status.code != status_code_pb2.SUCCESS:
-			return await ctx.embed_reply(f"{ctx.bot.error_emoji} Error: {response.outputs[0].status.description}")
-		percentages = {concept.name: concept.value * 100 for concept in response.outputs[0].data.concepts}
-		await ctx.embed_reply(f"NSFW: {percentages['nsfw']:.2f}%", thumbnail_url = image_url)
+	async def nsfw(self, ctx, *image_urls: str):
+		'''
+		NSFW recognition
+		Multiple images can be input at once
+		'''
+		if not (image_urls := image_urls or [attachment.url for attachment in ctx.message.attachments]):
+			return await ctx.embed_reply(f"{ctx.bot.error_emoji} Please input an image and/or url")
+		for image_url, output in await self.get_clarifai_outputs(CLARIFAI_NSFW_MODEL_ID, image_urls):
+			if output.status.code != status_code_pb2.SUCCESS:
+				await ctx.embed_reply(f"{ctx.bot.error_emoji} Error: {output.status.description}")
+				continue
+			percentages = {concept.name: concept.value * 100 for concept in output.data.concepts}
+			await ctx.embed_reply(f"NSFW: {percentages['nsfw']:.2f}%", thumbnail_url = image_url)
 
@@ -2,8 +2,10 @@
 import discord
 from discord.ext import commands
 
+import asyncio
 import io
 import sys
+import time
 from typing import Optional
 
 import datetime
@@ -13,7 +15,9 @@ from utilities import checks
 from utilities.converters import Maptype
 
 sys.path.insert(0, "..")
-from units.location import get_geocode_data, get_timezone_data, wind_degrees_to_direction, UnitOutputError
+from units.location import (get_geocode_data, get_timezone_data, load_cache as load_location_cache, 
+							normalize_location, save_cache as save_location_cache, wind_degrees_to_direction, 
+							UnitOutputError)
 sys.path.pop(0)
 
 def setup(bot):
@@ -28,6 +32,15 @@ class Location(commands.Cog):
 	
 	def __init__(self, bot):
 		self.bot = bot
+		load_location_cache(self.bot.data_path + "/location_cache.json")
+		# OpenWeatherMap updates observations about every 10 minutes
+		self.weather_cache_ttl = 600  # seconds
+		self.weather_timeout = 10  # seconds
+		self.weather_observations = {}  # {normalized location: (retrieved time, observation)}
+		self.weather_requests = {}  # {normalized location: task}, for coalescing concurrent requests
+	
+	def cog_unload(self):
+		save_location_cache()
 	
 	async def cog_check(self, ctx):
 		return await checks.not_forbidden().predicate(ctx)
@@ -224,11 +237,13 @@ class Location(commands.Cog):
 	async def weather(self, ctx, *, location: str):
 		'''Weather'''
 		try:
-			observation = self.bot.weather_manager.weather_at_place(location)
+			observation = await self.get_weather_observation(location)
 		except (pyowm.commons.exceptions.NotFoundError, 
 				pyowm.commons.exceptions.BadGatewayError) as e:
 			# TODO: Catch base exceptions?
 			return await ctx.embed_reply(f"{ctx.bot.error_emoji} Error: {e}")
+		except asyncio.TimeoutError:
+			return await ctx.embed_reply(f"{ctx.bot.error_emoji} Error: OpenWeatherMap timed out")
 		if wind_direction := observation.weather.wnd.get("deg", ""):
 			wind_direction = wind_degrees_to_direction(wind_direction)
 		pressure = observation.weather.pressure["press"]
@@ -247,5 +262,31 @@ class Location(commands.Cog):
 								thumbnail_url = observation.weather.weather_icon_url(), fields = fields, 
 								timestamp = observation.weather.reference_time(timeformat = "date"))
 	
+	async def get_weather_observation(self, location):
+		key = normalize_location(location)
+		if (cached := self.weather_observations.get(key)) and time.monotonic() - cached[0] < self.weather_cache_ttl:
+			return cached[1]
+		if not (task := self.weather_requests.get(key)):
+			task = self.weather_requests[key] = self.bot.loop.create_task(
+				self.retrieve_weather_observation(key, location), name = f"Retrieve weather for {key}"
+			)
+		return await asyncio.shield(task)
+	
+	async def retrieve_weather_observation(self, key, location):
+		try:
+			# pyowm is synchronous
+			observation = await asyncio.wait_for(
+				self.bot.loop.run_in_executor(None, self.bot.weather_manager.weather_at_place, location), 
+				timeout = self.weather_timeout
+			)
+		finally:
+			del self.weather_requests[key]
+		now = time.monotonic()
+		for expired in [key for key, (retrieved, _) in self.weather_observations.items() 
+						if now - retrieved >= self.weather_cache_ttl]:
+			del self.weather_observations[expired]
+		self.weather_observations[key] = (now, observation)
+		return observation
+	
 	# TODO: Forecast; menu
 
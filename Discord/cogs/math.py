@@ -2,8 +2,6 @@
 import discord
 from discord.ext import commands
 
-import asyncio
-import concurrent.futures
 import math
 import multiprocessing
 
@@ -11,6 +9,8 @@ import sympy
 
 from utilities import checks
 
+DEFERRABLE = True
+
 def setup(bot):
 	bot.add_cog(Math())
 
@@ -43,23 +43,22 @@ class Math(commands.Cog):
 		# TODO: use filter
 		equation = "".join(character for character in equation if character in allowed)
 		print("Calculated " + equation)
-		with multiprocessing.Pool(1) as pool:
-			async_result = pool.apply_async(eval, (equation,))
-			future = ctx.bot.loop.run_in_executor(None, async_result.get, 10.0)
-			try:
-				result = await asyncio.wait_for(future, 10.0)
-				await ctx.embed_reply(f"{equation} = {result}")
-			except discord.HTTPException:
-				# TODO: use textwrap/paginate
-				await ctx.embed_reply(":no_entry: Output too long")
-			except SyntaxError:
-				await ctx.embed_reply(":no_entry: Syntax error")
-			except TypeError as e:
-				await ctx.embed_reply(f":no_entry: Error: {e}")
-			except ZeroDivisionError:
-				await ctx.embed_reply(":no_entry: Error: Division by zero")
-			except (concurrent.futures.TimeoutError, multiprocessing.context.TimeoutError):
-				await ctx.embed_reply(":no_entry: Execution exceeded time limit")
+		try:
+			result = await ctx.bot.evaluation_worker_pool.run(eval, equation, timeout = 10.0)
+			await ctx.embed_reply(f"{equation} = {result}")
+		except discord.HTTPException:
+			# TODO: use textwrap/paginate
+			await ctx.embed_reply(":no_entry: Output too long")
+		except SyntaxError:
+			await ctx.embed_reply(":no_entry: Syntax error")
+		except TypeError as e:
+			await ctx.embed_reply(f":no_entry: Error: {e}")
+		except ZeroDivisionError:
+			await ctx.embed_reply(":no_entry: Error: Division by zero")
+		except multiprocessing.TimeoutError:
+			await ctx.embed_reply(":no_entry: Execution exceeded time limit")
+		except MemoryError:
+			await ctx.embed_reply(":no_entry: Execution exceeded memory limit")
 	
 	@commands.command()
 	async def exp(self, ctx, value: float):
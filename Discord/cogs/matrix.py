@@ -7,6 +7,8 @@ import scipy
 
 from utilities import checks
 
+DEFERRABLE = True
+
 def setup(bot):
 	bot.add_cog(Matrix())
 
@@ -3,6 +3,7 @@ import discord
 from discord.ext import commands
 
 import asyncio
+import collections
 import datetime
 import copy
 import ctypes
@@ -52,13 +53,43 @@ class Meta(commands.Cog):
 		'''Benchmark'''
 		process = psutil.Process()
 		process.cpu_percent()
+		guild_settings_cache_size = sys.getsizeof(ctx.bot.guild_settings) + sum(
+			sys.getsizeof(settings) + sum(sys.getsizeof(name) + sys.getsizeof(setting) for name, setting in settings.items())
+			for _, settings in ctx.bot.guild_settings.values()
+		)
 		message = await ctx.embed_reply(fields = (("RAM", f"{process.memory_info().rss / 2 ** 20:.2f} MiB"), 
-													("CPU", "Calculating CPU usage..")))
+													("CPU", "Calculating CPU usage.."), 
+													("Prefix Cache", f"{ctx.bot.prefix_cache_hits:,} hits\n"
+																		f"{ctx.bot.prefix_cache_misses:,} misses\n"
+																		f"{len(ctx.bot.direct_message_prefixes) + len(ctx.bot.guild_prefixes):,} entries"), 
+													("Guild Settings Cache", f"{ctx.bot.guild_settings_cache_hits:,} hits\n"
+																				f"{ctx.bot.guild_settings_cache_misses:,} misses\n"
+																				f"{len(ctx.bot.guild_settings):,} entries\n"
+																				f"{guild_settings_cache_size / 2 ** 10:.2f} KiB"), 
+													("HTTP Cache", f"{sum(ctx.bot.http_cache.hits.values()):,} hits\n"
+																	f"{sum(ctx.bot.http_cache.misses.values()):,} misses\n"
+																	f"{len(ctx.bot.http_cache.responses):,} entries\n"
+																	f"{ctx.bot.http_cache.size / 2 ** 20:.2f} MiB"), 
+													("Audio Cache", f"{ctx.bot.audio_cache.hit_rate:.0%} hit rate\n"
+																	f"{ctx.bot.audio_cache.bytes_saved / 2 ** 20:,.2f} MiB saved\n"
+																	f"{len(ctx.bot.audio_cache.files):,} files\n"
+																	f"{ctx.bot.audio_cache.size / 2 ** 20:,.2f} MiB"), 
+													("youtube-dl Info Cache", f"{ctx.bot.ytdl_info_cache.hits:,} hits\n"
+																				f"{ctx.bot.ytdl_info_cache.misses:,} misses\n"
+																				f"{len(ctx.bot.ytdl_info_cache.info):,} entries")))
 		await asyncio.sleep(1)
 		embed = message.embeds[0]
 		embed.set_field_at(1, name = "CPU", value = f"{process.cpu_percent() / psutil.cpu_count():.5g}%")
 		await message.edit(embed = embed)
 	
+	@commands.command(name = "http_cache", aliases = ["httpcache"], hidden = True)
+	@commands.is_owner()
+	async def http_cache(self, ctx):
+		'''HTTP response cache hit rates by endpoint'''
+		lines = [f"{hits / (hits + misses):.0%} of {hits + misses:,} {endpoint}" 
+					for endpoint, (hits, misses) in ctx.bot.http_cache.get_stats().items()]
+		await ctx.embed_reply('\n'.join(lines[:20]) or "No requests yet")
+	
 	@commands.command(aliases = ["category"])
 	@checks.not_forbidden()
 	async def cog(self, ctx, command):
@@ -93,6 +124,9 @@ class Meta(commands.Cog):
 			""", 
 			ctx.author.id
 		)
+		# Merge with invocations not yet written to the database
+		_, pending_users_commands_invoked = ctx.bot.command_stats_writer.get_pending()
+		commands_invoked = (commands_invoked or 0) + pending_users_commands_invoked[ctx.author.id]
 		await ctx.embed_reply(f"You have {commands_invoked} points")
 	
 	@commands.command()
@@ -122,25 +156,9 @@ class Meta(commands.Cog):
 		if not prefixes:
 			prefixes = ['!']
 		if ctx.channel.type is discord.ChannelType.private:
-			await ctx.bot.db.execute(
-				"""
-				INSERT INTO direct_messages.prefixes (channel_id, prefixes)
-				VALUES ($1, $2)
-				ON CONFLICT (channel_id) DO
-				UPDATE SET prefixes = $2
-				""", 
-				ctx.channel.id, prefixes
-			)
+			await ctx.bot.set_direct_message_prefixes(ctx.channel.id, prefixes)
 		else:
-			await ctx.bot.db.execute(
-				"""
-				INSERT INTO guilds.prefixes (guild_id, prefixes)
-				VALUES ($1, $2)
-				ON CONFLICT (guild_id) DO
-				UPDATE SET prefixes = $2
-				""", 
-				ctx.guild.id, prefixes
-			)
+			await ctx.bot.set_guild_prefixes(ctx.guild.id, prefixes)
 		await ctx.embed_reply("Prefix(es) set: " + ' '.join(f'`"{prefix}"`' for prefix in prefixes))
 	
 	@commands.group(aliases = ["shard"], invoke_without_command = True, case_insensitive = True)
@@ -225,11 +243,22 @@ class Meta(commands.Cog):
 		)
 		records = await ctx.bot.db.fetch(
 			"""
+			(
+				SELECT * FROM meta.commands_invoked
+				ORDER BY invokes DESC
+				LIMIT 10
+			)
+			UNION
 			SELECT * FROM meta.commands_invoked
-			ORDER BY invokes DESC
-			LIMIT 10
-			"""
+			WHERE command = ANY($1::TEXT [])
+			""", 
+			list(ctx.bot.command_stats_writer.get_pending()[0])
 		)
+		# Merge with invocations not yet written to the database, read after the database,
+		# so invocations written in the meantime aren't counted twice
+		pending_commands_invoked, _ = ctx.bot.command_stats_writer.get_pending()
+		commands_invoked = collections.Counter({record["command"]: record["invokes"] for record in records})
+		commands_invoked.update(pending_commands_invoked)
 		
 		channel_types = [type(c) for c in ctx.bot.get_all_channels()]
 		voice_count = channel_types.count(discord.VoiceChannel)
@@ -239,7 +268,7 @@ class Meta(commands.Cog):
 		total_members_online = sum(1 for m in ctx.bot.get_all_members() if m.status != discord.Status.offline)
 		unique_members = set(ctx.bot.get_all_members())
 		unique_members_online = sum(1 for m in unique_members if m.status != discord.Status.offline)
-		top_commands = [(record["command"], record["invokes"]) for record in records]
+		top_commands = commands_invoked.most_common(10)
 		session_top_5 = sorted(ctx.bot.session_commands_invoked.items(), key = lambda i: i[1], reverse = True)[:5]
 		
 		fields = [("Uptime", duration_to_string(datetime.datetime.now(datetime.timezone.utc) - ctx.bot.online_time, abbreviate = True)), 
@@ -247,7 +276,7 @@ class Meta(commands.Cog):
 					("Recorded Restarts", f"{stats['restarts']:,}"), 
 					("Commands", f"{len(ctx.bot.commands)} main\n{len(set(ctx.bot.walk_commands()))} total"), 
 					("Commands Invoked", f"{sum(ctx.bot.session_commands_invoked.values())} this session\n"
-											f"{stats['commands_invoked']:,} total recorded"), 
+											f"{stats['commands_invoked'] + sum(pending_commands_invoked.values()):,} total recorded"), 
 					("Cogs Reloaded", f"{stats['cogs_reloaded']:,}"),  # TODO: cogs reloaded this session
 					("Servers", len(ctx.bot.guilds)), 
 					("Channels", f"{channel_types.count(discord.TextChannel)} text\n"
@@ -471,11 +500,9 @@ class Meta(commands.Cog):
 				title_url = f"https://{site}/"
 			await ctx.embed_reply(f"`{response}`", title = title, title_url = title_url)
 		else:
-			output = []
-			for site, site_info in ctx.bot.listing_sites.items():
-				response = await ctx.bot.update_listing_stats(site)
-				output.append(f"{site_info['name']} (https://{site}/): `{response}`")
-			await ctx.embed_reply('\n'.join(output))
+			responses = await ctx.bot.update_all_listing_stats()
+			await ctx.embed_reply('\n'.join(f"{ctx.bot.listing_sites[site]['name']} (https://{site}/): `{response}`" 
+											for site, response in responses.items()))
 	
 	# Restart/Shutdown
 	
@@ -2,9 +2,7 @@
 import discord
 from discord.ext import commands
 
-import asyncio
 import calendar
-import concurrent.futures
 import csv
 import datetime
 import inspect
@@ -270,24 +268,23 @@ class Random(commands.Cog):
 		# TODO: Add documentation on arithmetic/basic integer operations
 		if 'd' not in input:
 			input = 'd' + input
-		with multiprocessing.Pool(1) as pool:
-			async_result = pool.apply_async(dice.roll, (input,))
-			future = self.bot.loop.run_in_executor(None, async_result.get, 10.0)
-			try:
-				result = await asyncio.wait_for(future, 10.0)
-				if isinstance(result, int):
-					await ctx.embed_reply(result)
-				else:
-					await ctx.embed_reply(", ".join(str(roll) for roll in result))
-			except discord.HTTPException:
-				# TODO: use textwrap/paginate
-				await ctx.embed_reply(":no_entry: Output too long")
-			except pyparsing.ParseException:
-				await ctx.embed_reply(":no_entry: Invalid input")
-			except (concurrent.futures.TimeoutError, multiprocessing.context.TimeoutError):
-				await ctx.embed_reply(":no_entry: Execution exceeded time limit")
-			except dice.DiceFatalException as e:
-				await ctx.embed_reply(f":no_entry: Error: {e}")
+		try:
+			result = await ctx.bot.evaluation_worker_pool.run(dice.roll, input, timeout = 10.0)
+			if isinstance(result, int):
+				await ctx.embed_reply(result)
+			else:
+				await ctx.embed_reply(", ".join(str(roll) for roll in result))
+		except discord.HTTPException:
+			# TODO: use textwrap/paginate
+			await ctx.embed_reply(":no_entry: Output too long")
+		except pyparsing.ParseException:
+			await ctx.embed_reply(":no_entry: Invalid input")
+		except multiprocessing.TimeoutError:
+			await ctx.embed_reply(":no_entry: Execution exceeded time limit")
+		except MemoryError:
+			await ctx.embed_reply(":no_entry: Execution exceeded memory limit")
+		except dice.DiceFatalException as e:
+			await ctx.embed_reply(f":no_entry: Error: {e}")
 	
 	@commands.group(invoke_without_command = True, case_insensitive = True)
 	async def date(self, ctx):
@@ -92,9 +92,7 @@ class PlayingMenu(Menu):
 		return str(payload.emoji) in self.buttons
 	
 	async def is_permitted(self, command, user_id):
-		while ((permitted := await self.ctx.get_permission(command.name, id = user_id)) is None
-				and command.parent is not None):
-			command = command.parent
+		permitted = await self.ctx.get_command_permission(command, id = user_id)
 		return permitted or user_id in (self.ctx.guild.owner.id, self.bot.owner_id)
 	
 	@menus.button('\N{BLACK RIGHT-POINTING TRIANGLE WITH DOUBLE VERTICAL BAR}', position = 1)
@@ -134,6 +132,10 @@ class WolframAlphaSource(menus.ListPageSource):
 	def __init__(self, subpods):
 		super().__init__(subpods, per_page = 1)
 	
+	def add_subpods(self, subpods):
+		self.entries.extend(subpods)
+		self._max_pages = len(self.entries)
+	
 	async def format_page(self, menu, subpod):
 		pod, subpod = subpod
 		embed = discord.Embed(title = pod.title, color = menu.bot.bot_color)
@@ -207,11 +209,12 @@ class Reactions(commands.Cog):
 	
 	async def wolframalpha(self, ctx, *, search):
 		'''Wolfram|Alpha menu'''
-		# TODO: process asynchronously
 		# TODO: location option?
 		location = self.bot.fake_location
+		search_cog = self.bot.get_cog("Search")
+		search = search.strip('`')
 		try:
-			result = self.bot.wolfram_alpha_client.query(search.strip('`'), ip = self.bot.fake_ip, location = location)
+			result = await search_cog.get_wolframalpha_result(search, location)
 		except Exception as e:
 			if str(e).startswith("Error "):
 				return await ctx.embed_reply(f":no_entry: {e}")
@@ -223,14 +226,23 @@ class Reactions(commands.Cog):
 			else:
 				didyoumean = result.didyoumeans["didyoumean"][0]["#text"]
 			await ctx.embed_reply(f"Using closest Wolfram|Alpha interpretation: `{didyoumean}`")
+			search = didyoumean
 			try:
-				result = self.bot.wolfram_alpha_client.query(didyoumean, ip = self.bot.fake_ip, location = location)
+				result = await search_cog.get_wolframalpha_result(search, location)
 			except Exception as e:
 				if str(e).startswith("Error "):
 					return await ctx.embed_reply(f":no_entry: {e}")
 				raise
 		if hasattr(result, "pods"):
-			await WolframAlphaMenu([(pod, subpod) for pod in result.pods for subpod in pod.subpods]).start(ctx)
+			# Start menu with first pod and add pods as they're computed
+			menu = None
+			async for pod in search_cog.iterate_wolframalpha_pods(result, search, location):
+				subpods = [(pod, subpod) for subpod in pod.subpods]
+				if menu:
+					menu.source.add_subpods(subpods)
+				elif subpods:
+					menu = WolframAlphaMenu(subpods)
+					await menu.start(ctx)
 			if result.timedout:
 				await ctx.embed_reply(f"Some results timed out: {result.timedout.replace(',', ', ')}")
 		elif result.timedout:
@@ -3,7 +3,9 @@ import discord
 from discord.ext import commands, menus, tasks
 
 import asyncio
+import contextlib
 import datetime
+import heapq
 from typing import Optional
 
 from parsedatetime import Calendar, VERSION_CONTEXT_STYLE
@@ -29,9 +31,17 @@ class Reminders(commands.Cog):
 		
 		self.menus = []
 		
-		self.current_timer = None
+		# Min-heap of upcoming reminders, as (due time, id, record)
+		# Holds every pending reminder due before window_end
+		self.upcoming = []
+		# IDs of reminders in upcoming, so one inserted while loading isn't pushed twice
+		self.upcoming_ids = set()
+		self.window = datetime.timedelta(hours = 1)
+		self.window_end = None
+		self.batch_size = 100
+		# Reminders that error are retried after 1, 2, 4, and 8 minutes, then marked failed
+		self.max_attempts = 5
 		self.new_reminder = asyncio.Event()
-		self.restarting_timer = False
 		self.timer.start().set_name("Reminders")
 	
 	def cog_unload(self):
@@ -58,6 +68,13 @@ class Reminders(commands.Cog):
 			)
 			"""
 		)
+		await self.bot.db.execute(
+			"""
+			ALTER TABLE reminders.reminders
+			ADD COLUMN IF NOT EXISTS attempts		INT DEFAULT 0, 
+			ADD COLUMN IF NOT EXISTS retry_time		TIMESTAMPTZ
+			"""
+		)
 	
 	async def cog_check(self, ctx):
 		return await checks.not_forbidden().predicate(ctx)
@@ -108,20 +125,18 @@ class Reminders(commands.Cog):
 											timestamp = parsed_datetime)
 		# Insert into database
 		created_time = ctx.message.created_at.replace(tzinfo = datetime.timezone.utc)
-		await self.bot.db.execute(
+		record = await self.bot.db.fetchrow(
 			"""
 			INSERT INTO reminders.reminders (user_id, channel_id, message_id, created_time, remind_time, reminder)
 			VALUES ($1, $2, $3, $4, $5, $6)
+			RETURNING *
 			""", 
 			ctx.author.id, ctx.channel.id, response.id, created_time, parsed_datetime, reminder
 		)
 		# Update timer
-		if self.current_timer and parsed_datetime < self.current_timer["remind_time"]:
-			self.restarting_timer = True
-			self.timer.restart()
-			self.timer.get_task().set_name("Reminders")
-		else:
-			self.new_reminder.set()
+		if self.window_end and parsed_datetime < self.window_end:
+			self.push_upcoming(parsed_datetime, record)
+		self.new_reminder.set()
 	
 	@reminder_command.command(aliases = ["delete", "remove"])
 	async def cancel(self, ctx, reminder_id: int):
@@ -137,10 +152,11 @@ class Reminders(commands.Cog):
 		)
 		if not cancelled:
 			return await ctx.embed_reply(f"{ctx.bot.error_emoji} Error: Unable to find and cancel reminder")
-		if self.current_timer and self.current_timer["id"] == reminder_id:
-			self.restarting_timer = True
-			self.timer.restart()
-			self.timer.get_task().set_name("Reminders")
+		if reminder_id in self.upcoming_ids:
+			self.upcoming = [upcoming for upcoming in self.upcoming if upcoming[1] != reminder_id]
+			heapq.heapify(self.upcoming)
+			self.upcoming_ids.discard(reminder_id)
+			self.new_reminder.set()
 		await ctx.embed_reply(fields = (("Cancelled Reminder", cancelled["reminder"] or ctx.bot.ZWS),), 
 								footer_text = f"Set for {cancelled['remind_time'].isoformat(timespec = 'seconds').replace('+00:00', 'Z')}", 
 								timestamp = cancelled["remind_time"])
@@ -201,22 +217,101 @@ class Reminders(commands.Cog):
 	# R/PT0S
 	@tasks.loop()
 	async def timer(self):
-		record = await self.bot.db.fetchrow(
+		now = datetime.datetime.now(datetime.timezone.utc)
+		if not self.upcoming or now >= self.window_end:
+			await self.load_upcoming_reminders(now)
+			if not self.upcoming:
+				self.new_reminder.clear()
+				return await self.new_reminder.wait()
+		due_time = self.upcoming[0][0]
+		if due_time > now:
+			self.new_reminder.clear()
+			with contextlib.suppress(asyncio.TimeoutError):
+				await asyncio.wait_for(self.new_reminder.wait(), 
+										timeout = (min(due_time, self.window_end) - now).total_seconds())
+			return
+		# Send all due reminders at once, in batches when catching up
+		records = []
+		while self.upcoming and self.upcoming[0][0] <= now and len(records) < self.batch_size:
+			records.append(heapq.heappop(self.upcoming)[2])
+			self.upcoming_ids.discard(records[-1]["id"])
+		results = await asyncio.gather(*(self.send_reminder(record) for record in records), 
+										return_exceptions = True)
+		for result in results:
+			if isinstance(result, Exception):
+				self.bot.print(f"Reminders Task Error: {type(result).__name__}: {result}")
+		if reminded_ids := [record["id"] for record, result in zip(records, results) if result is True]:
+			await self.bot.db.execute(
+				"""
+				UPDATE reminders.reminders
+				SET reminded = TRUE
+				WHERE id = ANY($1::INT [])
+				""", 
+				reminded_ids
+			)
+		if failed_ids := [record["id"] for record, result in zip(records, results) if result is False]:
+			await self.bot.db.execute(
+				"""
+				UPDATE reminders.reminders
+				SET failed = TRUE
+				WHERE id = ANY($1::INT [])
+				""", 
+				failed_ids
+			)
+		if errored_ids := [record["id"] for record, result in zip(records, results) if isinstance(result, Exception)]:
+			# Back off before retrying reminders that errored, e.g. during a Discord outage
+			retried = await self.bot.db.fetch(
+				"""
+				UPDATE reminders.reminders
+				SET attempts = attempts + 1, 
+					failed = attempts + 1 >= $2, 
+					retry_time = NOW() + INTERVAL '1 minute' * 2 ^ attempts
+				WHERE id = ANY($1::INT [])
+				RETURNING *
+				""", 
+				errored_ids, self.max_attempts
+			)
+			for record in retried:
+				if not record["failed"] and record["retry_time"] < self.window_end:
+					self.push_upcoming(record["retry_time"], record)
+	
+	async def load_upcoming_reminders(self, now):
+		earliest = await self.bot.db.fetchval(
 			"""
-			SELECT * FROM reminders.reminders
+			SELECT MIN(COALESCE(retry_time, remind_time)) FROM reminders.reminders
 			WHERE reminded = FALSE AND cancelled = FALSE AND failed = FALSE
-			ORDER BY remind_time
-			LIMIT 1
 			"""
 		)
-		if not record:
-			self.new_reminder.clear()
-			return await self.new_reminder.wait()
-		self.current_timer = record
-		await discord.utils.sleep_until(record["remind_time"])
+		if not earliest:
+			self.window_end = now
+			return
+		self.window_end = max(earliest, now) + self.window
+		records = await self.bot.db.fetch(
+			"""
+			SELECT *, COALESCE(retry_time, remind_time) AS due_time FROM reminders.reminders
+			WHERE reminded = FALSE AND cancelled = FALSE AND failed = FALSE AND 
+				COALESCE(retry_time, remind_time) < $1 AND id <> ALL($2::INT [])
+			ORDER BY due_time
+			LIMIT $3
+			""", 
+			self.window_end, list(self.upcoming_ids), self.batch_size * 10
+		)
+		if len(records) == self.batch_size * 10:
+			# Window is only complete up to the last reminder loaded
+			self.window_end = records[-1]["due_time"]
+		for record in records:
+			self.push_upcoming(record["due_time"], record)
+	
+	def push_upcoming(self, due_time, record):
+		if record["id"] not in self.upcoming_ids:
+			self.upcoming_ids.add(record["id"])
+			heapq.heappush(self.upcoming, (due_time, record["id"], record))
+	
+	async def send_reminder(self, record):
+		'''Returns whether the reminder was sent'''
 		if not (channel := self.bot.get_channel(record["channel_id"])):
 			# TODO: Attempt to fetch channel?
-			return await self.bot.db.execute("UPDATE reminders.reminders SET failed = TRUE WHERE id = $1", record["id"])
+			return False
 		user = self.bot.get_user(record["user_id"]) or await self.bot.fetch_user(record["user_id"])
 		# TODO: Handle user not found?
 		embed = discord.Embed(color = self.bot.bot_color)
@@ -232,9 +327,8 @@ class Reminders(commands.Cog):
 		except discord.Forbidden:
 			# TODO: Attempt to send without embed
 			# TODO: Fall back to DM
-			await self.bot.db.execute("UPDATE reminders.reminders SET failed = TRUE WHERE id = $1", record["id"])
-		else:
-			await self.bot.db.execute("UPDATE reminders.reminders SET reminded = TRUE WHERE id = $1", record["id"])
+			return False
+		return True
 	
 	@timer.before_loop
 	async def before_timer(self):
@@ -243,10 +337,7 @@ class Reminders(commands.Cog):
 	
 	@timer.after_loop
 	async def after_timer(self):
-		if self.restarting_timer:
-			self.restarting_timer = False
-		else:
-			self.bot.print("Reminders task cancelled")
+		self.bot.print("Reminders task cancelled")
 
 class RemindersMenu(Menu, menus.MenuPages):
 	
@@ -80,7 +80,7 @@ class Resources(commands.Cog):
 		if not identifier_number.startswith("cve-"):
 			identifier_number = "cve-" + identifier_number
 		url = f"http://cve.circl.lu/api/cve/{identifier_number}"
-		async with ctx.bot.aiohttp_session.get(url) as resp:
+		async with ctx.bot.http_cache.get(url, ttl = 86400) as resp:
 			data = await resp.json()
 		if not data:
 			return await ctx.embed_reply(":no_entry: Error: Not found")
@@ -93,7 +93,7 @@ class Resources(commands.Cog):
 		'''Gender of a name'''
 		# TODO: add localization options?
 		url = "https://api.genderize.io/"
-		async with ctx.bot.aiohttp_session.get(url, params = {"name": name}) as resp:
+		async with ctx.bot.http_cache.get(url, params = {"name": name}, ttl = 86400) as resp:
 			# TODO: check status code
 			data = await resp.json()
 		if not data["gender"]:
@@ -144,7 +144,7 @@ class Resources(commands.Cog):
 	@checks.not_forbidden()
 	async def horoscope_signs(self, ctx):
 		'''Sun signs'''
-		async with ctx.bot.aiohttp_session.get("http://sandipbgt.com/theastrologer/api/sunsigns") as resp:
+		async with ctx.bot.http_cache.get("http://sandipbgt.com/theastrologer/api/sunsigns", ttl = 86400) as resp:
 			data = await resp.json(content_type = "text/html")
 		await ctx.embed_reply(", ".join(data))
 	
@@ -173,7 +173,7 @@ class Resources(commands.Cog):
 		sign = sign.lower()
 		# url = f"http://sandipbgt.com/theastrologer/api/horoscope/{sign}/{day}/"
 		url = f"http://theastrologer-api.herokuapp.com/api/horoscope/{sign}/{day}"
-		async with ctx.bot.aiohttp_session.get(url) as resp:
+		async with ctx.bot.http_cache.get(url, ttl = 3600) as resp:
 			if resp.status in (404, 500, 503):
 				return await ctx.embed_reply(f"{ctx.bot.error_emoji} API Error: {resp.status} {resp.reason}")
 			# data = await resp.json(content_type = "text/html")
@@ -243,7 +243,7 @@ class Resources(commands.Cog):
 		'''
 		url = "https://newsapi.org/v1/articles"
 		params = {"source": source, "apiKey": ctx.bot.NEWSAPI_ORG_API_KEY}
-		async with ctx.bot.aiohttp_session.get(url, params = params) as resp:
+		async with ctx.bot.http_cache.get(url, params = params, ttl = 600) as resp:
 			data = await resp.json()
 		if data["status"] != "ok":
 			return await ctx.embed_reply(f":no_entry: Error: {data['message']}")
@@ -284,7 +284,7 @@ class Resources(commands.Cog):
 		News sources
 		https://newsapi.org/sources
 		'''
-		async with ctx.bot.aiohttp_session.get("https://newsapi.org/v1/sources") as resp:
+		async with ctx.bot.http_cache.get("https://newsapi.org/v1/sources", ttl = 86400) as resp:
 			data = await resp.json()
 		if data["status"] != "ok":
 			return await ctx.embed_reply(f"{ctx.bot.error_emoji} Error")
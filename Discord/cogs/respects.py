@@ -12,6 +12,8 @@ import numpy
 
 from utilities import checks
 
+DEFERRABLE = True
+
 def setup(bot):
 	bot.add_cog(Respects(bot))
 
@@ -42,11 +42,22 @@ class RSS(commands.Cog):
 			if len(matching_utc_offsets) == 1:
 				self.tzinfos[timezone_abbreviation] = dateutil.tz.gettz(matching_timezones[0])
 		
+		self.concurrent_requests_limit = 10
+		self.concurrent_requests_per_host_limit = 2
+		self.request_semaphore = asyncio.Semaphore(self.concurrent_requests_limit)
+		self.aiohttp_session = aiohttp.ClientSession(
+			connector = aiohttp.TCPConnector(limit_per_host = self.concurrent_requests_per_host_limit), 
+			timeout = aiohttp.ClientTimeout(total = 60)
+		)
+		
+		self.feed_retry_times = {}  # {feed: time.monotonic() to check again after an error}
+		
 		self.new_feed = asyncio.Event()
 		self.check_feeds.start().set_name("RSS")
 	
 	def cog_unload(self):
 		self.check_feeds.cancel()
+		self.bot.loop.create_task(self.aiohttp_session.close(), name = "Close RSS aiohttp session")
 	
 	async def inititalize_database(self):
 		await self.bot.connect_to_database()
@@ -62,6 +73,13 @@ class RSS(commands.Cog):
 			)
 			"""
 		)
+		await self.bot.db.execute(
+			"""
+			ALTER TABLE rss.feeds
+			ADD COLUMN IF NOT EXISTS etag			TEXT, 
+			ADD COLUMN IF NOT EXISTS last_modified	TEXT
+			"""
+		)
 		await self.bot.db.execute(
 			"""
 			CREATE TABLE IF NOT EXISTS rss.entries (
@@ -162,7 +180,7 @@ class RSS(commands.Cog):
 	async def check_feeds(self):
 		records = await self.bot.db.fetch(
 			"""
-			SELECT DISTINCT ON (feed) feed, last_checked, ttl
+			SELECT DISTINCT ON (feed) feed, last_checked, ttl, etag, last_modified
 			FROM rss.feeds
 			ORDER BY feed, last_checked
 			"""
@@ -170,156 +188,186 @@ class RSS(commands.Cog):
 		if not records:
 			self.new_feed.clear()
 			await self.new_feed.wait()
-		for record in records:
-			feed = record["feed"]
-			if record["ttl"] and datetime.datetime.now(datetime.timezone.utc) < record["last_checked"] + datetime.timedelta(minutes = record["ttl"]):
-				continue
-			try:
-				async with self.bot.aiohttp_session.get(feed) as resp:
-					feed_text = await resp.text()
-				feed_info = await self.bot.loop.run_in_executor(None, functools.partial(feedparser.parse, io.BytesIO(feed_text.encode("UTF-8")), response_headers = {"Content-Location": feed}))
-				# Still necessary to run in executor?
-				ttl = None
-				if "ttl" in feed_info.feed:
-					ttl = int(feed_info.feed.ttl)
+		await asyncio.gather(*(self.check_feed(record) for record in records))
+	
+	async def check_feed(self, record):
+		feed = record["feed"]
+		if record["ttl"] and datetime.datetime.now(datetime.timezone.utc) < record["last_checked"] + datetime.timedelta(minutes = record["ttl"]):
+			return
+		# Back off per feed, rather than delaying the other feeds being checked concurrently
+		if time.monotonic() < self.feed_retry_times.get(feed, 0):
+			return
+		self.feed_retry_times.pop(feed, None)
+		try:
+			# Conditional GET
+			headers = {}
+			if record["etag"]:
+				headers["If-None-Match"] = record["etag"]
+			if record["last_modified"]:
+				headers["If-Modified-Since"] = record["last_modified"]
+			async with self.request_semaphore:
+				async with self.aiohttp_session.get(feed, headers = headers) as resp:
+					if resp.status == 304:  # Not Modified
+						feed_text = None
+					else:
+						feed_text = await resp.text()
+					etag = resp.headers.get("ETag")
+					last_modified = resp.headers.get("Last-Modified")
+			if feed_text is None:
 				await self.bot.db.execute(
 					"""
 					UPDATE rss.feeds
-					SET last_checked = NOW(), 
-						ttl = $1
-					WHERE feed = $2
+					SET last_checked = NOW()
+					WHERE feed = $1
 					""", 
-					ttl, feed
+					feed
 				)
-				for entry in feed_info.entries:
-					if "id" not in entry:
-						continue
-					inserted = await self.bot.db.fetchrow(
-						"""
-						INSERT INTO rss.entries (entry, feed)
-						VALUES ($1, $2)
-						ON CONFLICT DO NOTHING
-						RETURNING *
-						""", 
-						entry.id, feed
-					)
-					if not inserted:
-						continue
-					# Get timestamp
-					## if "published_parsed" in entry:
-					##  timestamp = datetime.datetime.fromtimestamp(time.mktime(entry.published_parsed))
-					### inaccurate
-					if "published" in entry and entry.published:
-						timestamp = dateutil.parser.parse(entry.published, tzinfos = self.tzinfos)
-					elif "updated" in entry:  # and entry.updated necessary?; check updated first?
-						timestamp = dateutil.parser.parse(entry.updated, tzinfos = self.tzinfos)
-					else:
-						timestamp = discord.Embed.Empty
-					# Get and set description, title, url + set timestamp
-					if not (description := entry.get("summary")) and "content" in entry:
-						description = entry["content"][0].get("value")
-					if description:
-						description = BeautifulSoup(description, "lxml").get_text(separator = '\n')
-						description = re.sub(r"\n\s*\n", '\n', description)
-						if len(description) > self.bot.EMBED_DESCRIPTION_CHARACTER_LIMIT:
-							space_index = description.rfind(' ', 0, self.bot.EDCL - 3)
-							# EDCL: Embed Description Character Limit
-							description = description[:space_index] + "..."
-					title = textwrap.shorten(entry.get("title"), width = self.bot.ETiCL, placeholder = "...")
-					# ETiCL: Embed Title Character Limit
-					embed = discord.Embed(title = html.unescape(title), 
-											url = entry.link, 
-											description = description, 
-											timestamp = timestamp, 
-											color = self.bot.rss_color)
-					# Get and set thumbnail url
-					thumbnail_url = (
-						(media_thumbnail := entry.get("media_thumbnail")) and media_thumbnail[0].get("url") or 
-						(
-							(media_content := entry.get("media_content")) and 
-							(media_image := discord.utils.find(lambda c: "image" in c.get("medium", ""), media_content)) and 
-							media_image.get("url")
-						) or 
-						(
-							(links := entry.get("links")) and 
-							(image_link := discord.utils.find(lambda l: "image" in l.get("type", ""), links)) and 
-							image_link.get("href")
-						 ) or 
-						(
-							(content := entry.get("content")) and (content_value := content[0].get("value")) and 
-							(content_img := getattr(BeautifulSoup(content_value, "lxml"), "img")) and 
-							content_img.get("src")
-						) or 
-						(
-							(media_content := entry.get("media_content")) and 
-							(media_content := discord.utils.find(lambda c: "url" in c, media_content)) and 
-							media_content["url"]
-						) or 
-						(
-							(description := entry.get("description")) and 
-							(description_img := getattr(BeautifulSoup(description, "lxml"), "img")) and 
-							description_img.get("src")
-						)
-					)
-					if thumbnail_url:
-						if not urllib.parse.urlparse(thumbnail_url).netloc:
-							thumbnail_url = feed_info.feed.link + thumbnail_url
-						embed.set_thumbnail(url = thumbnail_url)
-					# Get and set footer icon url
-					footer_icon_url = (
-						feed_info.feed.get("icon") or feed_info.feed.get("logo") or 
-						(feed_image := feed_info.feed.get("image")) and feed_image.get("href") or 
-						(parsed_image := BeautifulSoup(feed_text, "lxml").image) and next(iter(parsed_image.attrs.values()), None) or 
-						discord.Embed.Empty
-					)
-					embed.set_footer(text = feed_info.feed.title, icon_url = footer_icon_url)
-					# Send embed(s)
-					channel_records = await self.bot.db.fetch("SELECT channel_id FROM rss.feeds WHERE feed = $1", feed)
-					for record in channel_records:
-						if text_channel := self.bot.get_channel(record["channel_id"]):
-							try:
-								await text_channel.send(embed = embed)
-							except discord.Forbidden:
-								pass
-							except discord.HTTPException as e:
-								if e.status == 400 and e.code == 50035:
-									if "In embed.url: Not a well formed URL." in e.text:
-										embed.url = discord.Embed.Empty
-									if ("In embed.thumbnail.url: Not a well formed URL." in e.text or 
-										("In embed.thumbnail.url: Scheme" in e.text and 
-											"is not supported. Scheme must be one of ('http', 'https')." in e.text)):
-										embed.set_thumbnail(url = "")
-									if ("In embed.footer.icon_url: Not a well formed URL." in e.text or 
-										("In embed.footer.icon_url: Scheme" in e.text and 
-											"is not supported. Scheme must be one of ('http', 'https')." in e.text)):
-										embed.set_footer(text = feed_info.feed.title)
-									await text_channel.send(embed = embed)
-								else:
-									raise
-						# TODO: Remove text channel data if now non-existent
-			except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, 
-					aiohttp.TooManyRedirects, asyncio.TimeoutError, 
-					UnicodeDecodeError) as e:
-				await self.bot.db.execute(
+				return
+			feed_info = await self.bot.loop.run_in_executor(None, functools.partial(feedparser.parse, io.BytesIO(feed_text.encode("UTF-8")), response_headers = {"Content-Location": feed}))
+			# Still necessary to run in executor?
+			ttl = None
+			if "ttl" in feed_info.feed:
+				ttl = int(feed_info.feed.ttl)
+			await self.bot.db.execute(
+				"""
+				UPDATE rss.feeds
+				SET last_checked = NOW(), 
+					ttl = $1, 
+					etag = $2, 
+					last_modified = $3
+				WHERE feed = $4
+				""", 
+				ttl, etag, last_modified, feed
+			)
+			for entry in feed_info.entries:
+				if "id" not in entry:
+					continue
+				inserted = await self.bot.db.fetchrow(
 					"""
-					INSERT INTO rss.errors (feed, type, message)
-					VALUES ($1, $2, $3)
+					INSERT INTO rss.entries (entry, feed)
+					VALUES ($1, $2)
+					ON CONFLICT DO NOTHING
+					RETURNING *
 					""", 
-					feed, type(e).__name__, str(e)
+					entry.id, feed
+				)
+				if not inserted:
+					continue
+				# Get timestamp
+				## if "published_parsed" in entry:
+				##  timestamp = datetime.datetime.fromtimestamp(time.mktime(entry.published_parsed))
+				### inaccurate
+				if "published" in entry and entry.published:
+					timestamp = dateutil.parser.parse(entry.published, tzinfos = self.tzinfos)
+				elif "updated" in entry:  # and entry.updated necessary?; check updated first?
+					timestamp = dateutil.parser.parse(entry.updated, tzinfos = self.tzinfos)
+				else:
+					timestamp = discord.Embed.Empty
+				# Get and set description, title, url + set timestamp
+				if not (description := entry.get("summary")) and "content" in entry:
+					description = entry["content"][0].get("value")
+				if description:
+					description = BeautifulSoup(description, "lxml").get_text(separator = '\n')
+					description = re.sub(r"\n\s*\n", '\n', description)
+					if len(description) > self.bot.EMBED_DESCRIPTION_CHARACTER_LIMIT:
+						space_index = description.rfind(' ', 0, self.bot.EDCL - 3)
+						# EDCL: Embed Description Character Limit
+						description = description[:space_index] + "..."
+				title = textwrap.shorten(entry.get("title"), width = self.bot.ETiCL, placeholder = "...")
+				# ETiCL: Embed Title Character Limit
+				embed = discord.Embed(title = html.unescape(title), 
+										url = entry.link, 
+										description = description, 
+										timestamp = timestamp, 
+										color = self.bot.rss_color)
+				# Get and set thumbnail url
+				thumbnail_url = (
+					(media_thumbnail := entry.get("media_thumbnail")) and media_thumbnail[0].get("url") or 
+					(
+						(media_content := entry.get("media_content")) and 
+						(media_image := discord.utils.find(lambda c: "image" in c.get("medium", ""), media_content)) and 
+						media_image.get("url")
+					) or 
+					(
+						(links := entry.get("links")) and 
+						(image_link := discord.utils.find(lambda l: "image" in l.get("type", ""), links)) and 
+						image_link.get("href")
+					 ) or 
+					(
+						(content := entry.get("content")) and (content_value := content[0].get("value")) and 
+						(content_img := getattr(BeautifulSoup(content_value, "lxml"), "img")) and 
+						content_img.get("src")
+					) or 
+					(
+						(media_content := entry.get("media_content")) and 
+						(media_content := discord.utils.find(lambda c: "url" in c, media_content)) and 
+						media_content["url"]
+					) or 
+					(
+						(description := entry.get("description")) and 
+						(description_img := getattr(BeautifulSoup(description, "lxml"), "img")) and 
+						description_img.get("src")
+					)
+				)
+				if thumbnail_url:
+					if not urllib.parse.urlparse(thumbnail_url).netloc:
+						thumbnail_url = feed_info.feed.link + thumbnail_url
+					embed.set_thumbnail(url = thumbnail_url)
+				# Get and set footer icon url
+				footer_icon_url = (
+					feed_info.feed.get("icon") or feed_info.feed.get("logo") or 
+					(feed_image := feed_info.feed.get("image")) and feed_image.get("href") or 
+					(parsed_image := BeautifulSoup(feed_text, "lxml").image) and next(iter(parsed_image.attrs.values()), None) or 
+					discord.Embed.Empty
 				)
-				# Print error?
-				await asyncio.sleep(10)
-				# TODO: Add variable for sleep time
-				# TODO: Remove persistently erroring feed or exponentially backoff?
-			except discord.DiscordServerError as e:
-				self.bot.print(f"RSS Task Discord Server Error: {e}")
-				await asyncio.sleep(60)
-			except Exception as e:
-				print("Exception in RSS Task", file = sys.stderr)
-				traceback.print_exception(type(e), e, e.__traceback__, file = sys.stderr)
-				errors_logger.error("Uncaught RSS Task exception\n", exc_info = (type(e), e, e.__traceback__))
-				print(f" (feed: {feed})")
-				await asyncio.sleep(60)
+				embed.set_footer(text = feed_info.feed.title, icon_url = footer_icon_url)
+				# Send embed(s)
+				channel_records = await self.bot.db.fetch("SELECT channel_id FROM rss.feeds WHERE feed = $1", feed)
+				for record in channel_records:
+					if text_channel := self.bot.get_channel(record["channel_id"]):
+						try:
+							await text_channel.send(embed = embed)
+						except discord.Forbidden:
+							pass
+						except discord.HTTPException as e:
+							if e.status == 400 and e.code == 50035:
+								if "In embed.url: Not a well formed URL." in e.text:
+									embed.url = discord.Embed.Empty
+								if ("In embed.thumbnail.url: Not a well formed URL." in e.text or 
+									("In embed.thumbnail.url: Scheme" in e.text and 
+										"is not supported. Scheme must be one of ('http', 'https')." in e.text)):
+									embed.set_thumbnail(url = "")
+								if ("In embed.footer.icon_url: Not a well formed URL." in e.text or 
+									("In embed.footer.icon_url: Scheme" in e.text and 
+										"is not supported. Scheme must be one of ('http', 'https')." in e.text)):
+									embed.set_footer(text = feed_info.feed.title)
+								await text_channel.send(embed = embed)
+							else:
+								raise
+					# TODO: Remove text channel data if now non-existent
+		except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, 
+				aiohttp.TooManyRedirects, asyncio.TimeoutError, 
+				UnicodeDecodeError) as e:
+			await self.bot.db.execute(
+				"""
+				INSERT INTO rss.errors (feed, type, message)
+				VALUES ($1, $2, $3)
+				""", 
+				feed, type(e).__name__, str(e)
+			)
+			# Print error?
+			self.feed_retry_times[feed] = time.monotonic() + 10
+			# TODO: Add variable for retry time
+			# TODO: Remove persistently erroring feed or exponentially backoff?
+		except discord.DiscordServerError as e:
+			self.bot.print(f"RSS Task Discord Server Error: {e}")
+			self.feed_retry_times[feed] = time.monotonic() + 60
+		except Exception as e:
+			print("Exception in RSS Task", file = sys.stderr)
+			traceback.print_exception(type(e), e, e.__traceback__, file = sys.stderr)
+			errors_logger.error("Uncaught RSS Task exception\n", exc_info = (type(e), e, e.__traceback__))
+			print(f" (feed: {feed})")
+			self.feed_retry_times[feed] = time.monotonic() + 60
 	
 	@check_feeds.before_loop
 	async def before_check_feeds(self):
@@ -18,6 +18,10 @@ class Runescape(commands.Cog):
 	
 	def __init__(self, bot):
 		self.bot = bot
+		# Item IDs and bestiary data rarely change
+		self.bot.http_cache.set_ttl("https://runescape.wiki/api.php", 86400)
+		self.bot.http_cache.set_ttl("https://services.runescape.com/m=itemdb_rs/api/catalogue/detail.json", 3600)
+		self.bot.http_cache.set_ttl("http://services.runescape.com/m=itemdb_rs/bestiary/", 86400)
 	
 	async def cog_check(self, ctx):
 		return await checks.not_forbidden().predicate(ctx)
@@ -31,8 +35,8 @@ class Runescape(commands.Cog):
 	async def ge(self, ctx, *, item):
 		'''Grand Exchange'''
 		try:
-			item_id = await get_item_id(item, aiohttp_session = ctx.bot.aiohttp_session)
-			data = await get_ge_data(item, item_id = item_id, aiohttp_session = ctx.bot.aiohttp_session)
+			item_id = await get_item_id(item, aiohttp_session = ctx.bot.http_cache)
+			data = await get_ge_data(item, item_id = item_id, aiohttp_session = ctx.bot.http_cache)
 		except UnitOutputError as e:
 			return await ctx.embed_reply(f":no_entry: Error: {e}")
 		await ctx.embed_reply(data["description"], title = data["name"], 
@@ -47,7 +51,7 @@ class Runescape(commands.Cog):
 	async def monster(self, ctx, *, monster : str):
 		'''Bestiary'''
 		try:
-			data = await get_monster_data(monster, aiohttp_session = ctx.bot.aiohttp_session)
+			data = await get_monster_data(monster, aiohttp_session = ctx.bot.http_cache)
 		except UnitOutputError as e:
 			return await ctx.embed_reply(f":no_entry: Error: {e}")
 		await ctx.embed_reply(data["description"], title = data["name"], 
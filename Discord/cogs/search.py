@@ -2,9 +2,17 @@
 import discord
 from discord.ext import commands
 
+import asyncio
+import collections
 import functools
 import inspect
 import re
+import time
+from xml.parsers.expat import ExpatError
+
+import aiohttp
+import wolframalpha
+import xmltodict
 import youtube_dl
 
 from utilities import checks
@@ -16,6 +24,9 @@ class Search(commands.Cog):
 	
 	def __init__(self, bot):
 		self.bot = bot
+		self.wolframalpha_cache_size = 100
+		self.wolframalpha_cache_ttl = 3600  # seconds
+		self.wolframalpha_results = collections.OrderedDict()  # {(input, location): (retrieved time, result)}
 		# Add commands as search subcommands
 		for name, command in inspect.getmembers(self):
 			if isinstance(command, commands.Command) and command.parent is None and name != "search":
@@ -274,11 +285,11 @@ class Search(commands.Cog):
 		await self.process_wolframalpha(ctx, search, location = location)
 	
 	async def process_wolframalpha(self, ctx, search, location = None):
-		# TODO: process asynchronously
 		if not location:
 			location = ctx.bot.fake_location
+		search = search.strip('`')
 		try:
-			result = ctx.bot.wolfram_alpha_client.query(search.strip('`'), ip = ctx.bot.fake_ip, location = location)
+			result = await self.get_wolframalpha_result(search, location)
 		except Exception as e:
 			if str(e).startswith("Error "):
 				return await ctx.embed_reply(f":no_entry: {e}")
@@ -290,8 +301,9 @@ class Search(commands.Cog):
 			else:
 				didyoumean = result.didyoumeans["didyoumean"][0]["#text"]
 			await ctx.embed_reply(f"Using closest Wolfram|Alpha interpretation: `{didyoumean}`")
+			search = didyoumean
 			try:
-				result = ctx.bot.wolfram_alpha_client.query(didyoumean, ip = ctx.bot.fake_ip, location = location)
+				result = await self.get_wolframalpha_result(search, location)
 			except Exception as e:
 				if str(e).startswith("Error "):
 					return await ctx.embed_reply(f":no_entry: {e}")
@@ -301,8 +313,10 @@ class Search(commands.Cog):
 				return await ctx.embed_reply("Standard computation time exceeded")
 			else:
 				return await ctx.embed_reply(":no_entry: No results found")
-		if ctx.me.permissions_in(ctx.channel).embed_links:
-			for pod_number, pod in enumerate(result.pods):
+		# Send pods as they're computed
+		pod_number = 0
+		async for pod in self.iterate_wolframalpha_pods(result, search, location):
+			if ctx.me.permissions_in(ctx.channel).embed_links:
 				for subpod_number, subpod in enumerate(pod.subpods):
 					if subpod_number:
 						await ctx.embed_send(image_url = next(subpod.img).src)
@@ -310,18 +324,65 @@ class Search(commands.Cog):
 						await ctx.embed_send(title = pod.title, image_url = next(subpod.img).src)
 					else:
 						await ctx.embed_reply(title = pod.title, image_url = next(subpod.img).src, footer_text = discord.Embed.Empty)
-		else:
-			text_output = ""
-			for pod in result.pods:
-				text_output += f"**{pod.title}**\n"
+			else:
+				text_output = f"**{pod.title}**\n"
 				for subpod in pod.subpods:
 					if subpod.plaintext:
 						text_output += ctx.bot.CODE_BLOCK.format(subpod.plaintext)
-			await ctx.reply(text_output)
+				if pod_number:
+					await ctx.send(text_output)
+				else:
+					await ctx.reply(text_output)
+			pod_number += 1
 		# TODO: single embed with plaintext version?
 		if result.timedout:
 			await ctx.embed_reply(f"Some results timed out: {result.timedout.replace(',', ', ')}")
 	
+	async def get_wolframalpha_result(self, search, location):
+		'''
+		Wolfram|Alpha result for search, from cache if available
+		Pods still being computed are retrieved by iterate_wolframalpha_pods
+		'''
+		key = (' '.join(search.split()), location)
+		if cached := self.wolframalpha_results.get(key):
+			if time.monotonic() - cached[0] < self.wolframalpha_cache_ttl:
+				self.wolframalpha_results.move_to_end(key)
+				return cached[1]
+			del self.wolframalpha_results[key]
+		url = "https://api.wolframalpha.com/v2/query"
+		params = {"input": search, "appid": self.bot.WOLFRAM_ALPHA_APP_ID, 
+					"ip": self.bot.fake_ip, "location": location, "async": "true"}
+		async with self.bot.aiohttp_session.get(url, params = params) as resp:
+			return wolframalpha.Result(await resp.read())
+	
+	async def iterate_wolframalpha_pods(self, result, search, location):
+		'''Yields pods of a Wolfram|Alpha result, yielding pods still being computed as they're retrieved'''
+		pods = list(result.pods)
+		for pod in pods:
+			if "@async" not in pod:
+				yield pod
+		retrievals = [self.retrieve_wolframalpha_pod(index, pod["@async"]) 
+						for index, pod in enumerate(pods) if "@async" in pod]
+		for retrieval in asyncio.as_completed(retrievals):
+			index, pod = await retrieval
+			pods[index] = pod
+			if pod:
+				yield pod
+		key = (' '.join(search.split()), location)
+		if key not in self.wolframalpha_results and all(pods):
+			result["pod"] = pods
+			self.wolframalpha_results[key] = (time.monotonic(), result)
+			while len(self.wolframalpha_results) > self.wolframalpha_cache_size:
+				self.wolframalpha_results.popitem(last = False)
+	
+	async def retrieve_wolframalpha_pod(self, index, url):
+		try:
+			async with self.bot.aiohttp_session.get(url, timeout = aiohttp.ClientTimeout(total = 30)) as resp:
+				data = await resp.read()
+			return index, wolframalpha.Pod(xmltodict.parse(data, dict_constructor = dict)["pod"])
+		except (aiohttp.ClientError, asyncio.TimeoutError, ExpatError, KeyError):
+			return index, None
+	
 	@commands.command()
 	async def yahoo(self, ctx, *search: str):
 		'''Search with Yahoo'''
@@ -18,6 +18,8 @@ import seaborn
 from utilities import checks
 from utilities.paginator import Paginator
 
+DEFERRABLE = True
+
 def setup(bot):
 	bot.add_cog(Tools(bot))
 
@@ -2,7 +2,10 @@
 import discord
 from discord.ext import commands, menus
 
-import urllib.error
+import asyncio
+import collections
+import sys
+import time
 
 from bs4 import BeautifulSoup
 import spellchecker
@@ -10,17 +13,31 @@ import spellchecker
 from utilities import checks
 from utilities.menu import Menu
 
+sys.path.insert(0, "..")
+from units.words import (get_audio, get_definitions, get_pronunciations, get_related_words, 
+							load_cache as load_wordnik_cache, save_cache as save_wordnik_cache, UnitOutputError)
+sys.path.pop(0)
+
 def setup(bot):
-	bot.add_cog(Words())
+	bot.add_cog(Words(bot))
 
 class Words(commands.Cog):
 	
-	def __init__(self):
+	def __init__(self, bot):
+		self.bot = bot
 		self.menus = []
+		load_wordnik_cache(self.bot.data_path + "/wordnik_cache.json")
+		
+		self.spell_checkers = {}  # {language: future of spellchecker.SpellChecker}
+		self.spelling_cache_size = 10000
+		# {(language, word): candidates, most likely first}, least recently used first
+		self.spelling_cache = collections.OrderedDict()
+		self.spell_checkers["en"] = self.bot.loop.run_in_executor(None, spellchecker.SpellChecker, "en")
 	
 	def cog_unload(self):
 		for menu in self.menus:
 			menu.stop()
+		save_wordnik_cache()
 	
 	async def cog_check(self, ctx):
 		return await checks.not_forbidden().predicate(ctx)
@@ -29,44 +46,38 @@ class Words(commands.Cog):
 	async def antonym(self, ctx, word : str):
 		'''Antonyms of a word'''
 		try:
-			antonyms = ctx.bot.wordnik_word_api.getRelatedWords(word, relationshipTypes = "antonym", 
-																useCanonical = "true", limitPerRelationshipType = 100)
-		except urllib.error.HTTPError as e:
-			if e.code == 404:
-				return await ctx.embed_reply(":no_entry: Word or antonyms not found")
-			raise
+			antonyms = await get_related_words(word, "antonym", aiohttp_session = ctx.bot.aiohttp_session)
+		except UnitOutputError as e:
+			return await ctx.embed_reply(f"{ctx.bot.error_emoji} {e}")
 		if not antonyms:
 			return await ctx.embed_reply(":no_entry: Word or antonyms not found")
-		await ctx.embed_reply(", ".join(antonyms[0].words), title = f"Antonyms of {word.capitalize()}")
+		await ctx.embed_reply(", ".join(antonyms), title = f"Antonyms of {word.capitalize()}")
 	
 	@commands.group(aliases = ["definition", "definitions", "dictionary"], invoke_without_command = True, case_insensitive = True)
 	async def define(self, ctx, word: str):
 		'''Define a word'''
 		try:
-			definitions = ctx.bot.wordnik_word_api.getDefinitions(word)  # useCanonical = True ?
-		except urllib.error.HTTPError as e:
-			if e.code in (404, 429):
-				return await ctx.embed_reply(f"{ctx.bot.error_emoji} Error: {e.reason}")
-			raise
-		for definition in definitions:
-			if definition.text:
-				return await ctx.embed_reply(BeautifulSoup(definition.text, "html.parser").get_text(), 
-												title = definition.word, 
-												footer_text = definition.attributionText)
-		await ctx.embed_reply(":no_entry: Definition not found")
+			definitions = await get_definitions(word, aiohttp_session = ctx.bot.aiohttp_session)
+			# useCanonical = True ?
+		except UnitOutputError as e:
+			return await ctx.embed_reply(f"{ctx.bot.error_emoji} {e}")
+		if not definitions:
+			return await ctx.embed_reply(":no_entry: Definition not found")
+		definition = definitions[0]
+		await ctx.embed_reply(BeautifulSoup(definition["text"], "html.parser").get_text(), 
+								title = definition["word"], 
+								footer_text = definition.get("attributionText"))
 	
 	@define.command(name = "menu", aliases = ['m', "menus", 'r', "reaction", "reactions"])
 	async def define_menu(self, ctx, word : str):
 		'''Definitions menu'''
 		try:
-			definitions = ctx.bot.wordnik_word_api.getDefinitions(word)  # useCanonical = True ?
-		except urllib.error.HTTPError as e:
-			if e.code == 404:
-				return await ctx.embed_reply(":no_entry: Error: Not found")
-			raise
-		definitions = [definition for definition in definitions if definition.text]
+			definitions = await get_definitions(word, aiohttp_session = ctx.bot.aiohttp_session)
+			# useCanonical = True ?
+		except UnitOutputError as e:
+			return await ctx.embed_reply(f"{ctx.bot.error_emoji} {e}")
 		if not definitions:
-			await ctx.embed_reply(":no_entry: Definition not found")
+			return await ctx.embed_reply(":no_entry: Definition not found")
 		menu = DefineMenu(definitions)
 		self.menus.append(menu)
 		await menu.start(ctx, wait = True)
@@ -75,11 +86,16 @@ class Words(commands.Cog):
 	@commands.command(aliases = ["audiodefine", "pronounce"])
 	async def pronunciation(self, ctx, word : str):
 		'''Pronunciation of a word'''
-		pronunciation = ctx.bot.wordnik_word_api.getTextPronunciations(word, limit = 1)
-		description = pronunciation[0].raw.strip("()") if pronunciation else "Audio File Link"
-		audio_file = ctx.bot.wordnik_word_api.getAudio(word, limit = 1)
+		try:
+			pronunciation, audio_file = await asyncio.gather(
+				get_pronunciations(word, aiohttp_session = ctx.bot.aiohttp_session), 
+				get_audio(word, aiohttp_session = ctx.bot.aiohttp_session)
+			)
+		except UnitOutputError as e:
+			return await ctx.embed_reply(f"{ctx.bot.error_emoji} {e}")
+		description = pronunciation[0]["raw"].strip("()") if pronunciation else "Audio File Link"
 		if audio_file:
-			description = f"[{description}]({audio_file[0].fileUrl})"
+			description = f"[{description}]({audio_file[0]['fileUrl']})"
 		elif not pronunciation:
 			return await ctx.embed_reply(":no_entry: Word or pronunciation not found")
 		await ctx.embed_reply(description, title = f"Pronunciation of {word.capitalize()}")
@@ -88,39 +104,106 @@ class Words(commands.Cog):
 	async def rhyme(self, ctx, word : str):
 		'''Rhymes of a word'''
 		try:
-			rhymes = ctx.bot.wordnik_word_api.getRelatedWords(word, relationshipTypes = "rhyme", 
-																limitPerRelationshipType = 100)
-		except urllib.error.HTTPError as e:
-			if e.code == 404:
-				return await ctx.embed_reply(":no_entry: Word or rhymes not found")
-			raise
+			rhymes = await get_related_words(word, "rhyme", use_canonical = False, 
+												aiohttp_session = ctx.bot.aiohttp_session)
+		except UnitOutputError as e:
+			return await ctx.embed_reply(f"{ctx.bot.error_emoji} {e}")
 		if not rhymes:
 			return await ctx.embed_reply(":no_entry: Word or rhymes not found")
-		await ctx.embed_reply(", ".join(rhymes[0].words), 
+		await ctx.embed_reply(", ".join(rhymes), 
 								title = f"Words that rhyme with {word.capitalize()}")
 	
 	@commands.command()
 	async def spellcheck(self, ctx, *words: str):
 		'''Check the spelling of words'''
-		checker = spellchecker.SpellChecker()
+		await self.process_spellcheck(ctx, words)
+	
+	@commands.command(name = "spellcheck_benchmark", aliases = ["spellcheckbenchmark"], hidden = True)
+	@commands.is_owner()
+	async def spellcheck_benchmark(self, ctx):
+		'''Spelling correction throughput with a new, loaded, and cached spell checker'''
+		words = ("speling", "korrect", "recieve", "definately", "seperate", 
+					"occured", "acheive", "wierd", "untill", "goverment")
+		def benchmark():
+			start = time.perf_counter()
+			checker = spellchecker.SpellChecker()
+			get_spelling_candidates(checker, words)
+			cold = time.perf_counter() - start
+			start = time.perf_counter()
+			get_spelling_candidates(checker, words)
+			return cold, time.perf_counter() - start
+		cold, warm = await self.bot.loop.run_in_executor(None, benchmark)
+		await self.correct_spelling(words)
+		start = time.perf_counter()
+		await self.correct_spelling(words)
+		cached = time.perf_counter() - start
+		await ctx.embed_reply(fields = tuple((name, f"{len(words) / duration:,.1f} words/s\n{duration * 1000:,.2f} ms") 
+												for name, duration in (("Cold", cold), ("Warm", warm), ("Cached", cached))))
+	
+	@commands.command(name = "spellcheck_language", aliases = ["spellchecklanguage", "spellcheck_lang"])
+	async def spellcheck_language(self, ctx, language : str, *words : str):
+		'''
+		Check the spelling of words in another language
+		Languages: de, en, es, fr, pt
+		'''
+		await self.process_spellcheck(ctx, words, language.lower())
+	
+	async def process_spellcheck(self, ctx, words, language = "en"):
+		if not words:
+			return await ctx.embed_reply(f"{ctx.bot.error_emoji} Error: No words to check")
+		try:
+			candidates = await self.correct_spelling(words, language)
+		except ValueError:
+			return await ctx.embed_reply(f"{ctx.bot.error_emoji} Error: Language not supported")
 		if len(words) == 1:
-			await ctx.embed_reply(", ".join(checker.candidates(words[0])))
+			await ctx.embed_reply(", ".join(candidates[0]))
 		else:
-			await ctx.embed_reply(' '.join(checker.correction(word) for word in words))
+			await ctx.embed_reply(' '.join(word_candidates[0] for word_candidates in candidates))
+	
+	async def get_spell_checker(self, language = "en"):
+		'''Loaded once per language in an executor, as loading decompresses a large word frequency dictionary'''
+		if not language.isalpha():
+			raise ValueError("Invalid language")
+		if language not in self.spell_checkers:
+			self.spell_checkers[language] = self.bot.loop.run_in_executor(None, spellchecker.SpellChecker, language)
+		try:
+			return await asyncio.shield(self.spell_checkers[language])
+		except ValueError:  # Unsupported language
+			self.spell_checkers.pop(language, None)
+			raise
+	
+	async def correct_spelling(self, words, language = "en"):
+		'''Returns candidates for each word, most likely first, in the word's case'''
+		checker = await self.get_spell_checker(language)
+		candidates = {}
+		uncached = []
+		for word in set(word.lower() for word in words):
+			if (language, word) in self.spelling_cache:
+				self.spelling_cache.move_to_end((language, word))
+				candidates[word] = self.spelling_cache[(language, word)]
+			else:
+				uncached.append(word)
+		corrections = {}
+		if uncached:
+			# Correction can take milliseconds per word, so not in the event loop
+			corrections = await self.bot.loop.run_in_executor(None, get_spelling_candidates, checker, uncached)
+		for word, word_candidates in corrections.items():
+			self.spelling_cache[(language, word)] = word_candidates
+			if len(self.spelling_cache) > self.spelling_cache_size:
+				self.spelling_cache.popitem(last = False)
+		candidates.update(corrections)
+		return [[match_case(candidate, word) for candidate in candidates[word.lower()]] for word in words]
 	
 	@commands.command(aliases = ["synonyms"])
 	async def synonym(self, ctx, word : str):
 		'''Synonyms of a word'''
 		try:
-			synonyms = ctx.bot.wordnik_word_api.getRelatedWords(word, relationshipTypes = "synonym", 
-																useCanonical = "true", limitPerRelationshipType = 100)
-		except urllib.error.HTTPError as e:
-			if e.code == 404:
-				return await ctx.embed_reply(":no_entry: Word or synonyms not found")
-			raise
+			synonyms = await get_related_words(word, "synonym", aiohttp_session = ctx.bot.aiohttp_session)
+		except UnitOutputError as e:
+			return await ctx.embed_reply(f"{ctx.bot.error_emoji} {e}")
 		if not synonyms:
 			return await ctx.embed_reply(":no_entry: Word or synonyms not found")
-		await ctx.embed_reply(", ".join(synonyms[0].words), title = f"Synonyms of {word.capitalize()}")
+		await ctx.embed_reply(", ".join(synonyms), title = f"Synonyms of {word.capitalize()}")
 	
 	@commands.group(description = "[Language Codes](https://tech.yandex.com/translate/doc/dg/concepts/api-overview-docpage/#languages)\n"
 									"Powered by [Yandex.Translate](http://translate.yandex.com/)", 
@@ -208,17 +291,29 @@ class Words(commands.Cog):
 		await menu.start(ctx, wait = True)
 		self.menus.remove(menu)
 
+def get_spelling_candidates(checker, words):
+	'''{word: candidates, most likely first}'''
+	return {word: sorted(checker.candidates(word), key = checker.word_probability, reverse = True) for word in words}
+
+def match_case(candidate, word):
+	'''Candidate in the case of the word, e.g. UPPER or Capitalized'''
+	if len(word) > 1 and word.isupper():
+		return candidate.upper()
+	if word[:1].isupper():
+		return candidate[:1].upper() + candidate[1:]
+	return candidate
+
 class DefineSource(menus.ListPageSource):
 	
 	def __init__(self, definitions):
 		super().__init__(definitions, per_page = 1)
 	
 	async def format_page(self, menu, definition):
-		embed = discord.Embed(title = definition.word, 
-								description = BeautifulSoup(definition.text, "html.parser").get_text(), 
+		embed = discord.Embed(title = definition["word"], 
+								description = BeautifulSoup(definition["text"], "html.parser").get_text(), 
 								color = menu.bot.bot_color)
 		embed.set_author(name = menu.ctx.author.display_name, icon_url = menu.ctx.author.avatar_url)
-		embed.set_footer(text = f"{definition.attributionText} (Definition {menu.current_page + 1} of {self.get_max_pages()})")
+		embed.set_footer(text = f"{definition.get('attributionText', '')} (Definition {menu.current_page + 1} of {self.get_max_pages()})")
 		return {"content": f"In response to: `{menu.ctx.message.clean_content}`", "embed": embed}
 
 class DefineMenu(Menu, menus.MenuPages):
@@ -0,0 +1,323 @@
+
+import asyncio
+import collections
+import concurrent.futures
+import contextlib
+import functools
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import time
+import urllib.parse
+
+from utilities import errors
+
+class AudioCache:
+	
+	'''
+	Cache of downloaded audio files, keyed by extractor and video ID
+	Files are reference counted across guilds while being played
+	Least recently used files not in use are deleted when the total size exceeds max_size bytes
+	'''
+	
+	def __init__(self, bot, directory, *, max_size = 2 ** 32):
+		self.bot = bot
+		self.directory = directory
+		self.max_size = max_size
+		
+		self.files = collections.OrderedDict()  # {key: (filename, size)}, least recently used first
+		self.size = 0
+		self.references = collections.Counter()  # {key: sources playing the file}
+		self.downloads = {}  # {key: task}
+		self.hits = 0
+		self.misses = 0
+		self.bytes_saved = 0
+	
+	def load(self):
+		'''Index files downloaded before a restart, least recently accessed first'''
+		if not os.path.isdir(self.directory):
+			return
+		entries = [entry for entry in os.scandir(self.directory) 
+					if entry.is_file() and not entry.name.endswith((".part", ".ytdl"))]
+		for entry in sorted(entries, key = lambda entry: entry.stat().st_atime):
+			# Named {extractor key}-{video ID}.{extension}
+			extractor_key, _, video_id = entry.name.rpartition('.')[0].partition('-')
+			self.files[(extractor_key, video_id)] = (entry.path, entry.stat().st_size)
+			self.size += entry.stat().st_size
+		self.evict()
+	
+	@property
+	def hit_rate(self):
+		return self.hits / (self.hits + self.misses) if self.hits + self.misses else 0
+	
+	def get_key(self, info):
+		# IDs are only unique per extractor
+		return (info["extractor_key"], info["id"])
+	
+	async def acquire(self, info):
+		'''Returns the filename of the downloaded audio, which must be released after use'''
+		key = self.get_key(info)
+		self.references[key] += 1
+		try:
+			filename = await self.get(info)
+		except BaseException:
+			self.release(info)
+			raise
+		if key in self.files:
+			self.files.move_to_end(key)
+		return filename
+	
+	def release(self, info):
+		key = self.get_key(info)
+		self.references[key] -= 1
+		if self.references[key] <= 0:
+			del self.references[key]
+			self.evict()
+	
+	def prefetch(self, info):
+		'''Download in the background, if not already cached or downloading'''
+		key = self.get_key(info)
+		if key not in self.files and key not in self.downloads:
+			self.downloads[key] = self.bot.loop.create_task(self.download(info), name = "Audio prefetch")
+			self.downloads[key].add_done_callback(self.log_prefetch_error)
+	
+	def log_prefetch_error(self, task):
+		# Otherwise only logged if the download is awaited
+		if not task.cancelled() and (e := task.exception()):
+			logging.getLogger("errors").error("Failed to prefetch audio\n", 
+												exc_info = (type(e), e, e.__traceback__))
+	
+	async def get(self, info):
+		key = self.get_key(info)
+		if key in self.files:
+			filename, size = self.files[key]
+			if os.path.isfile(filename):
+				self.hits += 1
+				self.bytes_saved += size
+				return filename
+			del self.files[key]
+			self.size -= size
+		if key in self.downloads:
+			# Prefetched or being downloaded for another guild
+			filename = await asyncio.shield(self.downloads[key])
+			self.hits += 1
+			self.bytes_saved += self.files.get(key, (None, 0))[1]
+			return filename
+		self.misses += 1
+		self.downloads[key] = self.bot.loop.create_task(self.download(info), name = "Audio download")
+		return await asyncio.shield(self.downloads[key])
+	
+	async def download(self, info):
+		key = self.get_key(info)
+		try:
+			func = functools.partial(self.bot.ytdl_download.extract_info, info["webpage_url"], download = True)
+			info = await self.bot.loop.run_in_executor(None, func)
+			filename = self.bot.ytdl_download.prepare_filename(info)
+			size = os.path.getsize(filename)
+			self.files[key] = (filename, size)
+			self.size += size
+			self.evict()
+			return filename
+		finally:
+			self.downloads.pop(key, None)
+	
+	def evict(self):
+		for key, (filename, size) in list(self.files.items()):
+			if self.size <= self.max_size:
+				break
+			if self.references[key]:
+				continue
+			try:
+				os.remove(filename)
+			except FileNotFoundError:
+				pass
+			except OSError:  # Still open, e.g. on Windows
+				continue
+			del self.files[key]
+			self.size -= size
+
+
+class YTDLInfoCache:
+	
+	'''
+	Cache of youtube-dl extracted info, keyed by normalized URL or YouTube video ID
+	Concurrent extractions of the same URL are coalesced
+	Extractions run in a bounded executor, so they can't starve the default one
+	'''
+	
+	def __init__(self, bot, *, max_size = 1000, ttl = 6 * 60 * 60, max_workers = 4):
+		self.bot = bot
+		self.max_size = max_size  # entries
+		self.ttl = ttl  # seconds, if the stream URL doesn't specify its expiry
+		self.executor = concurrent.futures.ThreadPoolExecutor(max_workers = max_workers, 
+																thread_name_prefix = "youtube-dl")
+		
+		self.info = collections.OrderedDict()  # {key: (expiry timestamp, info)}, least recently used first
+		self.extractions = {}  # {key: task}
+		self.hits = 0
+		self.misses = 0
+	
+	async def get(self, url):
+		key = normalize_url(url)
+		if cached := self.info.get(key):
+			if cached[0] > time.time():
+				self.hits += 1
+				self.info.move_to_end(key)
+				return cached[1]
+			del self.info[key]
+		self.misses += 1
+		if key not in self.extractions:
+			self.extractions[key] = self.bot.loop.create_task(self.extract(key, url), name = "youtube-dl extraction")
+		return await asyncio.shield(self.extractions[key])
+	
+	async def extract(self, key, url):
+		try:
+			func = functools.partial(self.bot.ytdl_info.extract_info, url, download = False)
+			info = await self.run(func)
+			self.store(key, info)
+			return info
+		finally:
+			self.extractions.pop(key, None)
+	
+	async def run(self, func):
+		return await self.bot.loop.run_in_executor(self.executor, func)
+	
+	def store(self, key, info):
+		video_info = next(iter(info.get("entries", [])), info)
+		if not video_info or video_info.get("is_live"):
+			return
+		expiry = time.time() + self.ttl
+		# Stream URLs, e.g. from YouTube, have an expire query parameter
+		stream_url_query = urllib.parse.parse_qs(urllib.parse.urlparse(video_info.get("url", "")).query)
+		if (expire := stream_url_query.get("expire", [""])[0]).isdigit():
+			expiry = min(expiry, int(expire) - 5 * 60)
+		self.info[key] = (expiry, info)
+		self.info.move_to_end(key)
+		# Bare video IDs are only YouTube's, as for normalized URLs and as youtube-dl resolves them
+		if (video_info.get("extractor_key") == "Youtube" and video_info.get("id", key) != key and 
+			"start_time" not in video_info):
+			self.info[video_info["id"]] = (expiry, video_info)
+			self.info.move_to_end(video_info["id"])
+		while len(self.info) > self.max_size:
+			self.info.popitem(last = False)
+	
+	def close(self):
+		self.executor.shutdown(wait = False)
+
+
+class TTSCache:
+	
+	'''
+	Cache of Text-To-Speech audio files, named by a hash of the message and voice options
+	Synthesis runs in at most max_processes concurrent espeak-ng processes
+	Least recently used files are deleted when the total size exceeds max_size bytes
+	'''
+	
+	def __init__(self, bot, directory, *, max_size = 2 ** 28, max_processes = 2):
+		self.bot = bot
+		self.directory = directory
+		self.max_size = max_size
+		self.semaphore = asyncio.Semaphore(max_processes)
+		
+		self.files = collections.OrderedDict()  # {key: size}, least recently used first
+		self.size = 0
+		self.syntheses = {}  # {key: task}
+		self.hits = 0
+		self.misses = 0
+	
+	def load(self):
+		entries = []
+		for entry in os.scandir(self.directory):
+			if entry.name.endswith(".wav"):
+				entries.append(entry)
+			elif entry.name.endswith(".tmp"):
+				# Left by synthesis interrupted by a restart
+				with contextlib.suppress(OSError):
+					os.remove(entry.path)
+		for entry in sorted(entries, key = lambda entry: entry.stat().st_atime):
+			self.files[entry.name[:-4]] = entry.stat().st_size
+			self.size += entry.stat().st_size
+		self.evict()
+	
+	def get_key(self, message, **options):
+		return hashlib.sha256(json.dumps((message, options), sort_keys = True).encode()).hexdigest()
+	
+	def get_filename(self, key):
+		return f"{self.directory}/{key}.wav"
+	
+	async def get(self, message, **options):
+		'''Returns the filename of the synthesized message'''
+		key = self.get_key(message, **options)
+		if key in self.files and os.path.isfile(self.get_filename(key)):
+			self.hits += 1
+			self.files.move_to_end(key)
+			return self.get_filename(key)
+		self.misses += 1
+		if key not in self.syntheses:
+			self.syntheses[key] = self.bot.loop.create_task(self.synthesize(key, message, **options), 
+															name = "Text-To-Speech synthesis")
+		return await asyncio.shield(self.syntheses[key])
+	
+	async def synthesize(self, key, message, *, amplitude, pitch, speed, word_gap, voice):
+		# Written to a unique temporary file, then moved, so a partial file is never played
+		temporary_filename = f"{self.directory}/{key}.{id(asyncio.current_task())}.tmp"
+		try:
+			async with self.semaphore:
+				func = functools.partial(subprocess.run, ["bin/eSpeak NG/espeak-ng", "--path=bin/eSpeak NG", 
+															f"-a {amplitude}", f"-p {pitch}", 
+															f"-s {speed}", f"-g {word_gap}", f"-v{voice}", 
+															f"-w {temporary_filename}", message], 
+															capture_output = True, check = True, 
+															creationflags = subprocess.CREATE_NO_WINDOW)
+				try:
+					await self.bot.loop.run_in_executor(None, func)
+				except subprocess.CalledProcessError as e:
+					error = e.stderr.decode("UTF-8", "replace").strip() or f"Exit code {e.returncode}"
+					raise errors.AudioError(f"Text-To-Speech synthesis failed: {error}")
+				except OSError as e:
+					raise errors.AudioError(f"Text-To-Speech synthesis failed: {e}")
+			if not os.path.isfile(temporary_filename):
+				raise errors.AudioError("Text-To-Speech synthesis failed: No audio output")
+			os.replace(temporary_filename, self.get_filename(key))
+			if key in self.files:
+				self.size -= self.files[key]
+			self.files[key] = os.path.getsize(self.get_filename(key))
+			self.size += self.files[key]
+			self.evict()
+			return self.get_filename(key)
+		finally:
+			self.syntheses.pop(key, None)
+			with contextlib.suppress(FileNotFoundError):
+				os.remove(temporary_filename)
+	
+	def evict(self):
+		for key, size in list(self.files.items())[:-1]:  # Not the most recent
+			if self.size <= self.max_size:
+				break
+			try:
+				os.remove(self.get_filename(key))
+			except FileNotFoundError:
+				pass
+			except OSError:  # Being played, e.g. on Windows
+				continue
+			del self.files[key]
+			self.size -= size
+
+
+def normalize_url(url):
+	'''Video ID for YouTube video URLs without a start time, otherwise the stripped URL'''
+	url = url.strip()
+	parsed = urllib.parse.urlparse(url)
+	host = parsed.netloc.lower()
+	if host.startswith(("www.", "m.")):
+		host = host.partition('.')[2]
+	query = urllib.parse.parse_qs(parsed.query)
+	if "t" in query or "start" in query:
+		return url
+	if host == "youtube.com" and parsed.path == "/watch" and "v" in query:
+		return query["v"][0]
+	if host == "youtu.be" and parsed.path.strip('/'):
+		return parsed.path.strip('/')
+	return url
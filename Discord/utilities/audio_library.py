@@ -0,0 +1,125 @@
+
+import asyncio
+import os
+import re
+
+try:
+	import mutagen
+except ImportError:
+	mutagen = None
+
+class LibraryFile:
+	
+	def __init__(self, name, signature, duration = None, tags = None):
+		self.name = name
+		self.signature = signature  # (mtime, size)
+		self.duration = duration  # seconds
+		self.tags = tags or {}  # {"title"/"artist"/"album": value}
+		self.text = '\n'.join((name, *self.tags.values())).lower()  # searched
+		self.tokens = set(re.findall(r"\w+", self.text))
+
+
+class AudioLibrary:
+	
+	'''
+	Index of audio files in a directory, shared by all audio players
+	Kept up to date by refresh, which rereads only files with a changed mtime or size
+	Searched with a trigram index of filenames and tags
+	'''
+	
+	def __init__(self, directory, extensions = None):
+		self.directory = directory
+		self.extensions = extensions  # tuple of file extensions to include, or None for all
+		
+		self.files = {}  # {filename: LibraryFile}
+		self.filenames = []  # sorted
+		self.trigrams = {}  # {trigram: set of filenames}
+	
+	def __contains__(self, filename):
+		return filename in self.files
+	
+	def __len__(self):
+		return len(self.files)
+	
+	async def refresh(self):
+		loop = asyncio.get_running_loop()
+		signatures = await loop.run_in_executor(None, self.list_directory)
+		for filename in self.files.keys() - signatures.keys():
+			self.remove(filename)
+		changed = [filename for filename, signature in signatures.items() 
+					if filename not in self.files or self.files[filename].signature != signature]
+		if changed:
+			library_files = await loop.run_in_executor(None, self.read_files, changed, signatures)
+			for library_file in library_files:
+				self.add(library_file)
+		self.filenames = sorted(self.files)
+	
+	def list_directory(self):
+		'''Returns {filename: (mtime, size)}'''
+		signatures = {}
+		try:
+			with os.scandir(self.directory) as entries:
+				for entry in entries:
+					if self.extensions and not entry.name.endswith(self.extensions):
+						continue
+					try:
+						if entry.is_file():
+							stat = entry.stat()
+							signatures[entry.name] = (stat.st_mtime_ns, stat.st_size)
+					except FileNotFoundError:
+						# Deleted during scan
+						pass
+		except FileNotFoundError:
+			pass
+		return signatures
+	
+	def read_files(self, filenames, signatures):
+		library_files = []
+		for filename in filenames:
+			duration, tags = read_metadata(os.path.join(self.directory, filename))
+			library_files.append(LibraryFile(filename, signatures[filename], duration, tags))
+		return library_files
+	
+	def add(self, library_file):
+		if library_file.name in self.files:
+			self.remove(library_file.name)
+		self.files[library_file.name] = library_file
+		for trigram in get_trigrams(library_file.text):
+			self.trigrams.setdefault(trigram, set()).add(library_file.name)
+	
+	def remove(self, filename):
+		library_file = self.files.pop(filename)
+		for trigram in get_trigrams(library_file.text):
+			self.trigrams[trigram].discard(filename)
+			if not self.trigrams[trigram]:
+				del self.trigrams[trigram]
+	
+	def search(self, query):
+		'''Filenames with filename or tags containing query, those matching whole words first'''
+		query = query.lower()
+		if len(query) < 3:
+			candidates = self.files.keys()
+		else:
+			candidates = set.intersection(*(self.trigrams.get(trigram, set()) for trigram in get_trigrams(query)))
+		results = [filename for filename in candidates if query in self.files[filename].text]
+		query_tokens = set(re.findall(r"\w+", query))
+		return sorted(results, key = lambda filename: (not query_tokens <= self.files[filename].tokens, filename))
+
+
+def get_trigrams(text):
+	return {text[index:index + 3] for index in range(len(text) - 2)}
+
+def read_metadata(path):
+	'''Returns duration and tags, if mutagen is installed and can read the file'''
+	if not mutagen:
+		return None, {}
+	try:
+		audio = mutagen.File(path, easy = True)
+	except (mutagen.MutagenError, OSError):
+		return None, {}
+	if not audio:
+		return None, {}
+	tags = {name: ", ".join(audio.tags[name]) for name in ("title", "artist", "album") 
+			if audio.tags and name in audio.tags}
+	return getattr(audio.info, "length", None), tags
+
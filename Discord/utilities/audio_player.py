@@ -7,6 +7,7 @@ import json
 import os
 import random
 import subprocess
+import time
 import traceback
 
 import speech_recognition
@@ -26,12 +27,14 @@ class AudioPlayer:
 		# TODO: server specific default volume
 		self.skip_votes_required = 0
 		self.skip_votes = set()
+		self.prefetch_count = 2  # queued songs to download ahead of time
+		self.playlist_loaders = set()
+		self.playlist_concurrency = 4  # entries resolved at a time, per playlist
+		self.playlist_progress_interval = 5  # seconds
 		self.player = self.bot.loop.create_task(self.player_task(), name = "Audio Player")
 		self.resume_flag = asyncio.Event()
 		self.not_interrupted = asyncio.Event()
 		self.not_interrupted.set()
-		self.audio_files = os.listdir(self.bot.data_path + "/audio_files/")
-		self.library_files = [f for f in os.listdir(self.bot.library_path) if f.endswith((".mp3", ".m4a"))]
 		self.library_flag = False
 		self.radio_flag = False
 		self.recognizer = speech_recognition.Recognizer()
@@ -51,6 +54,7 @@ class AudioPlayer:
 			if self.guild.voice_client.is_playing():
 				self.guild.voice_client.stop()
 			self.player.cancel()
+			self.cancel_playlist_loading()
 			await self.guild.voice_client.disconnect()
 			return True
 	
@@ -59,6 +63,7 @@ class AudioPlayer:
 		await source.get_info()
 		if source.info["webpage_url"] != "ytsearch:" + song:
 			await self.queue.put(source)
+			self.prefetch()
 		return source
 	
 	async def insert_song(self, ctx, song, position):
@@ -67,6 +72,7 @@ class AudioPlayer:
 		self.queue._queue.insert(position - 1, source)
 		await self.queue.put(None) # trigger get
 		self.queue._queue.pop()
+		self.prefetch()
 		return source
 	
 	async def player_task(self):
@@ -74,6 +80,7 @@ class AudioPlayer:
 		while True:
 			self.play_next_song.clear()
 			source = await self.queue.get()
+			self.prefetch()
 			await self.not_interrupted.wait()
 			if not source.stream:
 				now_playing_message = await self.bot.send_embed(self.text_channel, ":arrow_down: Downloading..", title = source.info.get("title", "N/A"), title_url = source.info.get("webpage_url"), timestamp = source.timestamp, footer_text = source.requester.display_name, footer_icon_url = source.requester.avatar_url, thumbnail_url = source.info.get("thumbnail"))
@@ -100,6 +107,12 @@ class AudioPlayer:
 		else:
 			self.bot.loop.call_soon_threadsafe(self.play_next_song.set)
 	
+	def prefetch(self):
+		'''Download the next songs in the queue in the background'''
+		for source in list(self.queue._queue)[:self.prefetch_count]:
+			if not source.stream and not source.initialized:
+				self.bot.audio_cache.prefetch(source.info)
+	
 	def skip(self):
 		if self.guild.voice_client and self.guild.voice_client.is_playing() or self.guild.voice_client.is_paused():
 			# Avoid setting _player to None (with voice_client.stop()) in case of use (e.g. replay) after skip
@@ -160,6 +173,7 @@ class AudioPlayer:
 			return discord.Embed(title = ":musical_score: Queue:", description = queue_string, color = self.bot.bot_color)
 	
 	async def empty_queue(self):
+		self.cancel_playlist_loading()
 		while not self.queue.empty():
 			song = await self.queue.get()
 			del song
@@ -172,26 +186,59 @@ class AudioPlayer:
 		random.shuffle(song_list)
 		for song in song_list:
 			await self.queue.put(song)
+		self.prefetch()
 	
 	async def add_playlist(self, ctx, playlist):
 		response = await ctx.embed_reply(":cd: Loading..")
 		func = functools.partial(self.bot.ytdl_playlist.extract_info, playlist, download = False)
-		info = await self.bot.loop.run_in_executor(None, func)
-		for position, video in enumerate(info["entries"], start = 1):
-			if not video: continue
-			try:
-				source = YTDLSource(ctx, video["id"])
-				source.set_info(video)
-				await self.queue.put(source)
-			except Exception as e:
-				try:
-					await self.bot.send_embed(self.text_channel, "{}: :warning: Error loading video {} (<{}>) from <{}>\n{}: {}".format(ctx.author.mention, position, "https://www.youtube.com/watch?v=" + video["id"], playlist, type(e).__name__, e))
-				except discord.HTTPException:
-					await self.bot.send_embed(self.text_channel, "{}: :warning: Error loading video {} (<{}>) from <{}>".format(ctx.author.mention, position, "https://www.youtube.com/watch?v=" + video["id"], playlist))
+		info = await self.bot.ytdl_info_cache.run(func)
+		entries = [entry for entry in info["entries"] if entry]
+		loader = self.bot.loop.create_task(self.load_playlist(ctx, playlist, entries, response), 
+											name = "Audio Player playlist loader")
+		self.playlist_loaders.add(loader)
+		loader.add_done_callback(self.playlist_loaders.discard)
+	
+	async def load_playlist(self, ctx, playlist, entries, response):
+		'''Resolve playlist entries concurrently, queueing each in order as soon as it and those before it resolve'''
+		semaphore = asyncio.Semaphore(self.playlist_concurrency)
+		async def resolve(entry):
+			async with semaphore:
+				return await self.bot.ytdl_info_cache.get(entry.get("url") or entry["id"])
+		tasks = [self.bot.loop.create_task(resolve(entry)) for entry in entries]
 		embed = response.embeds[0]
+		last_progress_update = time.monotonic()
+		added = 0
+		try:
+			for position, (entry, task) in enumerate(zip(entries, tasks), start = 1):
+				try:
+					source = YTDLSource(ctx, entry["id"])
+					source.set_info(await task)
+					await self.queue.put(source)
+					self.prefetch()
+					added += 1
+				except Exception as e:
+					try:
+						await self.bot.send_embed(self.text_channel, "{}: :warning: Error loading video {} (<{}>) from <{}>\n{}: {}".format(ctx.author.mention, position, "https://www.youtube.com/watch?v=" + entry["id"], playlist, type(e).__name__, e))
+					except discord.HTTPException:
+						await self.bot.send_embed(self.text_channel, "{}: :warning: Error loading video {} (<{}>) from <{}>".format(ctx.author.mention, position, "https://www.youtube.com/watch?v=" + entry["id"], playlist))
+				if time.monotonic() - last_progress_update >= self.playlist_progress_interval:
+					embed.description = f":cd: Loading.. ({position}/{len(entries)})"
+					await response.edit(embed = embed)
+					last_progress_update = time.monotonic()
+		except asyncio.CancelledError:
+			for task in tasks:
+				task.cancel()
+			embed.description = f":stop_button: Stopped loading playlist after adding {added} songs to the queue"
+			await response.edit(embed = embed)
+			raise
 		embed.description = ":ballot_box_with_check: Your songs have been added to the queue"
 		await response.edit(embed = embed)
 	
+	def cancel_playlist_loading(self):
+		for loader in self.playlist_loaders:
+			loader.cancel()
+		return len(self.playlist_loaders)
+	
 	async def interrupt(self, source, *, clear_flag = True):
 		if self.interrupted and clear_flag:
 			return False
@@ -213,15 +260,15 @@ class AudioPlayer:
 		return interrupt_message
 	
 	async def play_file(self, ctx, filename):
-		if not filename and self.audio_files:
-			filename = random.choice(self.audio_files)
-		elif filename not in self.audio_files:
+		if not filename and self.bot.audio_file_library.filenames:
+			filename = random.choice(self.bot.audio_file_library.filenames)
+		elif filename not in self.bot.audio_file_library:
 			await ctx.embed_reply(":no_entry: File not found")
 			return True
 		return await self.interrupt(FileSource(ctx, ctx.bot.data_path + "/audio_files/" + filename, self.default_volume, title_prefix = "Audio File: "))
 	
 	def list_files(self):
-		return ", ".join(self.audio_files)
+		return ", ".join(self.bot.audio_file_library.filenames)
 	
 	async def play_tts(self, ctx, message, *, amplitude = 100, pitch = 50, speed = 150, word_gap = 0, voice = "en-us+f1"):
 		if self.interrupted: return False
@@ -232,9 +279,9 @@ class AudioPlayer:
 		return interrupt_message
 	
 	async def play_from_library(self, ctx, *, filename = None, clear_flag = True):
-		if not filename and self.library_files:
-			filename = random.choice(self.library_files)
-		elif filename not in self.library_files:
+		if not filename and self.bot.music_library.filenames:
+			filename = random.choice(self.bot.music_library.filenames)
+		elif filename not in self.bot.music_library:
 			await ctx.embed_reply(":no_entry: Song file not found")
 			return True
 		return await self.interrupt(FileSource(ctx, ctx.bot.library_path + filename, self.default_volume, title_prefix = "Library File: "), clear_flag = clear_flag)
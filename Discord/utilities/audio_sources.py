@@ -1,10 +1,8 @@
 
 import discord
 
-import functools
 import logging
 import shlex
-import subprocess
 import os
 
 class ModifiedFFmpegPCMAudio(discord.FFmpegPCMAudio):
@@ -81,18 +79,16 @@ class TTSSource(ModifiedPCMVolumeTransformer):
 		self.voice = voice
 		
 		self.initialized = False
+		self.filename = None
 		self.title = "TTS Message: `{}`".format(self.message)
 	
 	async def generate_file(self):
-		func = functools.partial(subprocess.run, ["bin/eSpeak NG/espeak-ng", "--path=bin/eSpeak NG", 
-													f"-a {self.amplitude}", f"-p {self.pitch}", 
-													f"-s {self.speed}", f"-g {self.word_gap}", f"-v{self.voice}", 
-													f"-w {self.bot.data_path}/temp/tts.wav", self.message], 
-													creationflags = subprocess.CREATE_NO_WINDOW)
-		await self.bot.loop.run_in_executor(None, func)
+		self.filename = await self.bot.tts_cache.get(self.message, amplitude = self.amplitude, 
+														pitch = self.pitch, speed = self.speed, 
+														word_gap = self.word_gap, voice = self.voice)
 	
 	def initialize_source(self, volume):
-		super().__init__(ModifiedFFmpegPCMAudio(self.ctx, self.bot.data_path + "/temp/tts.wav"), volume)
+		super().__init__(ModifiedFFmpegPCMAudio(self.ctx, self.filename), volume)
 		self.initialized = True
 	
 	@classmethod
@@ -100,20 +96,12 @@ class TTSSource(ModifiedPCMVolumeTransformer):
 		source = cls(original.ctx, original.message, amplitude = original.amplitude, 
 						pitch = original.pitch, speed = original.speed, 
 						word_gap = original.word_gap, voice = original.voice)
-		if not os.path.exists(self.bot.data_path + "/temp/tts.wav"):
-			await source.generate_file()
+		await source.generate_file()
 		source.initialize_source(original.volume)
 		return source
 	
 	def cleanup(self):
 		if self.initialized: super().cleanup()
-		'''
-		if os.path.exists(self.bot.data_path + "/temp/tts.wav"):
-			try:
-				os.remove(self.bot.data_path + "/temp/tts.wav")
-			except PermissionError:
-				pass
-		'''
 
 
 class YTDLSource(ModifiedPCMVolumeTransformer):
@@ -138,9 +126,7 @@ class YTDLSource(ModifiedPCMVolumeTransformer):
 		self.previous_played_time = 0
 	
 	async def get_info(self):
-		func = functools.partial(self.bot.ytdl_info.extract_info, self.url, download = False)
-		info = await self.bot.loop.run_in_executor(None, func)
-		self.set_info(info)
+		self.set_info(await self.bot.ytdl_info_cache.get(self.url))
 	
 	def set_info(self, info):
 		self.info = next(iter(info.get("entries", [])), info)
@@ -153,9 +139,7 @@ class YTDLSource(ModifiedPCMVolumeTransformer):
 		if self.stream:
 			super().__init__(ModifiedFFmpegPCMAudio(self.ctx, self.info["url"]), volume)
 		else:
-			func = functools.partial(self.bot.ytdl_download.extract_info, self.info["webpage_url"], download = True)
-			info = await self.bot.loop.run_in_executor(None, func)
-			self.filename = self.bot.ytdl_download.prepare_filename(info)
+			self.filename = await self.bot.audio_cache.acquire(self.info)
 			
 			before_options = "-ss {}".format(self.info["start_time"]) if self.info.get("start_time") else None
 			self.previous_played_time = self.info.get("start_time") if self.info.get("start_time") else 0
@@ -171,9 +155,11 @@ class YTDLSource(ModifiedPCMVolumeTransformer):
 	
 	def cleanup(self):
 		if self.initialized: super().cleanup()
-		if self.filename and os.path.exists(self.filename):
+		if self.filename:
+			# Cleanup is called from the voice client's player thread
+			self.filename = None
 			try:
-				os.remove(self.filename)
-			except PermissionError as e:  # TODO: Fix
-				print(str(e))
+				self.bot.loop.call_soon_threadsafe(self.bot.audio_cache.release, self.info)
+			except RuntimeError:  # Event loop closed
+				pass
 
@@ -62,10 +62,7 @@ def not_forbidden():
 	async def predicate(ctx):
 		if ctx.channel.type is discord.ChannelType.private:
 			return True
-		command = ctx.command
-		while ((permitted := await ctx.get_permission(command.name, user = ctx.author)) is None
-				and command.parent is not None):
-			command = command.parent
+		permitted = await ctx.get_command_permission(user = ctx.author)
 		try:
 			return permitted is not False or await is_guild_owner().predicate(ctx)
 		except errors.NotGuildOwner:
@@ -76,10 +73,7 @@ def not_forbidden():
 def is_permitted():
 	
 	async def predicate(ctx):
-		command = ctx.command
-		while ((permitted := await ctx.get_permission(command.name, user = ctx.author)) is None
-				and command.parent is not None):
-			command = command.parent
+		permitted = await ctx.get_command_permission(user = ctx.author)
 		if permitted:
 			return True
 		raise errors.NotPermitted
@@ -2,6 +2,7 @@
 import discord
 from discord.ext import commands
 
+import collections
 from operator import attrgetter
 
 class Context(commands.Context):
@@ -58,38 +59,21 @@ class Context(commands.Context):
 	def whisper(self, *args, **kwargs):
 		return self.author.send(*args, **kwargs)
 	
-	# TODO: Improve
 	async def get_permission(self, permission, *, type = "user", user = None, id = None):
 		if not self.guild:
 			return True
-		role_ids = []
 		if type == "user":
-			if user:
-				id = user.id
-			user_setting  = await self.bot.db.fetchval(
-				"""
-				SELECT setting FROM permissions.users
-				WHERE guild_id = $1 AND user_id = $2 AND permission = $3
-				""", 
-				self.guild.id, id, permission
-			)
-			if user_setting is not None:
-				return user_setting
 			if not user:
 				user = self.guild.get_member(id)
-			role_ids.extend(role.id for role in sorted(user.roles, key = attrgetter("position"), reverse = True))
-		elif type == "role":
-			role_ids.append(id)
-		for role_id in role_ids:
-			role_setting = await self.bot.db.fetchval(
+			return await self.resolve_permission((permission,), user)
+		if type == "role":
+			return await self.bot.db.fetchval(
 				"""
 				SELECT setting FROM permissions.roles
 				WHERE guild_id = $1 AND role_id = $2 AND permission = $3
 				""", 
-				self.guild.id, role_id, permission
+				self.guild.id, id, permission
 			)
-			if role_setting is not None:
-				return role_setting
 		return await self.bot.db.fetchval(
 			"""
 			SELECT setting FROM permissions.everyone
@@ -97,4 +81,53 @@ class Context(commands.Context):
 			""", 
 			self.guild.id, permission
 		)
+	
+	async def get_command_permission(self, command = None, *, user = None, id = None):
+		'''
+		Get the effective permission for a command for a user
+		Falls back to the permissions for parent commands
+		'''
+		if not self.guild:
+			return True
+		command = command or self.command
+		if not user:
+			user = self.guild.get_member(id)
+		guild_cache = self.bot.permissions_cache.setdefault(self.guild.id, collections.OrderedDict())
+		if user.id in guild_cache:
+			guild_cache.move_to_end(user.id)
+		else:
+			guild_cache[user.id] = {}
+			if len(guild_cache) > self.bot.permissions_cache_size:
+				guild_cache.popitem(last = False)
+		cache = guild_cache[user.id]
+		if command.qualified_name not in cache:
+			cache[command.qualified_name] = await self.resolve_permission(
+				[command.name] + [parent.name for parent in command.parents], user
+			)
+		return cache[command.qualified_name]
+	
+	async def resolve_permission(self, permissions, user):
+		# Precedence is by position in permissions, then user, then roles by position, then everyone
+		role_ids = [role.id for role in sorted(user.roles, key = attrgetter("position"), reverse = True)]
+		return await self.bot.db.fetchval(
+			"""
+			SELECT setting FROM (
+				SELECT permission, setting, 0 AS precedence
+				FROM permissions.users
+				WHERE guild_id = $1 AND user_id = $2 AND permission = ANY($3::TEXT [])
+				UNION ALL
+				SELECT permission, setting, array_position($4::BIGINT [], role_id) AS precedence
+				FROM permissions.roles
+				WHERE guild_id = $1 AND role_id = ANY($4::BIGINT []) AND permission = ANY($3::TEXT [])
+				UNION ALL
+				SELECT permission, setting, cardinality($4::BIGINT []) + 1 AS precedence
+				FROM permissions.everyone
+				WHERE guild_id = $1 AND permission = ANY($3::TEXT [])
+			) AS settings
+			WHERE setting IS NOT NULL
+			ORDER BY array_position($3::TEXT [], permission), precedence
+			LIMIT 1
+			""", 
+			self.guild.id, user.id, list(permissions), role_ids
+		)
 
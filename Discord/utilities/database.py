@@ -1,6 +1,9 @@
 
+import asyncio
+import collections
 import contextlib
 import json
+import logging
 import os
 import sys
 
@@ -38,3 +41,201 @@ async def initialize_database_connection(connection):
 		schema = "pg_catalog"
 	)
 
+
+class BufferedDatabaseWriter:
+	
+	'''
+	Buffers records and writes them to the database in batches
+	Batches are written when batch_size records are buffered or every interval seconds
+	Writers wait for a flush when max_size records are buffered
+	Records buffered without waiting are dropped when max_size records are buffered
+	Batches that fail to be written are retried, split to skip records the database rejects
+	'''
+	
+	def __init__(self, database, query, *, batch_size = 100, interval = 1, max_size = 10000):
+		self.database = database
+		self.query = query
+		self.batch_size = batch_size
+		self.interval = interval
+		self.max_size = max_size
+		
+		self.records = []
+		self.dropped = 0
+		self.batch_ready = asyncio.Event()
+		self.closing = asyncio.Event()
+		self.lock = asyncio.Lock()
+		self.task = None
+	
+	def start(self, loop, name = "Write buffered records to database"):
+		self.task = loop.create_task(self.flush_periodically(), name = name)
+	
+	async def put(self, *record):
+		while len(self.records) >= self.max_size:
+			await self.flush()
+			if len(self.records) >= self.max_size:
+				# Write failed, so wait before retrying
+				await asyncio.sleep(self.interval)
+		self.records.append(record)
+		if len(self.records) >= self.batch_size:
+			self.batch_ready.set()
+	
+	def put_nowait(self, *record):
+		'''Buffer record without waiting for a flush, for use outside of coroutines'''
+		if len(self.records) >= self.max_size:
+			self.dropped += 1
+			return
+		self.records.append(record)
+		if len(self.records) >= self.batch_size:
+			self.batch_ready.set()
+	
+	async def flush_periodically(self):
+		while not self.closing.is_set():
+			with contextlib.suppress(asyncio.TimeoutError):
+				await asyncio.wait_for(self.batch_ready.wait(), timeout = self.interval)
+			await self.flush()
+	
+	async def flush(self):
+		async with self.lock:
+			self.batch_ready.clear()
+			if not self.records:
+				return
+			batches, self.records = [self.records], []
+			while batches:
+				batch = batches.pop()
+				try:
+					await self.write(batch)
+				except (asyncpg.DataError, asyncpg.IntegrityConstraintViolationError) as e:
+					if len(batch) > 1:
+						# Split to find the records the database rejects
+						batches.extend((batch[len(batch) // 2:], batch[:len(batch) // 2]))
+						continue
+					self.dropped += 1
+					logging.getLogger("errors").error(f"Dropped record rejected by database: {batch[0]}\n", 
+														exc_info = (type(e), e, e.__traceback__))
+				except asyncio.CancelledError:
+					# Keep records for a final flush
+					self.records[:0] = [record for records in (batch, *reversed(batches)) for record in records]
+					raise
+				except Exception as e:
+					# Keep records to retry on next flush, e.g. after losing the database connection
+					unwritten = [record for records in (batch, *reversed(batches)) for record in records]
+					self.records[:0] = unwritten
+					logging.getLogger("errors").error(f"Failed to write {len(unwritten)} records\n", 
+														exc_info = (type(e), e, e.__traceback__))
+					return
+	
+	async def write(self, records):
+		async with self.database.acquire() as connection:
+			async with connection.transaction():
+				await connection.executemany(self.query, records)
+	
+	async def close(self):
+		'''Stop flushing periodically, waiting for any flush in progress, then flush remaining records'''
+		self.closing.set()
+		self.batch_ready.set()
+		if self.task:
+			await asyncio.wait((self.task,))
+			self.task = None
+		await self.flush()
+
+class CommandStatsWriter:
+	
+	'''
+	Aggregates command invocation counts in memory
+	Counts are written to the database in one transaction every interval seconds
+	Counts not yet written, including those being written, are available with get_pending
+	'''
+	
+	def __init__(self, database, online_time, *, interval = 10):
+		self.database = database
+		self.online_time = online_time  # meta.stats timestamp
+		self.interval = interval
+		
+		self.commands_invoked = collections.Counter()
+		self.users_commands_invoked = collections.Counter()
+		# Being written
+		self.writing_commands_invoked = collections.Counter()
+		self.writing_users_commands_invoked = collections.Counter()
+		self.closing = asyncio.Event()
+		self.lock = asyncio.Lock()
+		self.task = None
+	
+	def start(self, loop, name = "Write command stats to database"):
+		self.task = loop.create_task(self.flush_periodically(), name = name)
+	
+	def add(self, command, user_id):
+		self.commands_invoked[command] += 1
+		self.users_commands_invoked[user_id] += 1
+	
+	def get_pending(self):
+		'''Returns counts of commands invoked and of users' commands invoked that aren't in the database yet'''
+		return (self.commands_invoked + self.writing_commands_invoked, 
+				self.users_commands_invoked + self.writing_users_commands_invoked)
+	
+	async def flush_periodically(self):
+		while not self.closing.is_set():
+			with contextlib.suppress(asyncio.TimeoutError):
+				await asyncio.wait_for(self.closing.wait(), timeout = self.interval)
+			await self.flush()
+	
+	async def flush(self):
+		# Only swapped under the lock, so adding counts never waits for a write
+		async with self.lock:
+			if not self.commands_invoked:
+				return
+			commands_invoked, self.commands_invoked = self.commands_invoked, collections.Counter()
+			users_commands_invoked, self.users_commands_invoked = self.users_commands_invoked, collections.Counter()
+			self.writing_commands_invoked.update(commands_invoked)
+			self.writing_users_commands_invoked.update(users_commands_invoked)
+		try:
+			await self.write(commands_invoked, users_commands_invoked)
+		except (Exception, asyncio.CancelledError) as e:
+			# Keep counts to retry on next flush
+			self.commands_invoked.update(commands_invoked)
+			self.users_commands_invoked.update(users_commands_invoked)
+			if isinstance(e, asyncio.CancelledError):
+				raise
+			logging.getLogger("errors").error("Failed to write command stats\n", 
+												exc_info = (type(e), e, e.__traceback__))
+		finally:
+			self.writing_commands_invoked -= commands_invoked
+			self.writing_users_commands_invoked -= users_commands_invoked
+	
+	async def write(self, commands_invoked, users_commands_invoked):
+		async with self.database.acquire() as connection:
+			async with connection.transaction():
+				await connection.execute(
+					"""
+					UPDATE meta.stats
+					SET commands_invoked = commands_invoked + $2
+					WHERE timestamp = $1
+					""", 
+					self.online_time, sum(commands_invoked.values())
+				)
+				await connection.executemany(
+					"""
+					INSERT INTO meta.commands_invoked (command, invokes)
+					VALUES ($1, $2)
+					ON CONFLICT (command) DO
+					UPDATE SET invokes = commands_invoked.invokes + $2
+					""", 
+					commands_invoked.items()
+				)
+				await connection.executemany(
+					"""
+					INSERT INTO users.stats (user_id, commands_invoked)
+					VALUES ($1, $2)
+					ON CONFLICT (user_id) DO
+					UPDATE SET commands_invoked = stats.commands_invoked + $2
+					""", 
+					users_commands_invoked.items()
+				)
+	
+	async def close(self):
+		'''Stop flushing periodically, waiting for any flush in progress, then flush remaining counts'''
+		self.closing.set()
+		if self.task:
+			await asyncio.wait((self.task,))
+			self.task = None
+		await self.flush()
+
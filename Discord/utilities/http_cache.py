@@ -0,0 +1,186 @@
+
+import asyncio
+import collections
+import contextlib
+import datetime
+import email.utils
+import hashlib
+import json
+import os
+import pickle
+import time
+
+from multidict import CIMultiDict
+from yarl import URL
+
+class CachedResponse:
+	
+	'''Response read from an aiohttp response, with the same interface for reading the body'''
+	
+	def __init__(self, method, url, status, reason, headers, body, expires = 0):
+		self.method = method
+		self.url = url
+		self.status = status
+		self.reason = reason
+		self.headers = headers
+		self.body = body
+		self.expires = expires  # time.time() timestamp
+	
+	@property
+	def content_type(self):
+		return self.headers.get("Content-Type", "application/octet-stream").split(';')[0].strip().lower()
+	
+	@property
+	def charset(self):
+		for parameter in self.headers.get("Content-Type", "").split(';')[1:]:
+			name, _, value = parameter.partition('=')
+			if name.strip().lower() == "charset":
+				return value.strip().strip('"')
+	
+	async def read(self):
+		return self.body
+	
+	async def text(self, encoding = None, errors = "strict"):
+		return self.body.decode(encoding or self.charset or "utf-8", errors)
+	
+	async def json(self, *, encoding = None, loads = json.loads, content_type = "application/json"):
+		# Content type isn't checked, as servers often mislabel JSON
+		return loads(await self.text(encoding))
+
+class HTTPResponseCache:
+	
+	'''
+	Cache of HTTP responses, used in place of an aiohttp session for requests to APIs
+	Responses are cached for as long as their Cache-Control or Expires headers allow,
+	unless overridden by a TTL for the request or for URLs starting with a prefix
+	Least recently used responses are evicted when the total size exceeds max_size bytes
+	'''
+	
+	def __init__(self, session, *, max_size = 2 ** 25, path = None):
+		self.session = session
+		self.max_size = max_size
+		self.path = path  # Pickle file to persist responses to, if any
+		
+		self.responses = collections.OrderedDict()  # {key: CachedResponse}, least recently used first
+		self.size = 0
+		self.ttls = {}  # {URL prefix: seconds}
+		self.hits = collections.Counter()  # {endpoint: count}
+		self.misses = collections.Counter()  # {endpoint: count}
+	
+	def set_ttl(self, url_prefix, ttl):
+		self.ttls[url_prefix] = ttl
+	
+	def get(self, url, **kwargs):
+		return self.request("GET", url, **kwargs)
+	
+	def post(self, url, **kwargs):
+		'''POST responses are only cached with a TTL override, e.g. for GraphQL queries'''
+		return self.request("POST", url, **kwargs)
+	
+	@contextlib.asynccontextmanager
+	async def request(self, method, url, *, ttl = None, **kwargs):
+		yield await self.fetch(method, url, ttl = ttl, **kwargs)
+	
+	async def fetch(self, method, url, *, ttl = None, **kwargs):
+		request_url = URL(url)
+		if params := kwargs.get("params"):
+			request_url = request_url.update_query(params)
+		url_prefix = self.get_url_prefix(str(request_url))
+		endpoint = url_prefix or str(request_url.with_query(None))
+		request = (method, str(request_url), 
+					json.dumps(kwargs.get("json"), sort_keys = True), repr(kwargs.get("data")), 
+					tuple(sorted((kwargs.get("headers") or {}).items())))
+		# Hashed, as the URL and headers can include API keys, and keys are persisted
+		key = hashlib.sha256(repr(request).encode()).hexdigest()
+		if (response := self.responses.get(key)) and response.expires > time.time():
+			self.hits[endpoint] += 1
+			self.responses.move_to_end(key)
+			return response
+		self.misses[endpoint] += 1
+		async with self.session.request(method, url, **kwargs) as resp:
+			# Without query or credentials, which can include API keys
+			response = CachedResponse(method, resp.url.with_query(None).with_user(None), resp.status, resp.reason, 
+										CIMultiDict(resp.headers), await resp.read())
+		if ttl is None:
+			if url_prefix:
+				ttl = self.ttls[url_prefix]
+			elif method == "GET":
+				ttl = self.get_header_ttl(response.headers)
+			else:
+				ttl = 0
+		if response.status == 200 and ttl > 0 and len(response.body) <= self.max_size:
+			response.expires = time.time() + ttl
+			self.store(key, response)
+		return response
+	
+	def get_url_prefix(self, url):
+		'''Longest prefix with a TTL override that the URL starts with'''
+		return max((prefix for prefix in self.ttls if url.startswith(prefix)), key = len, default = None)
+	
+	@staticmethod
+	def get_header_ttl(headers):
+		directives = {}
+		for directive in headers.get("Cache-Control", "").split(','):
+			name, _, value = directive.partition('=')
+			directives[name.strip().lower()] = value.strip().strip('"')
+		# Shared cache, so private responses aren't cached
+		if directives.keys() & {"no-store", "no-cache", "private"}:
+			return 0
+		age = int(headers.get("Age", 0)) if headers.get("Age", "").isdigit() else 0
+		for name in ("s-maxage", "max-age"):
+			if directives.get(name, "").isdigit():
+				return int(directives[name]) - age
+		if (expires := headers.get("Expires")):
+			try:
+				expires = to_utc(email.utils.parsedate_to_datetime(expires))
+				date = to_utc(email.utils.parsedate_to_datetime(headers["Date"])) if "Date" in headers else None
+			except (TypeError, ValueError):
+				return 0
+			if date:
+				return (expires - date).total_seconds()
+			return expires.timestamp() - time.time()
+		return 0
+	
+	def store(self, key, response):
+		if previous := self.responses.pop(key, None):
+			self.size -= len(previous.body)
+		self.responses[key] = response
+		self.size += len(response.body)
+		while self.size > self.max_size:
+			_, evicted = self.responses.popitem(last = False)
+			self.size -= len(evicted.body)
+	
+	def get_stats(self):
+		'''Returns {endpoint: (hits, misses)}, most requested first'''
+		requests = self.hits + self.misses
+		return {endpoint: (self.hits[endpoint], self.misses[endpoint]) for endpoint, _ in requests.most_common()}
+	
+	def load(self):
+		if not self.path or not os.path.isfile(self.path):
+			return
+		try:
+			with open(self.path, "rb") as cache_file:
+				responses = pickle.load(cache_file)
+		except (OSError, pickle.UnpicklingError, EOFError):
+			return
+		now = time.time()
+		for key, response in responses.items():
+			# Keys that aren't hashes are from an older version and can include API keys
+			if isinstance(key, str) and response.expires > now:
+				self.store(key, response)
+	
+	def save(self):
+		if not self.path:
+			return
+		with open(self.path, "wb") as cache_file:
+			pickle.dump(self.responses, cache_file)
+	
+	async def close(self):
+		await asyncio.get_running_loop().run_in_executor(None, self.save)
+
+
+def to_utc(timestamp):
+	'''Aware UTC datetime, assuming UTC if naive, e.g. for a -0000 zone'''
+	if timestamp.tzinfo is None:
+		return timestamp.replace(tzinfo = datetime.timezone.utc)
+	return timestamp.astimezone(datetime.timezone.utc)
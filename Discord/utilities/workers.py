@@ -0,0 +1,106 @@
+
+import asyncio
+import math
+import multiprocessing
+
+try:
+	import resource
+except ImportError:  # Windows
+	resource = None
+
+class WorkerPool:
+	
+	'''
+	Pool of long-lived worker processes for evaluating untrusted input
+	Workers that exceed the time limit are killed and replaced
+	Memory and CPU time resource limits are applied when available
+	'''
+	
+	def __init__(self, size = 2, *, memory_limit = 2 ** 29, cpu_time_limit = 10):
+		self.size = size
+		self.memory_limit = memory_limit  # bytes
+		self.cpu_time_limit = cpu_time_limit  # seconds, per task
+		
+		self.context = multiprocessing.get_context("spawn")
+		self.idle_workers = asyncio.Queue()
+		self.workers = []
+	
+	def start(self):
+		for _ in range(self.size):
+			self.idle_workers.put_nowait(self.create_worker())
+	
+	def create_worker(self):
+		connection, worker_connection = self.context.Pipe()
+		process = self.context.Process(target = run_worker, args = (worker_connection, self.memory_limit), 
+										name = "Evaluation worker", daemon = True)
+		process.start()
+		worker_connection.close()
+		self.workers.append((process, connection))
+		return process, connection
+	
+	def kill_worker(self, worker):
+		process, connection = worker
+		self.workers.remove(worker)
+		connection.close()
+		process.kill()
+		process.join()
+	
+	async def run(self, function, *args, timeout = 10.0):
+		'''
+		Call function with args in a worker process
+		Raises multiprocessing.TimeoutError if the time limit is exceeded
+		and MemoryError if the memory limit is exceeded
+		'''
+		loop = asyncio.get_running_loop()
+		worker = await self.idle_workers.get()
+		process, connection = worker
+		try:
+			connection.send((function, args, min(self.cpu_time_limit, math.ceil(timeout))))
+			succeeded, result = await loop.run_in_executor(None, receive, connection, timeout)
+		except (multiprocessing.TimeoutError, EOFError, OSError) as e:
+			# Hung, killed by resource limit, or otherwise unusable
+			await loop.run_in_executor(None, self.kill_worker, worker)
+			self.idle_workers.put_nowait(self.create_worker())
+			raise multiprocessing.TimeoutError from e
+		except BaseException:
+			# Cancelled, so the worker may still be computing a result no one will receive
+			self.kill_worker(worker)
+			self.idle_workers.put_nowait(self.create_worker())
+			raise
+		self.idle_workers.put_nowait(worker)
+		if not succeeded:
+			raise result
+		return result
+	
+	def close(self):
+		for worker in self.workers.copy():
+			self.kill_worker(worker)
+
+
+def receive(connection, timeout):
+	if not connection.poll(timeout):
+		raise multiprocessing.TimeoutError
+	return connection.recv()
+
+def run_worker(connection, memory_limit):
+	if resource and memory_limit:
+		resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+	while True:
+		try:
+			function, args, cpu_time_limit = connection.recv()
+		except EOFError:
+			return
+		if resource and cpu_time_limit:
+			# RLIMIT_CPU is cumulative for the process, so offset by the CPU time already used
+			usage = resource.getrusage(resource.RUSAGE_SELF)
+			cpu_time_used = math.ceil(usage.ru_utime + usage.ru_stime)
+			resource.setrlimit(resource.RLIMIT_CPU, (cpu_time_used + cpu_time_limit, resource.RLIM_INFINITY))
+		try:
+			result = (True, function(*args))
+		except Exception as e:
+			result = (False, e)
+		try:
+			connection.send(result)
+		except Exception as e:
+			connection.send((False, e))
+
@@ -1,10 +1,12 @@
 
 from twitchio.ext import commands
 
+import sys
 import textwrap
 
-# TODO: Create words unit
-# TODO: Use wordnik library?
+sys.path.insert(0, "..")
+from units.words import get_audio, get_definitions, UnitOutputError
+sys.path.pop(0)
 
 @commands.cog()
 class Words:
@@ -14,28 +16,21 @@ class Words:
 	
 	@commands.command()
 	async def define(self, ctx, *, word):
-		url = f"http://api.wordnik.com:80/v4/word.json/{word}/definitions"
-		params = {"limit": 1, "includeRelated": "false", "useCanonical": "false", "includeTags": "false", 
-					"api_key": self.bot.WORDNIK_API_KEY}
-		async with self.bot.aiohttp_session.get(url, params = params) as resp:
-			if resp.status == 404:
-				return await ctx.send("Error: Not found")
-			data = await resp.json()
-		if not data:
+		try:
+			definitions = await get_definitions(word, aiohttp_session = self.bot.aiohttp_session)
+		except UnitOutputError as e:
+			return await ctx.send(str(e))
+		if not definitions:
 			return await ctx.send("Definition not found.")
-		await ctx.send(f"{data[0]['word']}: {data[0]['text']}")
+		await ctx.send(f"{definitions[0]['word']}: {definitions[0]['text']}")
 	
 	@commands.command(aliases = ("audiodefine", "pronounce"))
 	async def pronunciation(self, ctx, word):
 		# TODO: Add phonetic/text pronunciation
-		url = f"http://api.wordnik.com:80/v4/word.json/{word}/audio"
-		params = {"useCanonical": "false", "limit": 1, "api_key": self.bot.WORDNIK_API_KEY}
-		async with self.bot.aiohttp_session.get(url, params = params) as resp:
-			if resp.status == 404:
-				return await ctx.send("Error: Not found")
-			data = await resp.json()
-			if resp.status == 429:
-				return await ctx.send(f"Error: {data['message']}")
+		try:
+			data = await get_audio(word, aiohttp_session = self.bot.aiohttp_session)
+		except UnitOutputError as e:
+			return await ctx.send(str(e))
 		if data:
 			await ctx.send(f"{data[0]['word'].capitalize()}: {data[0]['fileUrl']}")
 		else:
@@ -0,0 +1,83 @@
+
+import asyncio
+import datetime
+import types
+
+class FakeResponse:
+	
+	'''aiohttp response with a fixed status and body'''
+	
+	def __init__(self, data, status = 200):
+		self.data = data
+		self.status = status
+		self.reason = "Reason"
+	
+	async def __aenter__(self):
+		return self
+	
+	async def __aexit__(self, *args):
+		pass
+	
+	async def json(self):
+		return self.data
+	
+	async def read(self):
+		return self.data
+
+class FakeSession:
+	
+	'''aiohttp session with the response for the requested URL in responses, or the same response otherwise'''
+	
+	def __init__(self, data = None, status = 200, *, responses = None):
+		self.data = data
+		self.status = status
+		self.responses = responses or {}
+		self.requests = 0
+		self.urls = []
+	
+	def get(self, url, **kwargs):
+		self.requests += 1
+		self.urls.append(url)
+		return FakeResponse(self.responses.get(url, self.data), self.status)
+
+class FakeBot:
+	
+	'''Bot with the running event loop, no other cogs, and any other attributes'''
+	
+	def __init__(self, **attributes):
+		self.loop = asyncio.get_running_loop()
+		self.commands = []
+		self.__dict__.update(attributes)
+	
+	def add_command(self, command):
+		self.commands.append(command)
+	
+	def get_cog(self, name):
+		return None
+
+class FakeContext:
+	
+	'''Command context that records replies and other messages sent'''
+	
+	def __init__(self, bot, *, attachments = (), embed_links = True):
+		self.bot = bot
+		self.author = types.SimpleNamespace(id = 0)
+		self.message = types.SimpleNamespace(attachments = list(attachments), created_at = datetime.datetime.utcnow())
+		self.channel = None
+		permissions = types.SimpleNamespace(embed_links = embed_links)
+		self.me = types.SimpleNamespace(permissions_in = lambda channel: permissions)
+		self.replies = []
+		self.sent = []
+	
+	async def embed_reply(self, *args, **kwargs):
+		self.replies.append((args, kwargs))
+	
+	async def reply(self, *args, **kwargs):
+		self.replies.append((args, kwargs))
+	
+	async def embed_send(self, *args, **kwargs):
+		self.sent.append((args, kwargs))
+	
+	async def send(self, *args, **kwargs):
+		self.sent.append((args, kwargs))
+
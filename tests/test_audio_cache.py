@@ -0,0 +1,111 @@
+
+import asyncio
+import importlib.util
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from tests.fakes import FakeBot, FakeContext
+
+if importlib.util.find_spec("discord"):
+	sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "Discord"))
+	from utilities import errors
+	from utilities.audio_cache import TTSCache
+	from utilities.audio_sources import TTSSource
+	sys.path.pop(0)
+
+OPTIONS = {"amplitude": 100, "pitch": 50, "speed": 150, "word_gap": 0, "voice": "en-us+f1"}
+
+class FakeESpeakNG:
+	
+	'''Writes the message as the audio file'''
+	
+	def __init__(self, returncode = 0, output = True):
+		self.returncode = returncode
+		self.output = output
+		self.runs = 0
+	
+	def __call__(self, args, *, check = False, **kwargs):
+		self.runs += 1
+		if self.returncode and check:
+			raise subprocess.CalledProcessError(self.returncode, args, b"", b"Voice not found")
+		if self.output:
+			filename = next(arg for arg in args if arg.startswith("-w "))[3:]
+			with open(filename, 'w') as audio_file:
+				audio_file.write(args[-1])
+		return subprocess.CompletedProcess(args, self.returncode)
+
+@unittest.skipUnless(importlib.util.find_spec("discord"), "discord.py not installed")
+class TestTTSCache(unittest.IsolatedAsyncioTestCase):
+	
+	async def asyncSetUp(self):
+		directory = tempfile.TemporaryDirectory()
+		self.addCleanup(directory.cleanup)
+		self.directory = directory.name
+		self.cache = TTSCache(FakeBot(), self.directory, max_size = 10)
+		self.cache.bot.tts_cache = self.cache
+		self.espeak_ng = FakeESpeakNG()
+		for patcher in (mock.patch.object(subprocess, "run", self.espeak_ng), 
+						mock.patch.object(subprocess, "CREATE_NO_WINDOW", 0, create = True)):
+			patcher.start()
+			self.addCleanup(patcher.stop)
+	
+	def test_key_derivation(self):
+		key = self.cache.get_key("test", **OPTIONS)
+		self.assertEqual(key, self.cache.get_key("test", **dict(reversed(OPTIONS.items()))))
+		self.assertNotEqual(key, self.cache.get_key("Test", **OPTIONS))
+		self.assertNotEqual(key, self.cache.get_key("test", **{**OPTIONS, "voice": "en-us+m1"}))
+	
+	async def test_cached(self):
+		filename = await self.cache.get("test", **OPTIONS)
+		self.assertEqual(await self.cache.get("test", **OPTIONS), filename)
+		self.assertEqual(self.espeak_ng.runs, 1)
+		self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+		with open(filename) as audio_file:
+			self.assertEqual(audio_file.read(), "test")
+	
+	async def test_concurrent_synthesis_coalesced(self):
+		filenames = await asyncio.gather(*(self.cache.get("test", **OPTIONS) for _ in range(3)))
+		self.assertEqual(len(set(filenames)), 1)
+		self.assertEqual(self.espeak_ng.runs, 1)
+	
+	async def test_least_recently_used_evicted(self):
+		first = await self.cache.get("first", **OPTIONS)
+		second = await self.cache.get("second", **OPTIONS)
+		self.assertFalse(os.path.exists(first))
+		self.assertTrue(os.path.exists(second))
+		self.assertEqual(list(self.cache.files), [self.cache.get_key("second", **OPTIONS)])
+		self.assertEqual(self.cache.size, len("second"))
+	
+	async def test_failed_synthesis(self):
+		for espeak_ng in (FakeESpeakNG(returncode = 1), FakeESpeakNG(output = False)):
+			with mock.patch.object(subprocess, "run", espeak_ng):
+				with self.assertRaises(errors.AudioError):
+					await self.cache.get("test", **OPTIONS)
+		self.assertEqual(os.listdir(self.directory), [])
+		self.assertFalse(self.cache.files)
+		self.assertFalse(self.cache.syntheses)
+	
+	def test_load(self):
+		for name, content in (("a.wav", "audio"), ("b.1.tmp", "partial")):
+			with open(os.path.join(self.directory, name), 'w') as file:
+				file.write(content)
+		self.cache.load()
+		self.assertEqual(os.listdir(self.directory), ["a.wav"])
+		self.assertEqual(list(self.cache.files), ['a'])
+		self.assertEqual(self.cache.size, len("audio"))
+	
+	async def test_sources(self):
+		ctx = FakeContext(self.cache.bot)
+		sources = [TTSSource(ctx, "test"), TTSSource(ctx, "test"), TTSSource(ctx, "test", voice = "en-us+m1")]
+		await asyncio.gather(*(source.generate_file() for source in sources))
+		self.assertEqual(sources[0].filename, sources[1].filename)
+		self.assertNotEqual(sources[0].filename, sources[2].filename)
+		self.assertEqual(self.espeak_ng.runs, 2)
+		for source in sources:
+			with open(source.filename) as audio_file:
+				self.assertEqual(audio_file.read(), "test")
+
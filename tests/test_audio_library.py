@@ -0,0 +1,138 @@
+
+import contextlib
+import importlib.util
+import io
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from tests.fakes import FakeBot, FakeContext
+
+DEPENDENCIES = ("discord", "speech_recognition")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "Discord"))
+from utilities.audio_library import AudioLibrary, LibraryFile, get_trigrams
+if all(importlib.util.find_spec(name) for name in DEPENDENCIES):
+	from cogs.audio import Audio
+sys.path.pop(0)
+
+class TestAudioLibrarySearch(unittest.TestCase):
+	
+	def setUp(self):
+		self.library = AudioLibrary(None)
+		for name, tags in (("Reprise.mp3", {"title": "Hold On (Reprise)"}), 
+							("Holdout.mp3", {}), 
+							("Hold On.mp3", {"artist": "Band"}), 
+							("Other.mp3", {"album": "Holding Pattern"})):
+			self.library.add(LibraryFile(name, (0, 0), tags = tags))
+	
+	def test_whole_word_matches_first(self):
+		self.assertEqual(self.library.search("hold"), 
+							["Hold On.mp3", "Reprise.mp3", "Holdout.mp3", "Other.mp3"])
+	
+	def test_case_insensitive(self):
+		self.assertEqual(self.library.search("HOLD ON"), ["Hold On.mp3", "Reprise.mp3"])
+	
+	def test_tags_searched(self):
+		self.assertEqual(self.library.search("band"), ["Hold On.mp3"])
+		self.assertEqual(self.library.search("pattern"), ["Other.mp3"])
+	
+	def test_short_query(self):
+		self.assertEqual(self.library.search("on"), ["Hold On.mp3", "Reprise.mp3"])
+	
+	def test_no_matches(self):
+		self.assertEqual(self.library.search("missing"), [])
+		self.assertEqual(self.library.search("on hold"), [])
+
+class TestAudioLibraryIndex(unittest.TestCase):
+	
+	def test_add_and_remove(self):
+		library = AudioLibrary(None)
+		library.add(LibraryFile("abcd.mp3", (0, 0)))
+		library.add(LibraryFile("bcde.mp3", (0, 0)))
+		self.assertEqual(library.trigrams["bcd"], {"abcd.mp3", "bcde.mp3"})
+		library.remove("abcd.mp3")
+		self.assertNotIn("abcd.mp3", library)
+		self.assertNotIn("abc", library.trigrams)
+		self.assertEqual(library.trigrams["bcd"], {"bcde.mp3"})
+		library.remove("bcde.mp3")
+		self.assertEqual(library.trigrams, {})
+	
+	def test_readd_replaces(self):
+		library = AudioLibrary(None)
+		library.add(LibraryFile("song.mp3", (0, 0), tags = {"title": "Old"}))
+		library.add(LibraryFile("song.mp3", (1, 0), tags = {"title": "New"}))
+		self.assertEqual(len(library), 1)
+		self.assertEqual(library.search("old"), [])
+		self.assertEqual(library.search("new"), ["song.mp3"])
+		self.assertEqual(set(library.trigrams), get_trigrams("song.mp3\nnew"))
+
+class TestAudioLibraryRefresh(unittest.IsolatedAsyncioTestCase):
+	
+	def setUp(self):
+		directory = tempfile.TemporaryDirectory()
+		self.addCleanup(directory.cleanup)
+		self.directory = directory.name
+		self.library = AudioLibrary(self.directory, (".mp3",))
+	
+	def write(self, filename, content = ""):
+		with open(os.path.join(self.directory, filename), 'w') as file:
+			file.write(content)
+	
+	async def test_refresh(self):
+		self.write("a.mp3")
+		self.write("b.mp3")
+		self.write("c.txt")
+		await self.library.refresh()
+		self.assertEqual(self.library.filenames, ["a.mp3", "b.mp3"])
+		os.remove(os.path.join(self.directory, "a.mp3"))
+		await self.library.refresh()
+		self.assertEqual(self.library.filenames, ["b.mp3"])
+		self.assertEqual(self.library.search("a.m"), [])
+	
+	async def test_rewritten_file_reread(self):
+		self.write("a.mp3")
+		await self.library.refresh()
+		library_file = self.library.files["a.mp3"]
+		self.write("a.mp3", "rewritten")
+		await self.library.refresh()
+		self.assertIsNot(self.library.files["a.mp3"], library_file)
+	
+	async def test_missing_directory(self):
+		library = AudioLibrary(os.path.join(self.directory, "missing"))
+		await library.refresh()
+		self.assertEqual(library.filenames, [])
+
+@unittest.skipUnless(all(importlib.util.find_spec(name) for name in DEPENDENCIES), 
+						"Discord bot dependencies not installed")
+class TestAudioCogLibraries(unittest.IsolatedAsyncioTestCase):
+	
+	async def asyncSetUp(self):
+		directory = tempfile.TemporaryDirectory()
+		self.addCleanup(directory.cleanup)
+		music_directory = os.path.join(directory.name, "music")
+		os.mkdir(music_directory)
+		for filename in ("Hold On.mp3", "Other.mp3", "Notes.txt"):
+			open(os.path.join(music_directory, filename), 'w').close()
+		bot = FakeBot(data_path = directory.name, 
+						audio_file_library = AudioLibrary(os.path.join(directory.name, "audio_files")), 
+						music_library = AudioLibrary(music_directory, (".mp3",)))
+		self.audio = Audio(bot)
+		self.addCleanup(self.audio.cog_unload)
+	
+	async def test_refresh_and_search(self):
+		await self.audio.refresh_libraries()
+		ctx = FakeContext(self.audio.bot)
+		await self.audio.library_search.callback(self.audio, ctx, search = "hold")
+		await self.audio.library_search.callback(self.audio, ctx, search = "notes")
+		self.assertEqual(ctx.replies, [(("```\nHold On.mp3\n```",), {}), 
+										((":no_entry: No songs matching that search found",), {})])
+	
+	async def test_refresh_error(self):
+		with mock.patch.object(self.audio.bot.audio_file_library, "refresh", side_effect = OSError), \
+				contextlib.redirect_stderr(io.StringIO()), self.assertLogs("errors"):
+			await self.audio.refresh_libraries()
+		self.assertEqual(self.audio.bot.music_library.filenames, ["Hold On.mp3", "Other.mp3"])
+
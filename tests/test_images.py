@@ -0,0 +1,102 @@
+
+import importlib.util
+import os
+import sys
+import types
+import unittest
+
+from tests.fakes import FakeBot, FakeContext
+
+DEPENDENCIES = ("discord", "clarifai_grpc", "grpc", "imgurpython")
+
+if all(importlib.util.find_spec(name) for name in DEPENDENCIES):
+	from clarifai_grpc.grpc.api import service_pb2, resources_pb2
+	from clarifai_grpc.grpc.api.status import status_code_pb2, status_pb2
+	import grpc
+	sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "Discord"))
+	from cogs.images import Images
+	sys.path.pop(0)
+	
+	class FakeRpcError(grpc.RpcError):
+		
+		def details(self):
+			return "Deadline Exceeded"
+
+class FakeClarifaiStub:
+	
+	'''Returns an output with the input for each input, or raises an RpcError'''
+	
+	def __init__(self, error = False):
+		self.error = error
+		self.requests = []
+	
+	def PostModelOutputs(self, request, metadata = None, timeout = None):
+		self.requests.append(request)
+		if self.error:
+			raise FakeRpcError()
+		success = status_pb2.Status(code = status_code_pb2.SUCCESS)
+		return service_pb2.MultiOutputResponse(
+			status = success, 
+			outputs = [resources_pb2.Output(status = success, input = request_input) for request_input in request.inputs]
+		)
+
+@unittest.skipUnless(all(importlib.util.find_spec(name) for name in DEPENDENCIES), 
+						"Discord bot dependencies not installed")
+class TestGetClarifaiOutputs(unittest.IsolatedAsyncioTestCase):
+	
+	def create_images(self, clarifai_stub):
+		return Images(FakeBot(clarifai_stub = clarifai_stub, CLARIFAI_API_KEY = "Key", error_emoji = ":x:"))
+	
+	async def test_output_order(self):
+		images = self.create_images(FakeClarifaiStub())
+		await images.get_clarifai_outputs("model", ["https://b"])
+		urls = ["https://a", "https://b", "https://c", "https://a"]
+		outputs = await images.get_clarifai_outputs("model", urls)
+		self.assertEqual([url for url, output in outputs], urls)
+		self.assertEqual([output.input.data.image.url for url, output in outputs], urls)
+		self.assertEqual([request_input.data.image.url for request_input in images.bot.clarifai_stub.requests[1].inputs], 
+							["https://a", "https://c"])
+	
+	async def test_cache_hits(self):
+		images = self.create_images(FakeClarifaiStub())
+		await images.get_clarifai_outputs("model", ["https://a", "https://b"])
+		await images.get_clarifai_outputs("model", ["https://b", "https://a"])
+		self.assertEqual(len(images.bot.clarifai_stub.requests), 1)
+		# Cached per model
+		await images.get_clarifai_outputs("other model", ["https://a"])
+		self.assertEqual(len(images.bot.clarifai_stub.requests), 2)
+	
+	async def test_batched(self):
+		images = self.create_images(FakeClarifaiStub())
+		urls = [f"https://{index}" for index in range(130)]
+		outputs = await images.get_clarifai_outputs("model", urls)
+		self.assertEqual([len(request.inputs) for request in images.bot.clarifai_stub.requests], [128, 2])
+		self.assertEqual([output.input.data.image.url for url, output in outputs], urls)
+	
+	async def test_rpc_error(self):
+		images = self.create_images(FakeClarifaiStub(error = True))
+		outputs = await images.get_clarifai_outputs("model", ["https://a", "https://b"])
+		self.assertEqual([url for url, output in outputs], ["https://a", "https://b"])
+		for url, output in outputs:
+			self.assertEqual(output.status.code, status_code_pb2.FAILURE)
+			self.assertEqual(output.status.description, "Deadline Exceeded")
+		# Failures aren't cached
+		images.bot.clarifai_stub.error = False
+		outputs = await images.get_clarifai_outputs("model", ["https://a"])
+		self.assertEqual(outputs[0][1].status.code, status_code_pb2.SUCCESS)
+		self.assertEqual(len(images.bot.clarifai_stub.requests), 2)
+	
+	async def test_color_command(self):
+		images = self.create_images(FakeClarifaiStub())
+		ctx = FakeContext(images.bot, attachments = [types.SimpleNamespace(url = "https://a")])
+		await images.image_color.callback(images, ctx)
+		await images.image_color.callback(images, ctx)
+		self.assertEqual(len(images.bot.clarifai_stub.requests), 1)
+		self.assertEqual([kwargs["thumbnail_url"] for args, kwargs in ctx.replies], ["https://a", "https://a"])
+	
+	async def test_color_command_error(self):
+		images = self.create_images(FakeClarifaiStub(error = True))
+		ctx = FakeContext(images.bot)
+		await images.image_color.callback(images, ctx, "https://a")
+		self.assertEqual(ctx.replies, [((":x: Error: Deadline Exceeded",), {})])
+
@@ -1,12 +1,84 @@
 
+import os
+import tempfile
 import unittest
+from unittest import mock
 
 from hypothesis import given
 from hypothesis.strategies import floats, uuids
 
-from units.location import wind_degrees_to_direction
+from units import location
+from units.location import get_geocode_data, get_timezone_data, wind_degrees_to_direction
 from units.errors import UnitExecutionError
 
+from tests.fakes import FakeSession
+
+class TestLocationCache(unittest.IsolatedAsyncioTestCase):
+	
+	def setUp(self):
+		location.geocode_cache.clear()
+		location.timezone_cache.clear()
+	
+	async def test_geocode_normalized_query_cached(self):
+		session = FakeSession({"status": "OK", "results": [{"geometry": {"location": {"lat": 1, "lng": 2}}}]})
+		first = await get_geocode_data("New  York", aiohttp_session = session)
+		second = await get_geocode_data("new york ", aiohttp_session = session)
+		self.assertEqual(first, second)
+		self.assertEqual(session.requests, 1)
+	
+	async def test_timezone_cached(self):
+		session = FakeSession({"status": "OK", "rawOffset": 0, "dstOffset": 0})
+		await get_timezone_data(latitude = 1.5, longitude = 2.5, aiohttp_session = session)
+		await get_timezone_data(latitude = 1.5, longitude = 2.5, aiohttp_session = session)
+		self.assertEqual(session.requests, 1)
+	
+	async def test_error_not_cached(self):
+		session = FakeSession({"status": "ZERO_RESULTS"})
+		for _ in range(2):
+			with self.assertRaises(location.UnitOutputError):
+				await get_geocode_data("nowhere", aiohttp_session = session)
+		self.assertEqual(session.requests, 2)
+
+	async def test_geocode_least_recently_used_evicted(self):
+		session = FakeSession({"status": "OK", "results": [{"geometry": {"location": {"lat": 1, "lng": 2}}}]})
+		with mock.patch.object(location, "GEOCODE_CACHE_SIZE", 2):
+			for query in ("a", "b", "a", "c"):
+				await get_geocode_data(query, aiohttp_session = session)
+		self.assertEqual(list(location.geocode_cache), ['a', 'c'])
+	
+	async def test_timezone_previous_hours_pruned(self):
+		location.timezone_cache["1.5000,2.5000,2000-01-01T00"] = {"status": "OK", "rawOffset": 3600, "dstOffset": 0}
+		session = FakeSession({"status": "OK", "rawOffset": 0, "dstOffset": 0})
+		await get_timezone_data(latitude = 1.5, longitude = 2.5, aiohttp_session = session)
+		self.assertEqual(session.requests, 1)
+		self.assertNotIn("1.5000,2.5000,2000-01-01T00", location.timezone_cache)
+
+class TestLocationCacheFile(unittest.TestCase):
+	
+	def setUp(self):
+		location.geocode_cache.clear()
+		location.timezone_cache.clear()
+		self.addCleanup(setattr, location, "cache_path", None)
+		directory = tempfile.TemporaryDirectory()
+		self.addCleanup(directory.cleanup)
+		self.path = os.path.join(directory.name, "location_cache.json")
+	
+	def test_saved_and_loaded(self):
+		location.load_cache(self.path)
+		location.geocode_cache["place"] = (float("inf"), {"geometry": {}})
+		location.save_cache()
+		self.assertEqual(os.listdir(os.path.dirname(self.path)), ["location_cache.json"])
+		location.geocode_cache.clear()
+		location.load_cache(self.path)
+		self.assertEqual(location.geocode_cache, {"place": (float("inf"), {"geometry": {}})})
+	
+	def test_corrupted_cache_not_loaded(self):
+		with open(self.path, 'w') as cache_file:
+			cache_file.write('{"geocode": {"place": [')
+		location.load_cache(self.path)
+		self.assertEqual(location.geocode_cache, {})
+		self.assertEqual(location.cache_path, self.path)
+
 class TestWindDegreesToDirection(unittest.TestCase):
 	
 	@given(uuids())
@@ -0,0 +1,101 @@
+
+import importlib.util
+import os
+import sys
+import unittest
+
+from tests.fakes import FakeBot, FakeContext, FakeSession
+
+DEPENDENCIES = ("discord", "wolframalpha", "xmltodict", "youtube_dl")
+
+if all(importlib.util.find_spec(name) for name in DEPENDENCIES):
+	sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "Discord"))
+	from cogs.search import Search
+	sys.path.pop(0)
+
+# Recorded response for an @async pod URL of the query "pi"
+ASYNC_POD_RESPONSE = b"""<?xml version='1.0' encoding='UTF-8'?>
+<pod title='Decimal approximation'
+    scanner='Numeric'
+    id='DecimalApproximation'
+    position='200'
+    error='false'
+    numsubpods='1'
+    primary='true'>
+ <subpod title=''>
+  <plaintext>3.1415926535897932384626433832795028841971693993751058209749...</plaintext>
+ </subpod>
+ <states count='1'>
+  <state name='More digits'
+      input='DecimalApproximation__More digits' />
+ </states>
+</pod>"""
+
+ASYNC_POD_URL = "https://www6b3.wolframalpha.com/api/v1/asyncPod.jsp"
+
+QUERY_URL = "https://api.wolframalpha.com/v2/query"
+
+# Query response with a pod still being computed at ASYNC_POD_URL
+QUERY_RESPONSE = f"""<?xml version='1.0' encoding='UTF-8'?>
+<queryresult success='true'
+    error='false'
+    numpods='2'
+    timedout=''>
+ <pod title='Input'
+     scanner='Identity'
+     id='Input'
+     position='100'
+     error='false'
+     numsubpods='1'>
+  <subpod title=''>
+   <plaintext>pi</plaintext>
+  </subpod>
+ </pod>
+ <pod title='Decimal approximation'
+     scanner='Numeric'
+     id='DecimalApproximation'
+     position='200'
+     error='false'
+     numsubpods='0'
+     async='{ASYNC_POD_URL}' />
+</queryresult>""".encode()
+
+@unittest.skipUnless(all(importlib.util.find_spec(name) for name in DEPENDENCIES), 
+						"Discord bot dependencies not installed")
+class TestWolframAlpha(unittest.IsolatedAsyncioTestCase):
+	
+	def create_search(self, data = None):
+		session = FakeSession(data, responses = {QUERY_URL: QUERY_RESPONSE, ASYNC_POD_URL: ASYNC_POD_RESPONSE})
+		return Search(FakeBot(aiohttp_session = session, WOLFRAM_ALPHA_APP_ID = "ID", CODE_BLOCK = "```\n{}\n```", 
+								fake_ip = "127.0.0.1", fake_location = "Location"))
+	
+	async def test_async_pod_parsed(self):
+		index, pod = await self.create_search().retrieve_wolframalpha_pod(3, ASYNC_POD_URL)
+		self.assertEqual(index, 3)
+		self.assertEqual(pod.title, "Decimal approximation")
+		self.assertEqual(pod.id, "DecimalApproximation")
+		self.assertEqual([subpod.plaintext for subpod in pod.subpods], 
+							["3.1415926535897932384626433832795028841971693993751058209749..."])
+	
+	async def test_invalid_response(self):
+		index, pod = await self.create_search(b"<html>Error</html>").retrieve_wolframalpha_pod(0, "https://a")
+		self.assertEqual(index, 0)
+		self.assertIsNone(pod)
+	
+	async def test_command(self):
+		search = self.create_search()
+		ctx = FakeContext(search.bot, embed_links = False)
+		await search.wolframalpha.callback(search, ctx, search = "`pi`")
+		self.assertEqual(ctx.replies, [(("**Input**\n```\npi\n```",), {})])
+		self.assertEqual(ctx.sent, [(("**Decimal approximation**\n```\n"
+										"3.1415926535897932384626433832795028841971693993751058209749...\n```",), {})])
+		self.assertEqual(search.bot.aiohttp_session.urls, [QUERY_URL, ASYNC_POD_URL])
+	
+	async def test_command_cached(self):
+		search = self.create_search()
+		for _ in range(2):
+			ctx = FakeContext(search.bot, embed_links = False)
+			await search.wolframalpha.callback(search, ctx, search = "pi")
+			self.assertEqual(len(ctx.replies) + len(ctx.sent), 2)
+		self.assertEqual(search.bot.aiohttp_session.urls, [QUERY_URL, ASYNC_POD_URL])
+
@@ -0,0 +1,76 @@
+
+import os
+import tempfile
+import unittest
+
+from units import words
+from units.words import get_definitions, get_related_words
+from units.errors import UnitOutputError
+
+from tests.fakes import FakeSession
+
+class TestWordnikCache(unittest.IsolatedAsyncioTestCase):
+	
+	def setUp(self):
+		words.wordnik_cache.clear()
+		self.addCleanup(setattr, words, "cache_path", None)
+	
+	async def test_definitions_cached(self):
+		session = FakeSession([{"word": "test", "text": "A procedure"}, {"word": "test", "text": None}])
+		first = await get_definitions("test", aiohttp_session = session)
+		second = await get_definitions("test", aiohttp_session = session)
+		self.assertEqual(first, [{"word": "test", "text": "A procedure"}])
+		self.assertEqual(first, second)
+		self.assertEqual(session.requests, 1)
+	
+	async def test_relations_cached_separately(self):
+		session = FakeSession([{"relationshipType": "synonym", "words": ["exam"]}])
+		self.assertEqual(await get_related_words("test", "synonym", aiohttp_session = session), ["exam"])
+		await get_related_words("test", "antonym", aiohttp_session = session)
+		self.assertEqual(session.requests, 2)
+	
+	async def test_word_quoted(self):
+		session = FakeSession([])
+		await get_definitions("a/b?c#d", aiohttp_session = session)
+		self.assertEqual(session.urls, ["https://api.wordnik.com/v4/word.json/a%2Fb%3Fc%23d/definitions"])
+	
+	async def test_parameters_cached_separately(self):
+		session = FakeSession([{"relationshipType": "synonym", "words": ["exam"]}])
+		await get_related_words("tests", "synonym", use_canonical = True, aiohttp_session = session)
+		await get_related_words("tests", "synonym", use_canonical = False, aiohttp_session = session)
+		await get_related_words("tests", "synonym", use_canonical = True, aiohttp_session = session)
+		self.assertEqual(session.requests, 2)
+	
+	async def test_not_found_cached(self):
+		session = FakeSession({"message": "Not found"}, status = 404)
+		for _ in range(2):
+			self.assertEqual(await get_related_words("qwxz", "rhyme", aiohttp_session = session), [])
+		self.assertEqual(session.requests, 1)
+	
+	async def test_rate_limit_not_cached(self):
+		session = FakeSession({"message": "API rate limit exceeded"}, status = 429)
+		for _ in range(2):
+			with self.assertRaises(UnitOutputError):
+				await get_definitions("test", aiohttp_session = session)
+		self.assertEqual(session.requests, 2)
+	
+	async def test_saved_and_loaded(self):
+		with tempfile.TemporaryDirectory() as directory:
+			path = os.path.join(directory, "wordnik_cache.json")
+			words.load_cache(path)
+			session = FakeSession([{"word": "test", "text": "A procedure"}])
+			await get_definitions("test", aiohttp_session = session)
+			words.save_cache()
+			words.wordnik_cache.clear()
+			words.load_cache(path)
+			await get_definitions("test", aiohttp_session = session)
+			self.assertEqual(session.requests, 1)
+	
+	def test_corrupted_cache_not_loaded(self):
+		with tempfile.TemporaryDirectory() as directory:
+			path = os.path.join(directory, "wordnik_cache.json")
+			with open(path, 'w') as cache_file:
+				cache_file.write('[["test", "definitions", ')
+			words.load_cache(path)
+			self.assertEqual(words.wordnik_cache, {})
+
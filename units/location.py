@@ -1,14 +1,67 @@
 
 import datetime
+import json
 import os
+import time
 
 from .errors import UnitExecutionError, UnitOutputError
 
+GEOCODE_CACHE_SIZE = 10000  # entries
+GEOCODE_CACHE_TTL = 30 * 24 * 60 * 60  # seconds; places don't move
+
+# {normalized location: (expiry timestamp, geocode data)}, least recently used first
+geocode_cache = {}
+# {"latitude,longitude,UTC hour": timezone data}; offsets can change between hours with DST
+timezone_cache = {}
+cache_path = None
+
+def load_cache(path):
+	global cache_path
+	cache_path = path
+	if not os.path.isfile(path):
+		return
+	now = time.time()
+	try:
+		with open(path, 'r') as cache_file:
+			data = json.load(cache_file)
+		geocode_entries = {location: tuple(entry) for location, entry in data.get("geocode", {}).items() 
+							if entry[0] > now}
+		timezone_entries = dict(data.get("timezone", {}))
+	except (OSError, ValueError):
+		# Corrupted, e.g. by an interrupted save, so start empty
+		return
+	geocode_cache.update(geocode_entries)
+	while len(geocode_cache) > GEOCODE_CACHE_SIZE:
+		del geocode_cache[next(iter(geocode_cache))]
+	timezone_cache.update(timezone_entries)
+	prune_timezone_cache()
+
+def save_cache():
+	if not cache_path:
+		return
+	prune_timezone_cache()
+	# Written to a temporary file, then moved, so an interrupted save doesn't corrupt the cache
+	with open(cache_path + ".tmp", 'w') as cache_file:
+		json.dump({"geocode": geocode_cache, "timezone": timezone_cache}, cache_file)
+	os.replace(cache_path + ".tmp", cache_path)
+
+def prune_timezone_cache():
+	'''Only keep timezone data for the current hour'''
+	hour = datetime.datetime.utcnow().strftime("%Y-%m-%dT%H")
+	for key in [key for key in timezone_cache if not key.endswith(hour)]:
+		del timezone_cache[key]
+
+def normalize_location(location):
+	return ' '.join(location.lower().split())
+
 async def get_geocode_data(location, aiohttp_session = None):
 	# TODO: Add reverse option
 	if not aiohttp_session:
 		raise UnitExecutionError("aiohttp session required")
 		# TODO: Default aiohttp session?
+	if (cached := geocode_cache.pop(normalize_location(location), None)) and cached[0] > time.time():
+		geocode_cache[normalize_location(location)] = cached
+		return cached[1]
 	url = "https://maps.googleapis.com/maps/api/geocode/json"
 	params = {"address": location, "key": os.getenv("GOOGLE_API_KEY")}
 	async with aiohttp_session.get(url, params = params) as resp:
@@ -18,6 +71,9 @@ async def get_geocode_data(location, aiohttp_session = None):
 	if geocode_data["status"] != "OK":
 		raise UnitOutputError()
 		# TODO: error descriptions?
+	geocode_cache[normalize_location(location)] = (time.time() + GEOCODE_CACHE_TTL, geocode_data["results"][0])
+	if len(geocode_cache) > GEOCODE_CACHE_SIZE:
+		del geocode_cache[next(iter(geocode_cache))]
 	return geocode_data["results"][0]
 
 async def get_timezone_data(location = None, latitude = None, longitude = None, aiohttp_session = None):
@@ -30,7 +86,12 @@ async def get_timezone_data(location = None, latitude = None, longitude = None,
 		geocode_data = await get_geocode_data(location, aiohttp_session = aiohttp_session)
 		latitude = geocode_data["geometry"]["location"]["lat"]
 		longitude = geocode_data["geometry"]["location"]["lng"]
-	current_utc_timestamp = datetime.datetime.utcnow().timestamp()
+	current_utc_datetime = datetime.datetime.utcnow()
+	# Keyed by hour, so an offset isn't served past a DST transition for long
+	key = f"{float(latitude):.4f},{float(longitude):.4f},{current_utc_datetime.strftime('%Y-%m-%dT%H')}"
+	if cached := timezone_cache.get(key):
+		return cached
+	current_utc_timestamp = current_utc_datetime.timestamp()
 	url = "https://maps.googleapis.com/maps/api/timezone/json"
 	params = {"location": f"{latitude}, {longitude}", 
 				"timestamp": str(current_utc_timestamp), "key": os.getenv("GOOGLE_API_KEY")}
@@ -41,6 +102,8 @@ async def get_timezone_data(location = None, latitude = None, longitude = None,
 	if timezone_data["status"] != "OK":
 		error_message = timezone_data.get("errorMessage", timezone_data["status"])
 		raise UnitOutputError(f"Error: {error_message}")
+	prune_timezone_cache()
+	timezone_cache[key] = timezone_data
 	return timezone_data
 	
 def wind_degrees_to_direction(degrees):
@@ -0,0 +1,94 @@
+
+import json
+import os
+import time
+import urllib.parse
+
+from .errors import UnitExecutionError, UnitOutputError
+
+WORDNIK_CACHE_SIZE = 10000  # entries
+WORDNIK_CACHE_TTL = 90 * 24 * 60 * 60  # seconds; dictionary data is effectively static
+WORDNIK_AUDIO_CACHE_TTL = 60 * 60  # seconds; audio file URLs are signed and expire
+
+# {(word, relation, query string): (expiry timestamp, data)}, least recently used first
+wordnik_cache = {}
+cache_path = None
+
+def load_cache(path):
+	global cache_path
+	cache_path = path
+	if not os.path.isfile(path):
+		return
+	now = time.time()
+	try:
+		with open(path, 'r') as cache_file:
+			entries = {(word, relation, query): (expiry, data) 
+						for word, relation, query, expiry, data in json.load(cache_file) if expiry > now}
+	except ValueError:
+		# Corrupted, e.g. by an interrupted save, or from an older version, so start empty
+		return
+	wordnik_cache.update(entries)
+
+def save_cache():
+	if not cache_path:
+		return
+	now = time.time()
+	with open(cache_path, 'w') as cache_file:
+		json.dump([(word, relation, query, expiry, data) 
+					for (word, relation, query), (expiry, data) in wordnik_cache.items() if expiry > now], 
+					cache_file)
+
+async def get_wordnik_data(word, relation, endpoint, params = None, ttl = WORDNIK_CACHE_TTL, 
+							aiohttp_session = None):
+	'''Wordnik word API data, cached per word, relation and parameters'''
+	if not aiohttp_session:
+		raise UnitExecutionError("aiohttp session required")
+		# TODO: Default aiohttp session?
+	params = params or {}
+	key = (word, relation, urllib.parse.urlencode(sorted(params.items())))
+	if cached := wordnik_cache.pop(key, None):
+		if cached[0] > time.time():
+			wordnik_cache[key] = cached
+			return cached[1]
+	url = f"https://api.wordnik.com/v4/word.json/{urllib.parse.quote(word, safe = '')}/{endpoint}"
+	params = {**params, "api_key": os.getenv("WORDNIK_API_KEY")}
+	async with aiohttp_session.get(url, params = params) as resp:
+		if resp.status == 404:
+			# Word not found, which is as static as any other result
+			data = []
+		elif resp.status == 429:
+			data = await resp.json()
+			raise UnitOutputError(f"Error: {data['message']}")
+		elif resp.status != 200:
+			raise UnitOutputError(f"Error: {resp.status} {resp.reason}")
+		else:
+			data = await resp.json()
+	wordnik_cache[key] = (time.time() + ttl, data)
+	if len(wordnik_cache) > WORDNIK_CACHE_SIZE:
+		del wordnik_cache[next(iter(wordnik_cache))]
+	return data
+
+async def get_definitions(word, aiohttp_session = None):
+	'''Definitions of a word that have text'''
+	params = {"limit": 200, "includeRelated": "false", "useCanonical": "false", "includeTags": "false"}
+	definitions = await get_wordnik_data(word, "definitions", "definitions", params, 
+											aiohttp_session = aiohttp_session)
+	return [definition for definition in definitions if definition.get("text")]
+
+async def get_related_words(word, relationship_type, use_canonical = True, aiohttp_session = None):
+	params = {"relationshipTypes": relationship_type, "useCanonical": str(use_canonical).lower(), 
+				"limitPerRelationshipType": 100}
+	related_words = await get_wordnik_data(word, relationship_type, "relatedWords", params, 
+											aiohttp_session = aiohttp_session)
+	return related_words[0]["words"] if related_words else []
+
+async def get_pronunciations(word, aiohttp_session = None):
+	params = {"useCanonical": "false", "limit": 10}
+	return await get_wordnik_data(word, "pronunciations", "pronunciations", params, 
+									aiohttp_session = aiohttp_session)
+
+async def get_audio(word, aiohttp_session = None):
+	params = {"useCanonical": "false", "limit": 10}
+	return await get_wordnik_data(word, "audio", "audio", params, ttl = WORDNIK_AUDIO_CACHE_TTL, 
+									aiohttp_session = aiohttp_session)
+